@@ -2,6 +2,7 @@
 
 import streamlit as st
 from database import Database
+from cache_consultas import CacheConsultas
 from contas import Conta
 from controller.pagina import Pagina  # Importamos a classe que acabamos de criar
 
@@ -14,7 +15,28 @@ st.set_page_config(
 # Decorar com cache_resource para executar apenas uma vez por sessão
 @st.cache_resource
 def get_database():
-    db = Database()
+    # Cache de consultas pontuais é opcional: ligado por CACHE_CONSULTAS_TTL nos secrets
+    cache = None
+    if "CACHE_CONSULTAS_TTL" in st.secrets:
+        cache = CacheConsultas(ttl_segundos=float(st.secrets["CACHE_CONSULTAS_TTL"]))
+
+    # Cache entre processos (memoria, sqlite:///arquivo ou redis://...): ligado por CACHE_COMPARTILHADO
+    compartilhado = None
+    if "CACHE_COMPARTILHADO" in st.secrets:
+        from cache_compartilhado import CacheCompartilhado, criar_backend  # pyarrow só quando ligado
+        compartilhado = CacheCompartilhado(
+            criar_backend(st.secrets["CACHE_COMPARTILHADO"]),
+            ttl_segundos=float(st.secrets.get("CACHE_COMPARTILHADO_TTL", 600)),
+            prefixo=st.secrets.get("CACHE_COMPARTILHADO_PREFIXO", "")
+        )
+
+    db = Database(
+        cache_consultas=cache,
+        cache_compartilhado=compartilhado,
+        criar_tabelas=False,  # create_all_tables_once decide, com um SELECT, se há algo a fazer
+        classificacao_em_memoria=bool(st.secrets.get("CLASSIFICACAO_EM_MEMORIA", False)),
+        mensagens_em_memoria=bool(st.secrets.get("MENSAGENS_EM_MEMORIA", False))
+    )
     db.create_all_tables_once()
     return db
 
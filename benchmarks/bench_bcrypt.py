@@ -0,0 +1,57 @@
+"""
+
+Benchmark: logins por segundo (bcrypt.checkpw) em cada fator de custo, nesta máquina,
+com verificação direta (uma por vez, como no script do Streamlit) e pelo PoolSenhas.
+
+Uso:
+    python benchmarks/bench_bcrypt.py 10 14 32
+    (custo mínimo, custo máximo, logins simultâneos simulados)
+
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import hash_password, verify_password, PoolSenhas
+
+
+def medir_sequencial(hash_senha: str, quantidade: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(quantidade):
+        verify_password('senha-de-teste', hash_senha)
+    return quantidade / (time.perf_counter() - inicio)
+
+
+def medir_pool(hash_senha: str, quantidade: int, simultaneos: int) -> float:
+    # 'simultaneos' sessões do Streamlit pedindo login ao mesmo tempo, todas pelo mesmo pool
+    pool = PoolSenhas(fila=simultaneos)
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=simultaneos) as sessoes:
+        list(sessoes.map(lambda _: pool.verificar('senha-de-teste', hash_senha), range(quantidade)))
+    return quantidade / (time.perf_counter() - inicio)
+
+
+def main(custo_min: int, custo_max: int, simultaneos: int) -> None:
+    print(f"CPUs: {os.cpu_count()}  |  logins simultâneos: {simultaneos}")
+    print(f"{'custo':>5} {'ms/verificação':>15} {'logins/s (1 thread)':>20} {'logins/s (pool)':>16}")
+    for custo in range(custo_min, custo_max + 1):
+        hash_senha = hash_password('senha-de-teste', custo)
+
+        # Quantidade proporcional ao custo, para cada linha levar ~1-2 s
+        quantidade = max(4, int(2 ** (16 - custo)))
+        por_segundo = medir_sequencial(hash_senha, quantidade)
+        no_pool = medir_pool(hash_senha, quantidade * 2, simultaneos)
+        print(f"{custo:>5} {1000 / por_segundo:>15.1f} {por_segundo:>20.1f} {no_pool:>16.1f}")
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    main(
+        int(argumentos[0]) if len(argumentos) > 0 else 10,
+        int(argumentos[1]) if len(argumentos) > 1 else 14,
+        int(argumentos[2]) if len(argumentos) > 2 else 32,
+    )
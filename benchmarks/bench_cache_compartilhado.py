@@ -0,0 +1,68 @@
+"""
+
+Benchmark: N processos (como N workers do Streamlit) pedindo a mesma lista de aprovados e as
+mesmas listas de "usuários na frente", com o cache compartilhado em arquivo SQLite.
+Mostra quantas vezes o banco foi de fato consultado (uma por chave, graças à trava) e o tempo
+de leitura de um acerto (desserialização do Arrow IPC).
+
+Uso:
+    python benchmarks/bench_cache_compartilhado.py sqlite:////caminho/banco.db 4
+    (URL do banco, quantidade de processos)
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def trabalhador(db_url: str, arquivo_cache: str, fila) -> None:
+    from cache_compartilhado import CacheCompartilhado, BackendSQLite
+    from database import Database, retornarAprovados, retornarListaUsuariosNaFrente
+
+    cache = CacheCompartilhado(BackendSQLite(arquivo_cache))
+    db = Database(db_url, cache_compartilhado=cache)
+
+    inicio = time.perf_counter()
+    aprovados = retornarAprovados(db)
+    particoes = aprovados[['grupo', 'cota']].drop_duplicates()
+    for grupo, cota in particoes.itertuples(index=False):
+        retornarListaUsuariosNaFrente(db, grupo, 100, cota)
+    aquecimento = time.perf_counter() - inicio
+
+    # Com o cache já aquecido: só leitura do backend + desserialização
+    inicio = time.perf_counter()
+    for _ in range(20):
+        retornarAprovados(db)
+    acerto_ms = (time.perf_counter() - inicio) / 20 * 1000
+
+    fila.put((os.getpid(), cache.estatisticas(), aquecimento, acerto_ms, 1 + len(particoes)))
+
+
+def main(db_url: str, processos: int) -> None:
+    arquivo_cache = os.path.join(tempfile.mkdtemp(), 'cache.db')
+    fila = multiprocessing.Queue()
+    trabalhadores = [
+        multiprocessing.Process(target=trabalhador, args=(db_url, arquivo_cache, fila)) for _ in range(processos)
+    ]
+    for processo in trabalhadores:
+        processo.start()
+    resultados = [fila.get() for _ in trabalhadores]
+    for processo in trabalhadores:
+        processo.join()
+
+    print(f"{'pid':>8} {'cálculos':>9} {'esperas':>8} {'acertos':>8} {'aquecimento (s)':>16} {'acerto (ms)':>12}")
+    for pid, estatisticas, aquecimento, acerto_ms, _ in resultados:
+        print(f"{pid:>8} {estatisticas['calculos']:>9} {estatisticas['esperas']:>8} "
+              f"{estatisticas['acertos']:>8} {aquecimento:>16.3f} {acerto_ms:>12.2f}")
+    print(f"Consultas ao banco: {sum(r[1]['calculos'] for r in resultados)} "
+          f"(sem o cache compartilhado seriam {resultados[0][4] * processos})")
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    main(argumentos[0], int(argumentos[1]) if len(argumentos) > 1 else 4)
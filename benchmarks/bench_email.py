@@ -0,0 +1,79 @@
+"""
+
+Benchmark do canal de e-mail contra um servidor SMTP local (aiosmtpd, que só guarda as mensagens).
+
+Compara uma conexão SMTP nova e um e-mail montado por destinatário (como seria o envio ingênuo)
+com o CanalEmail (pool de conexões, e-mail montado uma vez, lotes de destinatários por DATA).
+
+Requer: pip install aiosmtpd
+
+Uso:
+    python benchmarks/bench_email.py 500
+
+"""
+
+import os
+import sys
+import time
+import smtplib
+from email.message import EmailMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller
+from envio_email import CanalEmail
+
+
+class _Caixa:
+    """ Handler do aiosmtpd que apenas conta mensagens e destinatários recebidos """
+    def __init__(self):
+        self.mensagens = 0
+        self.destinatarios = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.mensagens += 1
+        self.destinatarios += len(envelope.rcpt_tos)
+        return '250 OK'
+
+
+def ingenuo(host: str, porta: int, destinatarios: list, titulo: str, conteudo: str) -> None:
+    for d in destinatarios:
+        mensagem = EmailMessage()
+        mensagem['Subject'] = titulo
+        mensagem['From'] = 'coordenacao@exemplo.com'
+        mensagem['To'] = d['email']
+        mensagem.set_content(conteudo)
+        with smtplib.SMTP(host, porta) as conexao:
+            conexao.send_message(mensagem)
+
+
+def main(quantidade: int) -> None:
+    caixa = _Caixa()
+    servidor = Controller(caixa, hostname='127.0.0.1', port=8025)
+    servidor.start()
+
+    destinatarios = [{'n_inscr': str(i), 'email': f'candidato{i}@exemplo.com'} for i in range(quantidade)]
+    titulo, conteudo = 'Atualização das nomeações', 'Conteúdo de teste ' * 50
+
+    inicio = time.perf_counter()
+    ingenuo('127.0.0.1', 8025, destinatarios, titulo, conteudo)
+    tempo = time.perf_counter() - inicio
+    print(f"uma conexão por e-mail     : {tempo:6.2f}s  {quantidade / tempo:8.1f} destinatários/s  "
+          f"DATA={caixa.mensagens}")
+
+    for conexoes, tamanho_lote in [(1, 1), (2, 50), (4, 100)]:
+        caixa.mensagens = caixa.destinatarios = 0
+        canal = CanalEmail('127.0.0.1', 8025, remetente='coordenacao@exemplo.com', usar_tls=False,
+                           conexoes=conexoes, tamanho_lote=tamanho_lote)
+        inicio = time.perf_counter()
+        status = canal.enviar(destinatarios, titulo, conteudo)
+        tempo = time.perf_counter() - inicio
+        canal.fechar()
+        print(f"pool={conexoes} lote={tamanho_lote:<4}         : {tempo:6.2f}s  {quantidade / tempo:8.1f} destinatários/s  "
+              f"DATA={caixa.mensagens} ok={sum(s['sucesso'] for s in status)}")
+
+    servidor.stop()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,91 @@
+"""
+
+Benchmark: contagens "à frente de mim" pelo caminho do home.py (máscaras pandas sobre
+retornarAprovados + lista de usuários à frente) contra o IndiceClassificacao (searchsorted).
+
+Os DataFrames já estão em memória nos dois casos (como no cache do Streamlit):
+mede-se apenas o custo de cada consulta.
+
+Uso:
+    python benchmarks/bench_indice_classificacao.py 50000 20000
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from indice_classificacao import IndiceClassificacao, OPCOES
+
+GRUPOS = ['TI', 'Gestão', 'Direito']
+COTAS = ['AC', 'Racial', 'PcD']
+
+
+def gerar(qtde_aprovados: int, qtde_usuarios: int, semente: int = 42):
+    rng = np.random.default_rng(semente)
+    aprovados = pd.DataFrame({
+        'n_inscr': np.arange(qtde_aprovados).astype(str),
+        'grupo': rng.choice(GRUPOS, qtde_aprovados),
+        'cota': rng.choice(COTAS, qtde_aprovados, p=[0.7, 0.2, 0.1]),
+    })
+    aprovados['posicao'] = aprovados.groupby('grupo').cumcount() + 1
+    usuarios = aprovados.sample(qtde_usuarios, random_state=semente).copy()
+    usuarios['opcao'] = rng.choice(OPCOES, qtde_usuarios)
+    return aprovados, usuarios
+
+
+def caminho_atual(aprovados, usuarios, grupo, cota, posicao):
+    """ Reprodução das máscaras de apresentar_dados_decisoes """
+    frente = usuarios[(usuarios['grupo'] == grupo) & (usuarios['posicao'] < posicao) & (usuarios['cota'] == cota)]
+    aprov = aprovados[(aprovados['grupo'] == grupo) & (aprovados['posicao'] < posicao) & (aprovados['cota'] == cota)]
+    return {
+        'aprovados_frente': len(aprov),
+        'cadastrados_frente': len(frente),
+        'vai_assumir_frente': int((frente['opcao'] == 'Vai assumir').sum()),
+        'indecisos_frente': int((frente['opcao'] == 'Indeciso').sum()),
+        'nao_vai_assumir_frente': int((frente['opcao'] == 'Não vai assumir').sum()),
+    }
+
+
+def main(qtde_aprovados: int, qtde_usuarios: int, consultas: int = 500):
+    aprovados, usuarios = gerar(qtde_aprovados, qtde_usuarios)
+    amostra = usuarios.sample(consultas, replace=True, random_state=1)[['grupo', 'cota', 'posicao']].to_records(index=False)
+
+    inicio = time.perf_counter()
+    indice = IndiceClassificacao(aprovados, usuarios)
+    tempo_construcao = time.perf_counter() - inicio
+
+    # Confere que os dois caminhos dão o mesmo resultado
+    for grupo, cota, posicao in amostra[:50]:
+        assert caminho_atual(aprovados, usuarios, grupo, cota, posicao) == indice.na_frente(grupo, cota, posicao)
+
+    inicio = time.perf_counter()
+    for grupo, cota, posicao in amostra:
+        caminho_atual(aprovados, usuarios, grupo, cota, posicao)
+    tempo_atual = (time.perf_counter() - inicio) / consultas
+
+    inicio = time.perf_counter()
+    for grupo, cota, posicao in amostra:
+        indice.na_frente(grupo, cota, posicao)
+    tempo_indice = (time.perf_counter() - inicio) / consultas
+
+    alvo = usuarios.iloc[0]
+    inicio = time.perf_counter()
+    for opcao in OPCOES * 100:
+        indice.mudar_opcao(alvo['grupo'], alvo['cota'], alvo['posicao'], opcao)
+    tempo_ajuste = (time.perf_counter() - inicio) / 300
+
+    print(f"{qtde_aprovados} aprovados, {qtde_usuarios} usuários")
+    print(f"  construção do índice:        {tempo_construcao * 1000:9.2f} ms")
+    print(f"  máscaras pandas (home.py):   {tempo_atual * 1e6:9.1f} µs/consulta")
+    print(f"  IndiceClassificacao:         {tempo_indice * 1e6:9.1f} µs/consulta  ({tempo_atual / tempo_indice:.0f}x)")
+    print(f"  ajuste de opção:             {tempo_ajuste * 1e6:9.1f} µs")
+
+
+if __name__ == '__main__':
+    argumentos = [int(n) for n in sys.argv[1:]]
+    main(*(argumentos or [50000, 20000]))
@@ -0,0 +1,87 @@
+"""
+
+Benchmark de inicialização: tempo de importação do app (python -X importtime) e custo
+de create_all_tables_once num banco novo (carga completa) e num banco já inicializado.
+
+Uso:
+    python benchmarks/bench_inicializacao.py [relatorio.txt]
+    (sem argumento, grava benchmarks/relatorio_importtime.txt)
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+PESADOS = ['pandas', 'numpy', 'pyarrow', 'PIL', 'cryptography', 'validators', 'requests', 'sqlalchemy', 'bcrypt']
+
+
+def medir_importacao() -> tuple:
+    """ (linhas do -X importtime, módulos pesados carregados) de um 'import app' num processo novo """
+    codigo = f"import sys, app; print(','.join(m for m in {PESADOS!r} if m in sys.modules))"
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    linhas = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, acumulado, modulo = (parte.strip() for parte in linha[len('import time:'):].split('|'))
+        linhas.append((int(acumulado), int(proprio), modulo))
+    return linhas, processo.stdout.strip().splitlines()[-1].split(',')
+
+
+def medir_bootstrap(db_url: str) -> tuple:
+    """ (segundos, comandos SQL) de create_all_tables_once """
+    from sqlalchemy import event
+    from database import Database
+
+    db = Database(db_url, criar_tabelas=False)
+    comandos = []
+    ouvinte = lambda *argumentos: comandos.append(argumentos[2])
+    event.listen(db.engine, 'before_cursor_execute', ouvinte)
+    inicio = time.perf_counter()
+    db.create_all_tables_once()
+    duracao = time.perf_counter() - inicio
+    event.remove(db.engine, 'before_cursor_execute', ouvinte)
+    return duracao, len(comandos)
+
+
+def main(caminho_relatorio: str) -> None:
+    linhas, pesados = medir_importacao()
+    total = max(linhas)[0]
+
+    os.chdir(RAIZ)  # o snapshot de aprovados é lido com caminho relativo
+    db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    frio = medir_bootstrap(db_url)
+    quente = medir_bootstrap(db_url)
+
+    relatorio = [
+        "python -X importtime -c 'import app'",
+        f"Total: {total / 1000:.1f} ms",
+        f"Módulos pesados carregados: {', '.join(m for m in pesados if m) or 'nenhum'}",
+        "",
+        f"{'acumulado (ms)':>15} {'próprio (ms)':>13}  módulo",
+    ]
+    for acumulado, proprio, modulo in sorted(linhas, reverse=True)[:30]:
+        relatorio.append(f"{acumulado / 1000:>15.1f} {proprio / 1000:>13.1f}  {modulo}")
+    relatorio += [
+        "",
+        "create_all_tables_once (SQLite)",
+        f"  banco novo:        {frio[0] * 1000:8.1f} ms, {frio[1]} comandos SQL",
+        f"  já inicializado:   {quente[0] * 1000:8.1f} ms, {quente[1]} comando(s) SQL",
+    ]
+
+    with open(caminho_relatorio, 'w') as arquivo:
+        arquivo.write('\n'.join(relatorio) + '\n')
+    print('\n'.join(relatorio))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(RAIZ, 'benchmarks', 'relatorio_importtime.txt'))
@@ -0,0 +1,99 @@
+"""
+
+Benchmark: leitura da tabela 'usuarios' pelo caminho antigo (objetos ORM + dict por linha)
+contra o leitor Core com projeção de colunas e filtro no SQL (Database.lerTabela).
+
+Uso:
+    python benchmarks/bench_leitura_tabela.py 10000 100000
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from sqlalchemy import insert
+from database import Database, TabelaUsuario
+
+GRUPOS = ['TI', 'Gestão', 'Direito']
+COTAS = ['AC', 'Racial', 'PcD']
+OPCOES = ['Vai assumir', 'Indeciso', 'Não vai assumir']
+
+
+def popular(db: Database, quantidade: int) -> None:
+    agora = datetime.now()
+    registros = [
+        {
+            'n_inscr': str(850000000 + i),
+            'posicao': i // 9 + 1,
+            'nome': f'Candidato {i}',
+            'senha': '$2b$12$' + 'x' * 53,
+            'email': f'candidato{i}@exemplo.com',
+            'telefone': '65999999999',
+            'grupo': GRUPOS[i % 3],
+            'formacao_academica': 'Contabilidade',
+            'data_criacao': agora,
+            'data_ultima_modificacao': agora,
+            'opcao': OPCOES[i % 3],
+            'role': 'usuario',
+            'cota': COTAS[(i // 3) % 3],
+            'opcao_contato': 'Não desejo receber'
+        }
+        for i in range(quantidade)
+    ]
+    with db.engine.begin() as conexao:
+        conexao.execute(insert(TabelaUsuario), registros)
+
+
+def caminho_antigo(db: Database) -> pd.DataFrame:
+    """ Reprodução do retornarTabela original, para comparação """
+    with db.get_session() as session:
+        results = session.query(TabelaUsuario).all()
+        data = [
+            {column.name: getattr(obj, column.name) for column in obj.__table__.columns}
+            for obj in results
+        ]
+    return pd.DataFrame(data)
+
+
+def cronometrar(funcao, repeticoes: int = 3) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main(tamanhos):
+    for quantidade in tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            db = Database(f"sqlite:///{os.path.join(pasta, 'bench.db')}")
+            popular(db, quantidade)
+
+            colunas = ['n_inscr', 'posicao', 'grupo', 'cota', 'opcao']
+            casos = {
+                'ORM + dict por linha (antigo)': lambda: caminho_antigo(db),
+                'lerTabela (todas as colunas)': lambda: db.lerTabela(TabelaUsuario),
+                'lerTabela (5 colunas)': lambda: db.lerTabela(TabelaUsuario, colunas=colunas),
+                'lerTabela (5 colunas, arrow)': lambda: db.lerTabela(TabelaUsuario, colunas=colunas, usar_arrow=True),
+                'lerTabela (5 colunas, grupo no SQL)': lambda: db.lerTabela(TabelaUsuario, colunas=colunas, filtros={'grupo': 'TI'}),
+            }
+
+            base = None
+            print(f"\n{quantidade} linhas")
+            for nome, funcao in casos.items():
+                tempo = cronometrar(funcao)
+                base = base or tempo
+                print(f"  {nome:<40} {tempo * 1000:9.1f} ms   {base / tempo:5.1f}x")
+
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10000, 100000])
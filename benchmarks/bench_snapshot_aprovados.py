@@ -0,0 +1,109 @@
+"""
+
+Benchmark de memória: S sessões simultâneas lendo a lista de aprovados do seu grupo,
+pelo caminho atual (retornarAprovados com st.cache_data: cada chamada desserializa uma
+cópia inteira do DataFrame) contra o snapshot Arrow mapeado em memória (fatia sem cópia).
+
+Cada modo roda num processo novo; a memória é medida pelo RSS e pelo PSS (a parte das
+páginas compartilhadas atribuída ao processo) lidos de /proc.
+
+Uso:
+    python benchmarks/bench_snapshot_aprovados.py 200000 50
+    (quantidade de aprovados, sessões simultâneas)
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GRUPOS = ['TI', 'Gestão', 'Direito', 'Contabilidade', 'Engenharia']
+COTAS = ['AC', 'Racial', 'PcD']
+
+
+def memoria_mb() -> tuple:
+    """ (RSS, PSS) do processo atual, em MB """
+    valores = {}
+    caminho = '/proc/self/smaps_rollup' if os.path.exists('/proc/self/smaps_rollup') else '/proc/self/status'
+    with open(caminho) as arquivo:
+        for linha in arquivo:
+            nome, _, resto = linha.partition(':')
+            if nome in ('Rss', 'Pss', 'VmRSS'):
+                valores[nome] = int(resto.split()[0]) / 1024
+    rss = valores.get('Rss', valores.get('VmRSS', 0.0))
+    return rss, valores.get('Pss', rss)
+
+
+def popular(db_url: str, quantidade: int) -> None:
+    from sqlalchemy import insert
+    from database import Database, TabelaAprovados
+
+    db = Database(db_url)
+    registros = [
+        {
+            'n_inscr': str(850000000 + i),
+            'posicao': i // 15 + 1,
+            'nome': f'Candidato Aprovado {i}',
+            'grupo': GRUPOS[i % 5],
+            'cota': COTAS[(i // 5) % 3],
+        }
+        for i in range(quantidade)
+    ]
+    with db.engine.begin() as conexao:
+        conexao.execute(insert(TabelaAprovados), registros)
+
+
+def medir(modo: str, db_url: str, sessoes: int, fila) -> None:
+    from database import Database, retornarAprovados
+    from snapshot_aprovados import snapshot_aprovados
+
+    db = Database(db_url)
+    # Aquecimento (consulta ao banco e montagem do cache/snapshot) fora da medição
+    if modo == 'cache_data':
+        retornarAprovados(db)
+    else:
+        snapshot_aprovados(db)
+
+    antes = memoria_mb()
+    inicio = time.perf_counter()
+    resultados = []
+    for i in range(sessoes):
+        grupo = GRUPOS[i % len(GRUPOS)]
+        if modo == 'cache_data':
+            # Caminho atual: cópia inteira por chamada, filtrada depois
+            df = retornarAprovados(db)
+            resultados.append((df, df[df['grupo'] == grupo]))
+        else:
+            resultados.append(snapshot_aprovados(db).fatia(grupo))
+    duracao = time.perf_counter() - inicio
+    depois = memoria_mb()
+
+    fila.put((modo, duracao / sessoes * 1000, depois[0] - antes[0], depois[1] - antes[1]))
+
+
+def main(quantidade: int, sessoes: int) -> None:
+    diretorio = tempfile.mkdtemp()
+    db_url = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+    popular(db_url, quantidade)
+
+    print(f"{quantidade} aprovados, {sessoes} sessões simultâneas")
+    print(f"{'modo':>12} {'ms/chamada':>11} {'RSS extra (MB)':>15} {'PSS extra (MB)':>15}")
+    for modo in ('cache_data', 'snapshot'):
+        fila = multiprocessing.Queue()
+        processo = multiprocessing.Process(target=medir, args=(modo, db_url, sessoes, fila))
+        processo.start()
+        modo, ms, rss, pss = fila.get()
+        processo.join()
+        print(f"{modo:>12} {ms:>11.2f} {rss:>15.1f} {pss:>15.1f}")
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    main(
+        int(argumentos[0]) if len(argumentos) > 0 else 200000,
+        int(argumentos[1]) if len(argumentos) > 1 else 50,
+    )
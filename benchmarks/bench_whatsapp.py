@@ -0,0 +1,68 @@
+"""
+
+Benchmark: disparo sequencial (requests.post um a um, como era feito) contra o
+DisparadorWhatsApp (pool de threads + sessão HTTP + token bucket), usando o stub local da Twilio.
+
+Uso:
+    python benchmarks/bench_whatsapp.py 300 0.2 0.05
+    (destinatários, latência da API em segundos, taxa de erros 429/503)
+
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from envio_whatsapp import DisparadorWhatsApp
+from stub_twilio import iniciar_servidor
+
+
+def sequencial(url_api: str, destinatarios: list, conteudo: str) -> int:
+    enviados = 0
+    for d in destinatarios:
+        resposta = requests.post(url_api, data={"Body": conteudo, "To": f"whatsapp:+55{d['telefone']}"},
+                                 auth=('AC_teste', 'token'))
+        enviados += resposta.status_code == 201
+    return enviados
+
+
+def main(quantidade: int, latencia: float, taxa_erro: float) -> None:
+    destinatarios = [{'n_inscr': str(i), 'nome': f'Candidato {i}', 'telefone': '65999999999'}
+                     for i in range(quantidade)]
+    conteudo = 'Mensagem de teste'
+
+    servidor = iniciar_servidor(latencia=latencia, taxa_erro=taxa_erro)
+    url_base = f"http://127.0.0.1:{servidor.server_port}"
+
+    inicio = time.perf_counter()
+    enviados = sequencial(f"{url_base}/2010-04-01/Accounts/AC_teste/Messages.json", destinatarios, conteudo)
+    tempo = time.perf_counter() - inicio
+    print(f"sequencial             : {tempo:7.2f}s  {quantidade / tempo:7.1f} msg/s  enviados={enviados}")
+
+    for concorrencia, taxa in [(8, 50), (16, 100), (32, 200)]:
+        disparador = DisparadorWhatsApp('AC_teste', 'token', url_base=url_base, concorrencia=concorrencia,
+                                        mensagens_por_segundo=taxa, espera_maxima=2)
+        inicio = time.perf_counter()
+        status = disparador.enviar(destinatarios, conteudo)
+        tempo = time.perf_counter() - inicio
+        disparador.fechar()
+
+        enviados = sum(s['sucesso'] for s in status)
+        repetidos = sum(s['tentativas'] > 1 for s in status)
+        print(f"pool={concorrencia:<3} taxa={taxa:<4}/s : {tempo:7.2f}s  {quantidade / tempo:7.1f} msg/s  "
+              f"enviados={enviados} com_nova_tentativa={repetidos}")
+
+    servidor.shutdown()
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    main(
+        int(argumentos[0]) if len(argumentos) > 0 else 300,
+        float(argumentos[1]) if len(argumentos) > 1 else 0.2,
+        float(argumentos[2]) if len(argumentos) > 2 else 0.05,
+    )
@@ -0,0 +1,80 @@
+"""
+
+Servidor local que imita o endpoint de mensagens da Twilio, para medir o disparo sem rede.
+
+- Responde 201 com um JSON parecido com o da Twilio.
+- --latencia simula o tempo de resposta da API (segundos).
+- --taxa-erro devolve 429/503 numa fração das requisições (testa as novas tentativas).
+
+Uso:
+    python benchmarks/stub_twilio.py --porta 8099 --latencia 0.2 --taxa-erro 0.05
+    (e no secrets.toml: TWILIO_URL_BASE = "http://127.0.0.1:8099")
+
+"""
+
+import json
+import random
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # mantém a conexão aberta (keep-alive)
+    latencia = 0.0
+    taxa_erro = 0.0
+    contagem = {'recebidas': 0, 'erros': 0}
+    _lock = threading.Lock()
+
+    def do_POST(self):
+        corpo = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.latencia)
+
+        with self._lock:
+            self.contagem['recebidas'] += 1
+            erro = random.random() < self.taxa_erro
+            if erro:
+                self.contagem['erros'] += 1
+
+        if erro:
+            status, resposta = random.choice([429, 503]), {'message': 'Too Many Requests'}
+        else:
+            status, resposta = 201, {'sid': f"SM{random.getrandbits(64):016x}", 'status': 'queued',
+                                     'body': corpo.decode('utf-8', 'replace')}
+
+        dados = json.dumps(resposta).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar_servidor(porta: int = 0, latencia: float = 0.0, taxa_erro: float = 0.0) -> ThreadingHTTPServer:
+    """ Sobe o stub numa thread e devolve o servidor (porta real em servidor.server_port) """
+    manipulador = type('Manipulador', (_Manipulador,), {
+        'latencia': latencia, 'taxa_erro': taxa_erro, 'contagem': {'recebidas': 0, 'erros': 0}
+    })
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--porta', type=int, default=8099)
+    parser.add_argument('--latencia', type=float, default=0.2)
+    parser.add_argument('--taxa-erro', type=float, default=0.0)
+    args = parser.parse_args()
+
+    servidor = iniciar_servidor(args.porta, args.latencia, args.taxa_erro)
+    print(f"Stub da Twilio em http://127.0.0.1:{servidor.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
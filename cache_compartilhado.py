@@ -0,0 +1,252 @@
+"""
+
+Cache de DataFrames compartilhado entre processos (memória, arquivo SQLite ou servidor Redis),
+com serialização em Arrow IPC e trava por chave (single-flight)
+
+"""
+
+import time
+import uuid
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+import pandas as pd
+import pyarrow as pa
+
+
+def serializar(df: pd.DataFrame) -> bytes:
+    """ DataFrame -> bytes no formato de fluxo Arrow IPC (tipos e índice preservados) """
+    tabela = pa.Table.from_pandas(df)
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return destino.getvalue().to_pybytes()
+
+
+def desserializar(valor: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(valor).read_all().to_pandas()
+
+
+class BackendMemoria:
+    """ Backend no próprio processo (LRU + TTL); equivale aos caches atuais do Streamlit """
+
+    def __init__(self, tamanho_maximo: int = 2048):
+        self.tamanho_maximo = tamanho_maximo
+        self._entradas = OrderedDict()
+        self._travas = {}
+        self._lock = threading.Lock()
+
+    def obter(self, chave: str):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            expira_em, valor = entrada
+            if expira_em < time.time():
+                del self._entradas[chave]
+                return None
+            self._entradas.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave: str, valor: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entradas[chave] = (time.time() + ttl, valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+
+    def travar(self, chave: str, dono: str, prazo: float) -> bool:
+        with self._lock:
+            atual = self._travas.get(chave)
+            if atual is not None and atual[1] >= time.time():
+                return False
+            self._travas[chave] = (dono, time.time() + prazo)
+            return True
+
+    def destravar(self, chave: str, dono: str) -> None:
+        with self._lock:
+            if self._travas.get(chave, (None,))[0] == dono:
+                del self._travas[chave]
+
+
+class BackendSQLite:
+    """
+    Backend num arquivo SQLite local, compartilhado pelos processos da mesma máquina.
+    As leituras usam mmap (PRAGMA mmap_size): os blobs vêm do cache de páginas do sistema operacional.
+    """
+
+    def __init__(self, caminho: str, mmap_bytes: int = 256 * 1024 * 1024):
+        self.caminho = caminho
+        self.mmap_bytes = mmap_bytes
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(chave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira_em REAL NOT NULL)"
+            )
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS travas "
+                "(chave TEXT PRIMARY KEY, dono TEXT NOT NULL, expira_em REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _conectar(self):
+        # 'with conexao' só confirma ou desfaz a transação; closing fecha a conexão (e o arquivo)
+        with closing(sqlite3.connect(self.caminho, timeout=5)) as conexao:
+            conexao.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            with conexao:
+                yield conexao
+
+    def obter(self, chave: str):
+        with self._conectar() as conexao:
+            linha = conexao.execute(
+                "SELECT valor FROM cache WHERE chave = ? AND expira_em >= ?", (chave, time.time())
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def guardar(self, chave: str, valor: bytes, ttl: float) -> None:
+        with self._conectar() as conexao:
+            # Aproveita a escrita para descartar as entradas vencidas
+            conexao.execute("DELETE FROM cache WHERE expira_em < ?", (time.time(),))
+            conexao.execute(
+                "INSERT OR REPLACE INTO cache (chave, valor, expira_em) VALUES (?, ?, ?)",
+                (chave, valor, time.time() + ttl)
+            )
+
+    def travar(self, chave: str, dono: str, prazo: float) -> bool:
+        # DELETE + INSERT na mesma transação: a trava de escrita do SQLite serializa os processos
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM travas WHERE chave = ? AND expira_em < ?", (chave, time.time()))
+            cursor = conexao.execute(
+                "INSERT OR IGNORE INTO travas (chave, dono, expira_em) VALUES (?, ?, ?)",
+                (chave, dono, time.time() + prazo)
+            )
+            return cursor.rowcount == 1
+
+    def destravar(self, chave: str, dono: str) -> None:
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM travas WHERE chave = ? AND dono = ?", (chave, dono))
+
+
+# Apaga a trava só se ela ainda for do mesmo dono, numa única operação no servidor
+_LUA_DESTRAVAR = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class BackendRedis:
+    """
+    Backend num servidor compatível com Redis, compartilhado por todos os processos/máquinas.
+    Aceita um cliente já criado (ex.: um substituto local nos testes) ou uma URL.
+    """
+
+    def __init__(self, url: str = None, cliente=None):
+        if cliente is None:
+            import redis  # dependência opcional, só para este backend
+            cliente = redis.Redis.from_url(url)
+        self.cliente = cliente
+
+    def obter(self, chave: str):
+        return self.cliente.get(chave)
+
+    def guardar(self, chave: str, valor: bytes, ttl: float) -> None:
+        self.cliente.set(chave, valor, ex=max(1, int(ttl)))
+
+    def travar(self, chave: str, dono: str, prazo: float) -> bool:
+        return bool(self.cliente.set('trava:' + chave, dono, nx=True, px=int(prazo * 1000)))
+
+    def destravar(self, chave: str, dono: str) -> None:
+        # Só apaga a própria trava (a de outro dono aparece se a nossa tiver vencido). GET e DEL
+        # separados deixariam a trava vencer e ser obtida por outro entre os dois comandos
+        self.cliente.eval(_LUA_DESTRAVAR, 1, 'trava:' + chave, dono)
+
+
+class CacheCompartilhado:
+    """
+    Cache read-through de DataFrames sobre um backend compartilhado.
+
+    - As chaves devem incluir a versão da tabela (Database.versaoTabela), que fica no
+      banco: uma escrita em qualquer processo invalida o cache de todos.
+    - Numa falta, só quem obtém a trava da chave calcula o valor; os demais esperam
+      o resultado aparecer no backend, em vez de repetirem a mesma consulta.
+    """
+
+    def __init__(self, backend, ttl_segundos: float = 600, prefixo: str = '',
+                 prazo_trava: float = 30, espera_maxima: float = 30, intervalo_espera: float = 0.05):
+        """
+        :param backend: BackendMemoria, BackendSQLite ou BackendRedis.
+        :param ttl_segundos: tempo de vida de cada entrada.
+        :param prefixo: separa as chaves de bancos/ambientes diferentes no mesmo backend.
+        :param prazo_trava: validade da trava (libera a chave se o processo que calcula morrer).
+        :param espera_maxima: depois desse tempo esperando, o processo calcula por conta própria.
+        """
+        self.backend = backend
+        self.ttl_segundos = ttl_segundos
+        self.prefixo = prefixo
+        self.prazo_trava = prazo_trava
+        self.espera_maxima = espera_maxima
+        self.intervalo_espera = intervalo_espera
+
+        self._lock = threading.Lock()
+        self.metricas = {'acertos': 0, 'faltas': 0, 'calculos': 0, 'esperas': 0}
+
+    def _contar(self, metrica: str) -> None:
+        with self._lock:
+            self.metricas[metrica] += 1
+
+    def obter_ou_calcular(self, chave: str, calcular) -> pd.DataFrame:
+        """ Valor guardado em 'chave'; se não houver, calcula (uma única vez entre os processos) e guarda """
+        chave = self.prefixo + chave
+        valor = self.backend.obter(chave)
+        if valor is not None:
+            self._contar('acertos')
+            return desserializar(valor)
+
+        self._contar('faltas')
+        dono = uuid.uuid4().hex
+        limite = time.monotonic() + self.espera_maxima
+        while True:
+            if self.backend.travar(chave, dono, self.prazo_trava):
+                try:
+                    # Outro processo pode ter guardado o valor entre a falta e a trava
+                    valor = self.backend.obter(chave)
+                    if valor is None:
+                        self._contar('calculos')
+                        df = calcular()
+                        self.backend.guardar(chave, serializar(df), self.ttl_segundos)
+                        return df
+                finally:
+                    self.backend.destravar(chave, dono)
+                return desserializar(valor)
+
+            self._contar('esperas')
+            time.sleep(self.intervalo_espera)
+            valor = self.backend.obter(chave)
+            if valor is not None:
+                return desserializar(valor)
+            if time.monotonic() > limite:
+                self._contar('calculos')
+                return calcular()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            total = self.metricas['acertos'] + self.metricas['faltas']
+            return {**self.metricas, 'taxa_acerto': round(self.metricas['acertos'] / total, 3) if total else 0.0}
+
+
+def criar_backend(configuracao: str):
+    """
+    Backend a partir de CACHE_COMPARTILHADO:
+    'memoria', 'sqlite:///caminho/arquivo.db' ou 'redis://host:porta/0'.
+    """
+    if not configuracao or configuracao == 'memoria':
+        return BackendMemoria()
+    if configuracao.startswith('sqlite:///'):
+        return BackendSQLite(configuracao[len('sqlite:///'):])
+    if configuracao.startswith(('redis://', 'rediss://')):
+        return BackendRedis(url=configuracao)
+    raise ValueError(f"CACHE_COMPARTILHADO inválido: {configuracao}")
@@ -0,0 +1,101 @@
+"""
+
+Cache de leitura (read-through) para as consultas pontuais do Database
+
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class CacheConsultas:
+    """
+    Cache em memória, limitado por tamanho (LRU) e por tempo (TTL), para os
+    resultados de Database.retornarValor.
+
+    - A chave é (tabela, filtros).
+    - 'politicas' permite ajustar o TTL por tabela ou desligar o cache de uma tabela
+      (valor None). Por padrão, os documentos (blobs) nunca são guardados.
+    - Qualquer escrita numa tabela descarta as entradas daquela tabela.
+    """
+
+    POLITICAS_PADRAO = {
+        'documentos': None,
+    }
+
+    def __init__(self, tamanho_maximo: int = 1024, ttl_segundos: float = 60, politicas: dict = None):
+        """
+        :param tamanho_maximo: quantidade máxima de entradas guardadas.
+        :param ttl_segundos: tempo de vida padrão de cada entrada.
+        :param politicas: {nome_da_tabela: ttl_em_segundos ou None para nunca guardar}.
+        """
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl_segundos = ttl_segundos
+        self.politicas = {**self.POLITICAS_PADRAO, **(politicas or {})}
+
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.metricas = {'acertos': 0, 'faltas': 0, 'expiradas': 0, 'removidas_lru': 0, 'invalidadas': 0}
+
+    def ttl_de(self, tabela: str):
+        """ TTL da tabela, ou None se ela não deve ser guardada em cache """
+        return self.politicas.get(tabela, self.ttl_segundos)
+
+    @staticmethod
+    def chave(tabela: str, filtros: dict) -> tuple:
+        return (tabela, tuple(sorted(filtros.items())))
+
+    def obter(self, tabela: str, filtros: dict):
+        """ Retorna uma cópia do resultado guardado, ou None se não houver (ou tiver expirado) """
+        chave = self.chave(tabela, filtros)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                self.metricas['faltas'] += 1
+                return None
+
+            expira_em, valor = entrada
+            if expira_em < time.monotonic():
+                del self._entradas[chave]
+                self.metricas['expiradas'] += 1
+                self.metricas['faltas'] += 1
+                return None
+
+            self._entradas.move_to_end(chave)
+            self.metricas['acertos'] += 1
+            return [dict(linha) for linha in valor]
+
+    def guardar(self, tabela: str, filtros: dict, valor: list) -> None:
+        ttl = self.ttl_de(tabela)
+        if ttl is None:
+            return
+
+        chave = self.chave(tabela, filtros)
+        with self._lock:
+            self._entradas[chave] = (time.monotonic() + ttl, [dict(linha) for linha in valor])
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+                self.metricas['removidas_lru'] += 1
+
+    def invalidar(self, tabela: str) -> None:
+        """ Descarta todas as entradas de uma tabela (chamado a cada escrita) """
+        with self._lock:
+            chaves = [chave for chave in self._entradas if chave[0] == tabela]
+            for chave in chaves:
+                del self._entradas[chave]
+            self.metricas['invalidadas'] += len(chaves)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            total = self.metricas['acertos'] + self.metricas['faltas']
+            return {
+                **self.metricas,
+                'entradas': len(self._entradas),
+                'taxa_acerto': round(self.metricas['acertos'] / total, 3) if total else 0.0
+            }
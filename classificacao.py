@@ -0,0 +1,140 @@
+"""
+
+Classe para manter a tabela de classificação materializada (quem está à frente de cada posição)
+
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, update, func
+from database import Database, TabelaClassificacao, TabelaAprovados, TabelaUsuario
+
+# Coluna da classificação correspondente a cada opção do usuário
+COLUNAS_OPCAO = {
+    'Vai assumir': 'vai_assumir_frente',
+    'Indeciso': 'indecisos_frente',
+    'Não vai assumir': 'nao_vai_assumir_frente',
+}
+
+
+class Classificacao:
+    """
+    Mantém a tabela 'classificacao', em que cada linha (grupo, cota, posicao) guarda
+    os totais acumulados de quem está à frente daquela posição.
+
+    Cada cadastro, mudança de opção ou exclusão de usuário na posição p só precisa
+    somar/subtrair 1 nas linhas com posicao > p do mesmo grupo/cota (um único UPDATE).
+    """
+
+    def __init__(self, db: Database):
+        """
+        :param db: Instância de Database para operar o CRUD.
+        """
+        self.db = db
+
+    def consultar(self, grupo: str, cota: str, posicao: int) -> dict:
+        """ Retorna os totais à frente da posição (uma busca pela chave primária), ou None """
+        if self.db.classificacao_em_memoria:
+            from indice_classificacao import obter_indice
+            return {'grupo': grupo, 'cota': cota, 'posicao': posicao,
+                    **obter_indice(self.db).na_frente(grupo, cota, posicao)}
+
+        with self.db._sessao() as session:
+            linha = session.get(TabelaClassificacao, (grupo, cota, posicao))
+            if linha is None:
+                return None
+            return {coluna.name: getattr(linha, coluna.name) for coluna in TabelaClassificacao.__table__.columns}
+
+    def atualizacoes_recentes(self, grupo: str, cota: str, posicao: int, dias: int = 1) -> int:
+        """
+        Quantidade de usuários à frente que alteraram o cadastro nos últimos 'dias'.
+        Depende do relógio, por isso não é materializada: é um COUNT sobre o índice (grupo, cota, posicao).
+        """
+        with self.db._sessao() as session:
+            return session.execute(
+                select(func.count())
+                .select_from(TabelaUsuario)
+                .where(
+                    TabelaUsuario.grupo == grupo,
+                    TabelaUsuario.cota == cota,
+                    TabelaUsuario.posicao < posicao,
+                    TabelaUsuario.data_ultima_modificacao >= datetime.now() - timedelta(days=dias)
+                )
+            ).scalar()
+
+    def esta_vazia(self) -> bool:
+        if self.db.classificacao_em_memoria:
+            return False
+        with self.db._sessao() as session:
+            return session.execute(select(TabelaClassificacao.posicao).limit(1)).first() is None
+
+    def registrar_usuario(self, grupo: str, cota: str, posicao: int, opcao: str) -> None:
+        self._ajustar(grupo, cota, posicao, {'cadastrados_frente': 1, COLUNAS_OPCAO[opcao]: 1})
+
+    def remover_usuario(self, grupo: str, cota: str, posicao: int, opcao: str) -> None:
+        self._ajustar(grupo, cota, posicao, {'cadastrados_frente': -1, COLUNAS_OPCAO[opcao]: -1})
+
+    def mudar_opcao(self, grupo: str, cota: str, posicao: int, opcao_antiga: str, opcao_nova: str) -> None:
+        if opcao_antiga == opcao_nova:
+            return
+        if self.db.classificacao_em_memoria:
+            from indice_classificacao import aplicar_mudanca_opcao
+            aplicar_mudanca_opcao(self.db, grupo, cota, posicao, opcao_nova)
+            return
+        self._ajustar(grupo, cota, posicao, {COLUNAS_OPCAO[opcao_antiga]: -1, COLUNAS_OPCAO[opcao_nova]: 1})
+
+    def _ajustar(self, grupo: str, cota: str, posicao: int, deltas: dict) -> None:
+        """ Soma 'deltas' às colunas de todas as posições atrás de 'posicao' no mesmo grupo/cota """
+        if self.db.classificacao_em_memoria:
+            # O índice em memória percebe a escrita pela versão da tabela e se reconstrói
+            return
+        tabela = TabelaClassificacao.__table__
+        with self.db._sessao() as session:
+            session.execute(
+                update(TabelaClassificacao)
+                .where(
+                    TabelaClassificacao.grupo == grupo,
+                    TabelaClassificacao.cota == cota,
+                    TabelaClassificacao.posicao > posicao
+                )
+                .values({coluna: tabela.c[coluna] + delta for coluna, delta in deltas.items()})
+            )
+
+    def reconstruir(self) -> int:
+        """
+        Recalcula a tabela inteira a partir de 'lista_aprovados' e 'usuarios'.
+        Usado na carga inicial e quando a lista oficial muda. Retorna a quantidade de linhas.
+        """
+        if self.db.classificacao_em_memoria:
+            return 0
+
+        aprovados = self.db.lerTabela(TabelaAprovados, colunas=['grupo', 'cota', 'posicao'])
+        usuarios = self.db.lerTabela(TabelaUsuario, colunas=['grupo', 'cota', 'posicao', 'opcao'])
+        usuarios_por_particao = dict(list(usuarios.groupby(['grupo', 'cota'])))
+
+        linhas = []
+        for (grupo, cota), particao in aprovados.groupby(['grupo', 'cota']):
+            posicoes = np.sort(particao['posicao'].to_numpy())
+            totais = {'aprovados_frente': np.arange(len(posicoes))}
+
+            inscritos = usuarios_por_particao.get((grupo, cota), usuarios.iloc[0:0])
+            totais['cadastrados_frente'] = self._contar_antes(inscritos['posicao'], posicoes)
+            for opcao, coluna in COLUNAS_OPCAO.items():
+                totais[coluna] = self._contar_antes(inscritos.loc[inscritos['opcao'] == opcao, 'posicao'], posicoes)
+
+            linhas.append(pd.DataFrame({'grupo': grupo, 'cota': cota, 'posicao': posicoes, **totais}))
+
+        registros = pd.concat(linhas).to_dict('records') if linhas else []
+
+        with self.db._sessao() as session:
+            session.execute(delete(TabelaClassificacao))
+            if registros:
+                session.execute(insert(TabelaClassificacao), registros)
+
+        return len(registros)
+
+    @staticmethod
+    def _contar_antes(posicoes_usuarios: pd.Series, posicoes: np.ndarray) -> np.ndarray:
+        """ Para cada posição, quantos valores de 'posicoes_usuarios' são menores que ela """
+        return np.searchsorted(np.sort(posicoes_usuarios.to_numpy()), posicoes, side='left')
@@ -0,0 +1,90 @@
+"""
+
+Etapa de build: converte o CSV oficial de aprovados num snapshot Parquet tipado,
+validado e com hash do conteúdo (lido na inicialização para decidir se há carga a fazer)
+e dos bytes do CSV de origem (conferido na inicialização: se o CSV mudou, o snapshot é ignorado)
+
+Uso:
+    python construir_aprovados.py [aprovados.csv] [aprovados.parquet]
+
+"""
+
+import sys
+import hashlib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from database import COLUNAS_APROVADOS, CAMINHO_CSV_APROVADOS, CAMINHO_SNAPSHOT_APROVADOS, hash_do_arquivo
+
+ESQUEMA_APROVADOS = pa.schema([
+    ('n_inscr', pa.string()),
+    ('posicao', pa.int32()),
+    ('nome', pa.string()),
+    ('grupo', pa.string()),
+    ('cota', pa.string()),
+])
+
+
+def validar(df: pd.DataFrame) -> list:
+    """ Problemas encontrados na lista (vazia se estiver tudo certo) """
+    faltando = [coluna for coluna in COLUNAS_APROVADOS if coluna not in df.columns]
+    if faltando:
+        return [f"Colunas ausentes: {', '.join(faltando)}"]
+
+    problemas = []
+    for coluna in COLUNAS_APROVADOS:
+        vazios = int(df[coluna].isna().sum())
+        if vazios:
+            problemas.append(f"{vazios} linha(s) sem '{coluna}'")
+
+    posicoes = pd.to_numeric(df['posicao'], errors='coerce')
+    if (posicoes.isna() | (posicoes < 1) | (posicoes % 1 != 0)).any():
+        problemas.append("'posicao' deve ser um inteiro positivo")
+
+    repetidas = df.loc[df['n_inscr'].duplicated(), 'n_inscr'].tolist()
+    if repetidas:
+        problemas.append(f"Inscrições repetidas: {', '.join(repetidas[:10])}")
+
+    empatadas = df[df.duplicated(['grupo', 'cota', 'posicao'], keep=False)]
+    if not empatadas.empty:
+        problemas.append(f"{len(empatadas)} linha(s) com posição repetida no mesmo grupo/cota")
+    return problemas
+
+
+def hash_conteudo(df: pd.DataFrame) -> str:
+    """ SHA-256 das linhas em forma canônica (ordenadas por inscrição), independente do formato do arquivo """
+    digest = hashlib.sha256()
+    for linha in df.sort_values('n_inscr')[COLUNAS_APROVADOS].itertuples(index=False):
+        digest.update(('\x1f'.join(str(valor) for valor in linha) + '\n').encode())
+    return digest.hexdigest()
+
+
+def construir_snapshot(caminho_csv: str = CAMINHO_CSV_APROVADOS, caminho_parquet: str = CAMINHO_SNAPSHOT_APROVADOS) -> dict:
+    """ Lê, valida, tipa e grava o snapshot. Levanta ValueError se a lista tiver problemas. """
+    df = pd.read_csv(caminho_csv, sep=';', dtype={'n_inscr': str})
+    if 'cota' not in df.columns:
+        df['cota'] = 'AC'
+    df['cota'] = df['cota'].fillna('AC')
+
+    problemas = validar(df)
+    if problemas:
+        raise ValueError("Lista de aprovados inválida:\n- " + "\n- ".join(problemas))
+
+    df = df[COLUNAS_APROVADOS].sort_values(['grupo', 'cota', 'posicao'], ignore_index=True)
+    hash_lista = hash_conteudo(df)
+    hash_csv = hash_do_arquivo(caminho_csv)
+    tabela = pa.Table.from_pandas(df, schema=ESQUEMA_APROVADOS, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({'hash_conteudo': hash_lista, 'hash_csv': hash_csv, 'origem': caminho_csv})
+    pq.write_table(tabela, caminho_parquet, compression='zstd')
+    # Cópia dos hashes fora do Parquet (conteúdo e bytes do CSV, uma linha cada):
+    # a inicialização do app os lê sem importar o pyarrow
+    with open(caminho_parquet + '.sha256', 'w') as arquivo:
+        arquivo.write(f"{hash_lista}\n{hash_csv}\n")
+
+    return {'linhas': tabela.num_rows, 'hash_conteudo': hash_lista, 'hash_csv': hash_csv, 'arquivo': caminho_parquet}
+
+
+if __name__ == '__main__':
+    argumentos = sys.argv[1:]
+    resultado = construir_snapshot(*argumentos[:2])
+    print(f"{resultado['arquivo']}: {resultado['linhas']} aprovados, hash {resultado['hash_conteudo']}")
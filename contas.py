@@ -4,11 +4,11 @@ Classes para processar informações de Conta, inclusive relacionadas à sua cri
 
 """
 from datetime import datetime
+from sqlalchemy import update
 from typing import Union 
 from usuarios import Usuario, Coordenador, Superusuario
 from database import Database, TabelaUsuario, TabelaAprovados, TabelaDocumentos
-from utils import hash_password, verify_password
-from PIL import Image
+from utils import pool_senhas, precisa_rehash, SenhasOcupadas
 import io
 
 class Conta:
@@ -39,42 +39,46 @@ class Conta:
                     **kwargs
                    ) -> dict:
         
-        if self._existe_cadastro_previo(n_inscr):
-            return {
-                    'função': 'criarConta', 
-                    'data': datetime.now(), 
-                    'sucesso': False, 
-                    'resultado': 'Já existe conta para essa inscrição'
-                    }
+        # Todas as etapas (verificações, conta e documento) numa única transação
+        with self.db.unidadeDeTrabalho('criarConta'):
+            if self._existe_cadastro_previo(n_inscr):
+                return {
+                        'função': 'criarConta', 
+                        'data': datetime.now(), 
+                        'sucesso': False, 
+                        'resultado': 'Já existe conta para essa inscrição'
+                        }
         
-        dados_aprovacao = self._buscar_dados_colocacao(n_inscr)
+            dados_aprovacao = self._buscar_dados_colocacao(n_inscr)
         
-        if dados_aprovacao:
-            nome = dados_aprovacao['nome']
-            posicao = dados_aprovacao['posicao']
-            grupo = dados_aprovacao['grupo']
-            cota = dados_aprovacao['cota']
-            senha_criptografada = hash_password(senha)
-
-            self._adicionar_conta(nome, posicao, senha_criptografada, email, 
-                                  telefone, opcao, n_inscr, grupo, formacao_academica, cota,
-                                  opcao_contato)
+            if dados_aprovacao:
+                nome = dados_aprovacao['nome']
+                posicao = dados_aprovacao['posicao']
+                grupo = dados_aprovacao['grupo']
+                cota = dados_aprovacao['cota']
+                senha_criptografada = pool_senhas().gerar_hash(senha)
+
+                self._adicionar_conta(nome, posicao, senha_criptografada, email, 
+                                      telefone, opcao, n_inscr, grupo, formacao_academica, cota,
+                                      opcao_contato)
+                from classificacao import Classificacao  # numpy/pandas fora do caminho do login
+                Classificacao(self.db).registrar_usuario(grupo, cota, posicao, opcao)
             
-            self._armazenar_doc(n_inscr, documento)
+                self._armazenar_doc(n_inscr, documento)
 
-            return {
-                    'função': 'criarConta', 
-                    'data': datetime.now(), 
-                    'sucesso': True, 
-                    'resultado': f'Criado conta para {nome}'
-                    }
-        else:
-            return {
-                    'função': 'criarConta', 
-                    'data': datetime.now(), 
-                    'sucesso': False, 
-                    'resultado': 'Não encontrado número de inscrição do candidato.'
-                    }
+                return {
+                        'função': 'criarConta', 
+                        'data': datetime.now(), 
+                        'sucesso': True, 
+                        'resultado': f'Criado conta para {nome}'
+                        }
+            else:
+                return {
+                        'função': 'criarConta', 
+                        'data': datetime.now(), 
+                        'sucesso': False, 
+                        'resultado': 'Não encontrado número de inscrição do candidato.'
+                        }
 
 
 
@@ -90,8 +94,18 @@ class Conta:
         
         dados = self._buscar_dados_conta(n_inscr)
 
+        # A verificação (cara, de propósito) roda no pool limitado de senhas
+        try:
+            senha_correta = pool_senhas().verificar(senha, dados['senha'])
+        except SenhasOcupadas as erro:
+            return {
+                    'função': 'acessarConta', 
+                    'data': datetime.now(), 
+                    'sucesso': False, 
+                    'resultado': str(erro)
+                    }
 
-        if not verify_password(senha, dados['senha']):
+        if not senha_correta:
             return {
                     'função': 'acessarConta', 
                     'data': datetime.now(), 
@@ -104,6 +118,10 @@ class Conta:
             # if dados['nome'] == 'Jimmy Paiva Gomes':
             #     dados['role'] = 'superuser'
 
+            # Senha correta e custo do hash diferente do configurado: regrava com o custo atual
+            if precisa_rehash(dados['senha']):
+                dados['senha'] = self._regravar_hash(n_inscr, senha, dados['data_ultima_modificacao'])
+
             role = dados['role']
             conta_usuario = self.CLASSES[role](**dados)
 
@@ -115,6 +133,29 @@ class Conta:
                     'resultado': conta_usuario
                     }
         
+    def retomarConta(self, n_inscr: str) -> dict:
+        """
+        Reabre a conta de uma sessão já autenticada (token validado pelo GerenciadorSessoes):
+        uma busca pela chave primária, sem verificar a senha de novo.
+        """
+        linhas = self.db.retornarValor(TabelaUsuario, filter_dict={'n_inscr': n_inscr})
+        if not linhas:
+            return {
+                    'função': 'retomarConta', 
+                    'data': datetime.now(), 
+                    'sucesso': False, 
+                    'resultado': 'Não existe conta criada para essa inscrição'
+                    }
+
+        dados = linhas[0]
+        self.role = dados['role']
+        return {
+                'função': 'retomarConta', 
+                'data': datetime.now(), 
+                'sucesso': True, 
+                'resultado': self.CLASSES[dados['role']](**dados)
+                }
+
     # def _normalizarCota(self, cota):
     #     """ Método para normalizar cota, caso haja mais de uma """
     #     if "PcD" in cota:
@@ -125,6 +166,21 @@ class Conta:
     #         cota_modif = "Aprovado"
     #     return cota_modif
         
+    def _regravar_hash(self, n_inscr: str, senha: str, data_ultima_modificacao) -> str:
+        # Mantém a data de modificação: trocar o hash não é uma alteração de cadastro
+        # (UPDATE direto: pelo ORM, repetir o mesmo valor dispararia o onupdate da coluna)
+        novo_hash = pool_senhas().gerar_hash(senha)
+        with self.db._sessao() as session:
+            session.execute(
+                update(TabelaUsuario)
+                .where(TabelaUsuario.n_inscr == n_inscr)
+                .values(senha=novo_hash, data_ultima_modificacao=data_ultima_modificacao)
+            )
+            # Só o cache de consultas (que guarda a linha com o hash): as versões ficam como estão,
+            # porque nada que os outros caches leem mudou (o hash antigo valida a mesma senha)
+            self.db.invalidarCache(TabelaUsuario)
+        return novo_hash
+
     def _existe_cadastro_previo(self, n_inscr) -> bool:
         return len(self.db.retornarValor(TabelaUsuario, filter_dict={'n_inscr': n_inscr})) != 0
     
@@ -172,8 +228,9 @@ class Conta:
         # 1) Ler o documento em memória
         conteudo_original = documento.read()
 
-        # 2) Abrir com Pillow
+        # 2) Abrir com Pillow (importado aqui: só o envio de documento precisa dele)
         # Obs: como 'documento' é um UploadedFile, podemos criar um BytesIO a partir dele
+        from PIL import Image
         image = Image.open(io.BytesIO(conteudo_original))
 
         # 3) (Opcional) Converter para RGB (caso seja RGBA ou outro modo)
@@ -4,7 +4,11 @@ import streamlit as st
 import pandas as pd
 import os
 import datetime
-from database import Database, TabelaUsuario
+from database import Database, TabelaUsuario, snapshot_desatualizado, CAMINHO_SNAPSHOT_APROVADOS, CAMINHO_CSV_APROVADOS
+from importacao import ImportadorAprovados
+from classificacao import Classificacao
+from migracoes import aplicar_migracoes
+from migracoes.planos import verificar_indices
 from utils import carregar_chave_criptografia, decriptar_arquivo
 from sqlalchemy import text
 
@@ -40,28 +44,32 @@ def administrar_web_app(db: Database):
     n_inscr_reset = st.text_input("Número de Inscrição para Resetar Conta", key="reset_user_input")
     if st.button("Resetar Conta"):
         if n_inscr_reset:
-            with db.get_session() as session:
-                user_to_delete = session.query(TabelaUsuario).filter_by(n_inscr=n_inscr_reset).one_or_none()
-                if user_to_delete:
-                    # Excluir o usuário do banco de dados
-                    session.delete(user_to_delete)
-                    session.commit()
+            # Excluir o usuário do banco de dados (e retirá-lo da classificação)
+            with db.unidadeDeTrabalho('resetarConta'):
+                usuario_reset = db.retornarValor(TabelaUsuario, {"n_inscr": n_inscr_reset})
+                if usuario_reset:
+                    dados_reset = usuario_reset[0]
+                    db.deletarDados(TabelaUsuario, {"n_inscr": n_inscr_reset})
+                    Classificacao(db).remover_usuario(
+                        dados_reset['grupo'], dados_reset['cota'], dados_reset['posicao'], dados_reset['opcao']
+                    )
+
+            if usuario_reset:
+                # Excluir arquivos relacionados ao usuário
+                pasta_destino = "documentos_auditoria"
+                if os.path.exists(pasta_destino):
+                    arquivos = [f for f in os.listdir(pasta_destino) if n_inscr_reset in f]
+                    for arquivo in arquivos:
+                        caminho_arquivo = os.path.join(pasta_destino, arquivo)
+                        try:
+                            os.remove(caminho_arquivo)
+                            st.info(f"Arquivo {arquivo} excluído.")
+                        except Exception as e:
+                            st.error(f"Erro ao excluir o arquivo {arquivo}: {e}")
 
-                    # Excluir arquivos relacionados ao usuário
-                    pasta_destino = "documentos_auditoria"
-                    if os.path.exists(pasta_destino):
-                        arquivos = [f for f in os.listdir(pasta_destino) if n_inscr_reset in f]
-                        for arquivo in arquivos:
-                            caminho_arquivo = os.path.join(pasta_destino, arquivo)
-                            try:
-                                os.remove(caminho_arquivo)
-                                st.info(f"Arquivo {arquivo} excluído.")
-                            except Exception as e:
-                                st.error(f"Erro ao excluir o arquivo {arquivo}: {e}")
-
-                    st.success("Conta e arquivos associados deletados com sucesso!")
-                else:
-                    st.error("Usuário não encontrado.")
+                st.success("Conta e arquivos associados deletados com sucesso!")
+            else:
+                st.error("Usuário não encontrado.")
         else:
             st.error("Por favor, forneça um número de inscrição válido.")
 
@@ -110,8 +118,62 @@ def administrar_web_app(db: Database):
                 st.success(f"Role atualizado para '{novo_role}' com sucesso!")
 
     # ---------------------------------------------------------
-    # 6. Modificar banco de dados 
+    # 6. Atualizar a lista oficial de aprovados (importação incremental)
     # ---------------------------------------------------------
+    st.write("### Atualizar Lista Oficial de Aprovados")
+    if snapshot_desatualizado():
+        st.warning(
+            f"{CAMINHO_SNAPSHOT_APROVADOS} não corresponde a {CAMINHO_CSV_APROVADOS}: a inicialização está "
+            "usando o CSV. Rode construir_aprovados.py e publique o snapshot novo."
+        )
+    arquivo_lista = st.file_uploader("Envie o CSV republicado (separado por ';')", type=["csv"], key="upload_lista_aprovados")
+    simular = st.checkbox("Apenas simular (não grava no banco)", value=True, key="simular_importacao")
+    confirmar_remocoes = st.checkbox(
+        "Remover também candidatos que já têm conta cadastrada", value=False, key="confirmar_remocoes_importacao"
+    )
+    if st.button("Importar Lista"):
+        if not arquivo_lista:
+            st.error("Por favor, envie o arquivo CSV.")
+        else:
+            relatorio = ImportadorAprovados(db).importar(
+                arquivo_lista, simular=simular, confirmar_remocoes=confirmar_remocoes
+            )['resultado']
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Inseridos", len(relatorio['inseridos']))
+            col2.metric("Atualizados", len(relatorio['atualizados']))
+            col3.metric("Removidos", len(relatorio['removidos']))
+            if relatorio['remocoes_bloqueadas']:
+                st.warning(
+                    f"{len(relatorio['remocoes_bloqueadas'])} candidato(s) fora da nova lista têm conta cadastrada "
+                    "e foram mantidos. Confira as inscrições abaixo e marque a opção de remoção para excluí-los: "
+                    + ", ".join(relatorio['remocoes_bloqueadas'])
+                )
+            elif relatorio['remocoes_com_conta']:
+                st.warning(
+                    f"{len(relatorio['remocoes_com_conta'])} candidato(s) removido(s) têm conta cadastrada: "
+                    + ", ".join(relatorio['remocoes_com_conta'])
+                )
+            st.json(relatorio)
+
+    # ---------------------------------------------------------
+    # 7. Modificar banco de dados 
+    # ---------------------------------------------------------
+
+    with st.expander("Migrações de esquema e uso de índices"):
+        pendentes = aplicar_migracoes(db.engine, simular=True)
+        if pendentes:
+            st.warning("Há migrações pendentes (serão aplicadas no próximo início da aplicação).")
+            st.json(pendentes)
+        else:
+            st.success("Nenhuma migração pendente.")
+        if st.button("Verificar planos das consultas (EXPLAIN)"):
+            st.dataframe(pd.DataFrame(verificar_indices(db.engine)), hide_index=True)
+
+    with st.expander("Estatísticas de acesso ao banco (últimas unidades de trabalho)"):
+        st.dataframe(pd.DataFrame(list(db.estatisticas_unidades)), hide_index=True)
+        if db.cache_consultas is not None:
+            st.write("Cache de consultas:")
+            st.json(db.cache_consultas.estatisticas())
 
     st.write("### Execução Direta de Comandos SQL")
 
@@ -128,8 +190,20 @@ def administrar_web_app(db: Database):
                 try:
                     # Usamos a engine ou a session para executar
                     result = session.execute(text(sql_command))
+
+                    # Comandos livres não passam pelo versionamento das tabelas: invalida tudo
+                    # (versões de todas as tabelas/partições, cache de consultas e st.cache_data)
+                    escrita = not sql_command.strip().lower().startswith("select")
+                    if escrita:
+                        db.invalidarTudo(session)
                     session.commit()
 
+                    # Nem a classificação materializada: é recalculada a partir do estado já confirmado
+                    # (o índice em memória se reconstrói sozinho, pelas versões que avançaram)
+                    if escrita:
+                        Classificacao(db).reconstruir()
+                        st.cache_data.clear()
+
                     # Se for um SELECT, podemos exibir o resultado
                     if sql_command.strip().lower().startswith("select"):
                         rows = result.fetchall()
@@ -2,6 +2,7 @@
 
 import streamlit as st
 from database import TabelaGrupos
+from elegibilidade import elegibilidade_atual, simular_vagas
 
 def controle_de_grupo(conta, db):
     """
@@ -58,3 +59,41 @@ def controle_de_grupo(conta, db):
             }
             db.inserirDados(TabelaGrupos, dados_novos)
             st.success("Dados inseridos com sucesso!")
+
+    # 5. Simulação "e se": efeito de outra quantidade de vagas ou de novas desistências
+    st.subheader("Simular Alteração de Vagas")
+    st.caption("Nada é gravado no banco: apenas mostra quem entraria ou sairia da lista que recebe o link.")
+
+    elegibilidade = elegibilidade_atual(db)
+    usuarios_cota = elegibilidade[
+        (elegibilidade['grupo'] == conta.grupo) &
+        (elegibilidade['cota'].str.lower() == cota_escolhida.lower())
+    ]
+
+    vagas_hipotese = st.number_input("Quantidade de vagas (hipotética)", value=vagas_atuais, min_value=0, key="vagas_hipotese")
+    recusas_extras = st.multiselect(
+        "Desistências hipotéticas",
+        options=usuarios_cota['n_inscr'].tolist(),
+        format_func=lambda n: f"{usuarios_cota.at[n, 'posicao']} - {usuarios_cota.at[n, 'nome']}"
+    )
+
+    resultado = simular_vagas(elegibilidade, conta.grupo, cota_escolhida, vagas_hipotese, recusas_extras)
+
+    col1, col2 = st.columns(2)
+    col1.metric("Recebem o link hoje", resultado['elegiveis_atual'])
+    col2.metric(
+        "Receberiam na simulação",
+        resultado['elegiveis_hipotese'],
+        delta=resultado['elegiveis_hipotese'] - resultado['elegiveis_atual']
+    )
+
+    colunas = ['posicao', 'nome', 'opcao', 'posicao_efetiva_hipotese']
+    if not resultado['entram'].empty:
+        st.write("**Entrariam:**")
+        st.dataframe(resultado['entram'][colunas], hide_index=True)
+    if not resultado['saem'].empty:
+        st.write("**Sairiam:**")
+        st.dataframe(resultado['saem'][colunas], hide_index=True)
+    if not resultado['desistentes'].empty:
+        st.write("**Desistiriam (deixam de receber o link):**")
+        st.dataframe(resultado['desistentes'][colunas], hide_index=True)
@@ -4,7 +4,9 @@ import os
 import streamlit as st
 import pandas as pd
 from mensageria import Mensageria
-from database import TabelaUsuario, TabelaDocumentos, retornarAprovados, TabelaGrupos, TabelaMensagens
+from elegibilidade import elegibilidade_atual
+from database import TabelaUsuario, TabelaDocumentos, TabelaGrupos, TabelaMensagens
+from snapshot_aprovados import snapshot_aprovados
 from utils import carregar_chave_criptografia, decriptar_arquivo
 
 def estatisticas_de_grupo_coordenador(conta, db):
@@ -18,8 +20,12 @@ def estatisticas_de_grupo_coordenador(conta, db):
     # -----------------------------------------------------
     # 1. Quantidade de usuários já cadastrados para o grupo
     # -----------------------------------------------------
-    df_usuarios = db.retornarTabela(TabelaUsuario)
-    usuarios_grupo = df_usuarios[df_usuarios['grupo'] == conta.grupo]
+    usuarios_grupo = db.lerTabela(
+        TabelaUsuario,
+        colunas=['n_inscr', 'posicao', 'nome', 'telefone', 'email',
+                 'opcao', 'formacao_academica', 'grupo', 'cota'],
+        filtros={'grupo': conta.grupo}
+    )
     num_usuarios = len(usuarios_grupo)
 
     st.metric("Usuários Cadastrados no Meu Grupo", num_usuarios)
@@ -27,9 +33,8 @@ def estatisticas_de_grupo_coordenador(conta, db):
     # -----------------------------------------------------
     # 2. Quantidade de aprovados do grupo
     # -----------------------------------------------------
-    df_aprovados = retornarAprovados(db)
-    aprovados_grupo = df_aprovados[df_aprovados['grupo'] == conta.grupo]
-    num_aprovados = len(aprovados_grupo)
+    # Fatia do snapshot Arrow compartilhado (sem copiar a lista inteira a cada execução)
+    num_aprovados = snapshot_aprovados(db).fatia(conta.grupo).num_rows
 
     st.metric("Total de Aprovados do Meu Grupo", num_aprovados)
 
@@ -75,7 +80,30 @@ def estatisticas_de_grupo_coordenador(conta, db):
         st.info("Nenhum usuário ainda se cadastrou nesse grupo.")
 
     # -----------------------------------------------------
-    # 5. AUDITORIA: Verificar documento do usuário
+    # 5. Elegibilidade para o link do grupo (calculada em lote)
+    # -----------------------------------------------------
+    st.write("### Elegibilidade para o Link do Grupo")
+    elegibilidade = elegibilidade_atual(db)
+    elegibilidade_grupo = elegibilidade[elegibilidade['grupo'] == conta.grupo]
+    if not elegibilidade_grupo.empty:
+        st.dataframe(
+            elegibilidade_grupo[['posicao', 'nome', 'cota', 'opcao', 'posicao_efetiva', 'qtde_vagas', 'elegivel']]
+            .rename(columns={
+                'posicao': 'Posicao',
+                'nome': 'Nome',
+                'cota': 'Cota',
+                'opcao': 'Opção',
+                'posicao_efetiva': 'Aprovados à frente (sem desistentes)',
+                'qtde_vagas': 'Vagas',
+                'elegivel': 'Recebe o link'
+            }),
+            hide_index=True
+        )
+    else:
+        st.info("Nenhum usuário ainda se cadastrou nesse grupo.")
+
+    # -----------------------------------------------------
+    # 6. AUDITORIA: Verificar documento do usuário
     #    5.1. Verifica se usuário informado é do mesmo grupo.
     #    5.2. Exibe dados básicos e descriptografa o arquivo.
     # -----------------------------------------------------
@@ -121,7 +149,7 @@ def estatisticas_de_grupo_coordenador(conta, db):
 
 import streamlit as st
 from database import TabelaMensagens, TabelaUsuario, TabelaGrupos
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 
@@ -150,7 +178,7 @@ def criar_mensagem(db, usuario_logado):
         )
 
         # Seleção múltipla de grupos
-        df_grupos = db.retornarTabela(TabelaGrupos)
+        df_grupos = db.lerTabela(TabelaGrupos, colunas=['grupo'])
         df_grupos = df_grupos[df_grupos['grupo']!='TI_RAIZ']    # Ocultando o TI_RAIZ
         lista_grupos = sorted(df_grupos["grupo"].unique().tolist())
 
@@ -175,7 +203,7 @@ def criar_mensagem(db, usuario_logado):
             st.error("Selecione ao menos uma cota.")
             return
 
-        mensageria.criar_mensagem(
+        enfileirados = mensageria.criar_mensagem(
             titulo=titulo,
             conteudo=conteudo,
             grupos=grupos_escolhidos,
@@ -185,30 +213,87 @@ def criar_mensagem(db, usuario_logado):
             autor=f"{usuario_logado.nome} (n_inscr: {usuario_logado.n_inscr})"
         )
 
-        st.success("Mensagem(ens) criada(s) com sucesso!")
+        st.success(f"Mensagem(ens) criada(s) com sucesso! {enfileirados} envio(s) na fila.")
 
     # -------------------------------------------------
-    # Exibir mensagens existentes (e permitir deletar)
+    # Exibir mensagens existentes (paginadas, com filtros e exclusão em lote)
     # -------------------------------------------------
     st.subheader("Mensagens Existentes")
+    listar_mensagens_existentes(mensageria, lista_grupos)
+
+
+def listar_mensagens_existentes(mensageria, lista_grupos: list, por_pagina: int = 20):
+    """
+    Lista paginada (por chave: data_criacao, id_mensagem) das mensagens, com filtros
+    por autor, grupo e período, e exclusão das mensagens selecionadas num único comando.
+    """
+    col1, col2, col3 = st.columns(3)
+    autor = col1.text_input("Autor contém", key="filtro_msg_autor")
+    grupo = col2.selectbox("Grupo", ["Todos"] + lista_grupos, key="filtro_msg_grupo")
+    periodo = col3.date_input("Período", value=(), key="filtro_msg_periodo")
+
+    data_inicio = data_fim = None
+    if len(periodo) == 2:
+        data_inicio = datetime.combine(periodo[0], datetime.min.time())
+        data_fim = datetime.combine(periodo[1], datetime.min.time()) + timedelta(days=1)
+
+    # Mudou algum filtro: volta para a primeira página
+    filtros = (autor, grupo, data_inicio, data_fim)
+    if st.session_state.get('filtros_mensagens') != filtros:
+        st.session_state['filtros_mensagens'] = filtros
+        st.session_state['cursores_mensagens'] = [None]
+    cursores = st.session_state['cursores_mensagens']
+
+    pagina = mensageria.listar_pagina(
+        por_pagina=por_pagina,
+        cursor=cursores[-1],
+        autor=autor or None,
+        grupo=None if grupo == "Todos" else grupo,
+        data_inicio=data_inicio,
+        data_fim=data_fim
+    )
+    df_msgs = pagina['mensagens']
 
-    df_msgs = mensageria.listar_mensagens()
     if df_msgs.empty:
         st.info("Nenhuma mensagem cadastrada.")
-    else:
-        for idx, row in df_msgs.iterrows():
-            with st.expander(
-                f"{row['titulo']} (Grupo: {row['grupo']}, "
-                f"Cota: {row['cota']}, "
-                f"Posições: {row['posicao_min']} - {row['posicao_max']})"
-                f" - Criada em {row['data_criacao']}"
-            ):
-                st.write(row["conteudo"])
-                st.write(f"Autor: {row['autor']}")
-                if st.button("Deletar mensagem", key=f"delete_msg_{row['id_mensagem']}"):
-                    ok = mensageria.deletar_mensagem(row['id_mensagem'])
-                    if ok:
-                        st.success("Mensagem deletada com sucesso!")
-                        st.rerun()
-                    else:
-                        st.error("Falha ao deletar ou mensagem não encontrada.")
\ No newline at end of file
+        return
+
+    progresso = mensageria.progresso_envios(df_msgs['id_mensagem'].tolist())
+    enviados = progresso['enviado'] + progresso['falhou']
+    total = progresso.sum(axis=1)
+
+    tabela = pd.DataFrame({
+        'Excluir': False,
+        'Título': df_msgs['titulo'],
+        'Conteúdo': df_msgs['conteudo'],
+        'Grupos': df_msgs['grupos'].map(lambda v: ', '.join(v) if isinstance(v, list) else '-'),
+        'Cotas': df_msgs['cotas'].map(lambda v: ', '.join(v) if isinstance(v, list) else '-'),
+        'Posições': df_msgs['posicao_min'].map('{:.0f}'.format) + ' - ' + df_msgs['posicao_max'].map('{:.0f}'.format),
+        'Criada em': df_msgs['data_criacao'],
+        'Autor': df_msgs['autor'],
+        'Envios': df_msgs['id_mensagem'].map((enviados / total).where(total > 0)).fillna(0.0),
+    })
+    editado = st.data_editor(
+        tabela,
+        hide_index=True,
+        disabled=[coluna for coluna in tabela.columns if coluna != 'Excluir'],
+        column_config={
+            'Excluir': st.column_config.CheckboxColumn(),
+            'Envios': st.column_config.ProgressColumn(min_value=0.0, max_value=1.0),
+        },
+        key=f"tabela_mensagens_{len(cursores)}"
+    )
+
+    selecionadas = df_msgs.loc[editado['Excluir'].to_numpy(), 'id_mensagem'].tolist()
+    col1, col2, col3 = st.columns(3)
+    if col1.button(f"Excluir selecionadas ({len(selecionadas)})", disabled=not selecionadas):
+        excluidas = mensageria.deletar_mensagens(selecionadas)
+        st.session_state['cursores_mensagens'] = [None]
+        st.success(f"{excluidas} mensagem(ns) excluída(s).")
+        st.rerun()
+    if col2.button("Página anterior", disabled=len(cursores) == 1):
+        cursores.pop()
+        st.rerun()
+    if col3.button("Próxima página", disabled=pagina['proximo_cursor'] is None):
+        cursores.append(pagina['proximo_cursor'])
+        st.rerun()
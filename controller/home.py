@@ -3,9 +3,13 @@
 import streamlit as st
 import pandas as pd
 from grupos import Grupo
-from database import TabelaGrupos, retornarAprovados, retornarListaUsuariosNaFrente, TabelaMensagens
+from database import TabelaGrupos, TabelaMensagens
+from classificacao import Classificacao
+from elegibilidade import usuario_elegivel
+from simulacao import probabilidade_do_candidato
 from utils import is_valid_link
 from mensageria import Mensageria
+from leituras import LeituraMensagens
 
 def apresentar_dados_gerais_usuario(usuario, db):
     """ Função para apresentar os dados normais do usuário """
@@ -20,21 +24,23 @@ def apresentar_dados_gerais_usuario(usuario, db):
         st.metric(label='Perfil', value=usuario.role)
 
 
+def _totais_na_frente(usuario, db) -> dict:
+    """ Totais de quem está à frente do usuário, lidos da classificação materializada """
+    totais = Classificacao(db).consultar(usuario.grupo, usuario.cota, usuario.posicao)
+    if totais is None:
+        # Posição fora da lista oficial (ex.: superusuário): ninguém à frente
+        totais = {coluna: 0 for coluna in ['aprovados_frente', 'cadastrados_frente', 'vai_assumir_frente',
+                                           'indecisos_frente', 'nao_vai_assumir_frente']}
+    return totais
+
+
 def apresentar_dados_decisoes(usuario, db):
     """ Função para apresentar os metrics com as informações sobre pessoas à frente"""
     st.subheader("Estatísticas do Grupo")
-    grupo = Grupo(grupo=usuario.grupo, db=db)
 
-    usuarios_frente = retornarListaUsuariosNaFrente(db, usuario.grupo, usuario.posicao, usuario.cota)
-    
-    aprovados_na_frente = retornarAprovados(db)
-    aprovados_na_frente = aprovados_na_frente[
-        (aprovados_na_frente['grupo'] == usuario.grupo) & 
-        (aprovados_na_frente['posicao'] < usuario.posicao) &
-        (aprovados_na_frente['cota'] == usuario.cota)
-    ]
-    total_aprovados_grupo = len(aprovados_na_frente)
-    total_usuarios_frente = len(usuarios_frente)
+    totais = _totais_na_frente(usuario, db)
+    total_aprovados_grupo = totais['aprovados_frente']
+    total_usuarios_frente = totais['cadastrados_frente']
 
     if total_aprovados_grupo > 0:
         percentual_frente = (total_usuarios_frente / total_aprovados_grupo) * 100
@@ -42,23 +48,17 @@ def apresentar_dados_decisoes(usuario, db):
         percentual_frente = 0
 
     if total_usuarios_frente > 0:
-        assumir = usuarios_frente[usuarios_frente['opcao'] == "Vai assumir"]
-        indecisos = usuarios_frente[usuarios_frente['opcao'] == "Indeciso"]
-        nao_assumir = usuarios_frente[usuarios_frente['opcao'] == "Não vai assumir"]
-
         # Exemplo: últimas atualizações no último dia
-        ultimas_atualizacoes = usuarios_frente[
-            usuarios_frente['data_ultima_modificacao'] >= pd.Timestamp.now() - pd.Timedelta(days=1)
-        ]
+        ultimas_atualizacoes = Classificacao(db).atualizacoes_recentes(usuario.grupo, usuario.cota, usuario.posicao)
 
         col1, col2 = st.columns(2)
         with col1:
-            st.metric(label="Usuários que irão assumir na minha frente", value=len(assumir))
-            st.metric(label="Atualizações no último dia", value=len(ultimas_atualizacoes))
+            st.metric(label="Usuários que irão assumir na minha frente", value=totais['vai_assumir_frente'])
+            st.metric(label="Atualizações no último dia", value=ultimas_atualizacoes)
 
         with col2:
-            st.metric(label="Usuários indecisos na minha frente", value=len(indecisos))
-            st.metric(label="Usuários que não vão assumir na minha frente", value=len(nao_assumir))
+            st.metric(label="Usuários indecisos na minha frente", value=totais['indecisos_frente'])
+            st.metric(label="Usuários que não vão assumir na minha frente", value=totais['nao_vai_assumir_frente'])
 
         st.metric(
             label="Percentual de usuários já cadastrados",
@@ -72,33 +72,23 @@ def apresentar_dados_decisoes(usuario, db):
         st.text('Nenhum candidato à sua frente foi cadastrado. Aguarde.')
         st.metric(label="Percentual de usuários na minha frente", value=f"{percentual_frente:.2f}%")
 
+    # Estimativa por simulação, considerando as opções de quem está à frente
+    probabilidade = probabilidade_do_candidato(db, usuario.n_inscr)
+    if probabilidade is not None:
+        st.metric(
+            label="Chance estimada de ser chamado",
+            value=f"{probabilidade:.0%}",
+            help="Simulação considerando a opção informada por quem está à sua frente e a quantidade de vagas do grupo/cota."
+        )
+
 
 def mostrar_link(usuario, db):
     """ Serve para mostrar o link do grupo ao usuário """
-    usuarios = retornarListaUsuariosNaFrente(db, usuario.grupo, usuario.posicao, usuario.cota)
     grupo = Grupo(grupo=usuario.grupo, db=db)
-    # Retirar usuários na frente que não vã assumir OU que não tenham se cadastrado ainda
-    if not usuarios.empty:
-        try:
-            nao_vao_assumir = usuarios[usuarios['opcao']=="Não vai assumir"]['n_inscr'].unique()
-        except:
-            nao_vao_assumir = ['aaaaa', 'bbbbb']
-    else:
-        nao_vao_assumir = ['aaaaa', 'bbbbb']
-
-    total_aprov = retornarAprovados(db)
-    total_aprov = total_aprov[
-            (total_aprov['grupo']==usuario.grupo)&
-            (total_aprov['cota']==usuario.cota)&
-            (total_aprov['posicao']<usuario.posicao)
-            ]
-    total_aprov = total_aprov[~total_aprov['n_inscr'].isin(nao_vao_assumir)]
 
-    # Achar limite de CR para o grupo/cota
-    tabela_grupo = db.retornarTabela(TabelaGrupos)
-    tamanho_CR = tabela_grupo[(tabela_grupo['cota'].str.lower()==usuario.cota.lower()) & (tabela_grupo['grupo']==usuario.grupo)]['qtde_vagas'].values
-
-    if total_aprov.shape[0] < tamanho_CR:  # Se tiver menos usuários à frente que vagas
+    # Elegibilidade pré-calculada em lote para todos os usuários
+    # (aprovados à frente, menos os que não vão assumir, dentro do limite de CR do grupo/cota)
+    if usuario_elegivel(db, usuario.n_inscr):
         mensagem_grupo = grupo.mostrarMensagens()
         link_grupo = grupo.mostrarLink()
 
@@ -117,38 +107,54 @@ def mostrar_link(usuario, db):
         st.text("Infelizmente ainda não chegou a sua vez para ser inserido no Grupo do CR de Cuiabá. Mas calma! Aguarde os outros aprovados confirmarem que não vão assumir ou aumentar a quantidade de vagas!")
         
 
-def exibir_mensagens_usuario(usuario, db):
+def exibir_mensagens_usuario(usuario, db, por_pagina: int = 10):
     """
-    Mostra as mensagens destinadas ao usuário, e abre um 'pop-up'/expander
-    para a mais recente que ele ainda não viu nesta sessão.
+    Mostra primeiro as mensagens ainda não lidas (abertas) e, abaixo,
+    o histórico paginado, carregado sob demanda.
     """
-    
+    mensageria = Mensageria(db)
+    leituras = LeituraMensagens(db)
+
+    # (a) Mensagens novas
+    ids_nao_lidos = leituras.ids_nao_lidos(usuario)
+    if ids_nao_lidos:
+        st.write(f"### Mensagens Novas ({len(ids_nao_lidos)})")
+        for i, row in mensageria.buscar_mensagens(ids_nao_lidos).iterrows():
+            with st.expander(f"{row['titulo']} (enviada em {row['data_criacao']})", expanded=True):
+                st.write(row["conteudo"])
+        if st.button("Marcar como lidas", key="marcar_mensagens_lidas"):
+            leituras.marcar_lidas(usuario, list(ids_nao_lidos))
+            st.rerun()
+
     # (b) Histórico de mensagens
     st.write("### Histórico de Mensagens")
 
-    # Obter todas as mensagens
-    mensageria = Mensageria(db)
-    df_mensagens = mensageria.listar_mensagens()
-    
-    if df_mensagens.empty:
-        st.success("Nenhuma mensagem criada.")
-        return 
-    
-    # Filtro para o grupo, cota, faixa de posição
-    mask = (
-        (df_mensagens["grupo"] == usuario.grupo) &
-        (df_mensagens["cota"] == usuario.cota) &
-        (df_mensagens["posicao_min"] <= usuario.posicao) &
-        (df_mensagens["posicao_max"] >= usuario.posicao)
-    )
-    mensagens_pertinentes = df_mensagens[mask].sort_values("data_criacao", ascending=False)
-    if mensagens_pertinentes.empty:
+    # Só as mensagens mais recentes destinadas ao grupo/cota/posição do usuário: a primeira
+    # página é lida a cada execução; cada "Carregar mais" busca apenas a página seguinte
+    # (deslocamento) e a guarda na sessão, junto com as já carregadas
+    primeira = mensageria.caixa_de_entrada(usuario.grupo, usuario.cota, usuario.posicao, limite=por_pagina + 1)
+    carregadas = st.session_state.setdefault('historico_carregado', [])
+    tem_mais = st.session_state['historico_tem_mais'] if carregadas else len(primeira) > por_pagina
+
+    if primeira.empty:
         st.success("Nenhuma mensagem criada para o usuário.")
     else:
+        # Mensagens novas empurram as demais para as páginas seguintes: remove as repetidas
+        mensagens_pertinentes = pd.concat([primeira.head(por_pagina), *carregadas]).drop_duplicates('id_mensagem')
         for i, row in mensagens_pertinentes.iterrows():
             with st.expander(f"{row['titulo']} (enviada em {row['data_criacao']})", expanded=False):
                 st.write(row["conteudo"])
 
+        if tem_mais:
+            if st.button("Carregar mais", key="carregar_historico"):
+                seguinte = mensageria.caixa_de_entrada(
+                    usuario.grupo, usuario.cota, usuario.posicao,
+                    limite=por_pagina + 1, deslocamento=(len(carregadas) + 1) * por_pagina
+                )
+                carregadas.append(seguinte.head(por_pagina))
+                st.session_state['historico_tem_mais'] = len(seguinte) > por_pagina
+                st.rerun()
+
 
 def home(usuario, db):
     """ Função para mostrar tudo do home a uma """
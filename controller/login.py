@@ -12,6 +12,7 @@ import datetime
 from database import TabelaAprovados, TabelaDocumentos
 from data_p_config.textos import TEXTO_DOCUMENTAÇÃO,TEXTO_PROPOSITO_WEBAPP
 from controller.utils_page import limpar_telefone, validar_email, validar_telefone
+from sessoes import gerenciador_sessoes
 
 
 def criar_conta(db, conta_manager):
@@ -119,6 +120,11 @@ def login(db, conta_manager):
             if resultado['sucesso']:
                 st.session_state['conta'] = resultado['resultado']
                 st.session_state['logado'] = True
+                # Token assinado num cookie: um reconnect (ou outro processo) retoma a sessão sem novo login.
+                # O cookie é gravado pela Pagina na próxima execução (o st.rerun descartaria o script)
+                token = gerenciador_sessoes().criar({'n_inscr': resultado['resultado'].n_inscr})
+                st.session_state['token_sessao'] = token
+                st.session_state['cookie_pendente'] = token
                 st.success("Acesso realizado com sucesso!")
                 st.rerun()
             else:
@@ -2,13 +2,10 @@
 
 import streamlit as st
 
-# Importa as funções que já criamos para cada funcionalidade
+# Só o necessário para a tela de login; os demais controllers (e o pandas/numpy/pyarrow
+# que eles trazem) são importados na primeira vez que o menu correspondente é aberto
 from controller.login import login, criar_conta
-from controller.home import home
-from controller.dados_usuarios import gerenciar_dados_usuario
-from controller.adm import administrar_web_app
-from controller.coordenador_grupo import estatisticas_de_grupo_coordenador, criar_mensagem
-from controller.controle_grupo import controle_de_grupo
+from sessoes import gerenciador_sessoes, cookie_sessao, COOKIE_SESSAO
 from data_p_config.textos import TEXTO_PROPOSITO_WEBAPP, TEXTO_MUDANCAS_ATUAIS
 
 class Pagina:
@@ -30,11 +27,45 @@ class Pagina:
         Função principal. Decide se exibe a tela de login ou
         a página principal, conforme o estado de sessão.
         """
+        if not st.session_state.get('logado'):
+            self._retomar_sessao()
+        self._gravar_cookie_pendente()
+
         if 'logado' not in st.session_state or not st.session_state['logado']:
             self._pagina_login()
         else:
             self._pagina_principal()
 
+    def _retomar_sessao(self):
+        """
+        Retoma o login a partir do cookie 'sessao' (enviado na conexão): assinatura conferida em
+        memória, uma busca no armazém de sessões e uma leitura da conta pela chave primária (sem bcrypt).
+        Feito uma vez por sessão do Streamlit: o cookie lido não muda até a próxima conexão.
+        """
+        if st.session_state.get('sessao_verificada'):
+            return
+        st.session_state['sessao_verificada'] = True
+
+        token = st.context.cookies.get(COOKIE_SESSAO)
+        if not token:
+            return
+
+        dados = gerenciador_sessoes().validar(token)
+        resultado = self.conta_manager.retomarConta(dados['n_inscr']) if dados else None
+        if resultado and resultado['sucesso']:
+            st.session_state['conta'] = resultado['resultado']
+            st.session_state['logado'] = True
+            st.session_state['token_sessao'] = token
+        else:
+            # Token expirado, forjado ou de conta removida
+            st.session_state['cookie_pendente'] = None
+
+    def _gravar_cookie_pendente(self):
+        """ Grava (ou apaga, se None) o cookie pedido pelo login, pela retomada ou pelo "Sair" """
+        if 'cookie_pendente' in st.session_state:
+            token = st.session_state.pop('cookie_pendente')
+            st.html(cookie_sessao(token, gerenciador_sessoes().ttl), unsafe_allow_javascript=True)
+
     def _pagina_login(self):
         """
         Exibe a tela de login ou de criar conta.
@@ -102,19 +133,30 @@ class Pagina:
 
         escolha = st.sidebar.selectbox("Menu", opcoes_menu)
 
+        # Aviso de mensagens não lidas (contador mantido na tabela 'mensagens_lidas')
+        from leituras import LeituraMensagens
+        nao_lidas = LeituraMensagens(self.db).nao_lidas(conta)
+        if nao_lidas:
+            st.sidebar.info(f"Você tem {nao_lidas} mensagem(ns) não lida(s) em \"Ver Estatísticas (Usuário)\".")
+
         # Módulo para estatísticas do usuário (já implementado antes)
         if escolha == "Ver Estatísticas (Usuário)":
-            home(conta, self.db)
+            from controller.home import home
+            # Toda a renderização do home compartilha uma única sessão/transação
+            with self.db.unidadeDeTrabalho('home'):
+                home(conta, self.db)
 
         # Estatísticas de grupo (coordenador / superuser)
         elif escolha == "Gestão de Grupo (Coordenador)":
             if conta.role in ['coordenador', 'superuser']:
+                from controller.coordenador_grupo import estatisticas_de_grupo_coordenador
                 estatisticas_de_grupo_coordenador(conta, self.db)
             else:
                 st.error("Você não tem permissão para esta seção.")
 
         elif escolha == 'Mensagem ao Grupo':
             if conta.role in ['coordenador', 'superuser']:
+                from controller.coordenador_grupo import criar_mensagem
                 criar_mensagem(self.db, conta)
             else:
                 st.error("Você não tem permissão para criar mensagens.")
@@ -123,12 +165,14 @@ class Pagina:
         # Painel de administração (superuser)
         elif escolha == "Administração (Superuser)":
             if conta.role == 'superuser':
+                from controller.adm import administrar_web_app
                 administrar_web_app(self.db)
             else:
                 st.error("Você não tem permissão para esta seção.")
 
         # Gerenciamento de dados do próprio usuário (mudar email, telefone, etc.)
         elif escolha == "Gerenciar Dados de Usuário":
+            from controller.dados_usuarios import gerenciar_dados_usuario
             gerenciar_dados_usuario(conta, self.db)
 
         if escolha == "Controle de Grupo":
@@ -142,4 +186,8 @@ class Pagina:
         elif escolha == "Sair":
             st.session_state['logado'] = False
             st.session_state['conta'] = None
+            token = st.session_state.pop('token_sessao', None)
+            if token:
+                gerenciador_sessoes().encerrar(token)
+                st.session_state['cookie_pendente'] = None
             st.rerun()
@@ -4,39 +4,122 @@ Classes para realizar conexões com banco de dados
 
 """
 
+from __future__ import annotations  # anotações com pd.DataFrame sem importar o pandas
+
 import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
-from sqlalchemy import create_engine, Column, String, DateTime, Integer, LargeBinary, Text
+from typing import TYPE_CHECKING
+from sqlalchemy import create_engine, event, Column, String, DateTime, Integer, LargeBinary, Text, Index, select, insert, update, delete, literal, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker, declarative_base
-import pandas as pd 
+from sqlalchemy.exc import DBAPIError, IntegrityError, OperationalError
 import streamlit as st 
+try:
+    from streamlit.runtime.scriptrunner_utils.exceptions import RerunException
+except ImportError:  # versões do Streamlit anteriores à 1.38
+    from streamlit.runtime.scriptrunner.exceptions import RerunException
 from utils import hash_password
+from migracoes import aplicar_migracoes
+from cache_consultas import CacheConsultas
+
+# pandas/pyarrow pesam mais que o resto da inicialização: só são importados
+# quando uma tabela é lida, não para abrir a tela de login
+if TYPE_CHECKING:
+    import pandas as pd
+    from cache_compartilhado import CacheCompartilhado
+
+logger = logging.getLogger(__name__)
 
 # Criação do Base para uso no modelo declarativo
 Base = declarative_base()
 
 class TabelaMensagens(Base):
     """
-    Armazena as mensagens criadas por coordenadores/superusuários.
+    Armazena as mensagens criadas por coordenadores/superusuários (o conteúdo, uma única vez).
+    O público de cada mensagem fica em TabelaPublicoMensagens.
     """
     __tablename__ = 'mensagens'
+    __table_args__ = (
+        Index('ix_mensagens_data_criacao_id', 'data_criacao', 'id_mensagem'),
+        # Ids nunca reaproveitados (no SQLite, sem AUTOINCREMENT, o maior id excluído volta
+        # a ser usado): a marca d'água de leitura (TabelaLeituras.ultima_lida) depende disso
+        {'sqlite_autoincrement': True},
+    )
 
     id_mensagem = Column(Integer, primary_key=True, autoincrement=True)
-    grupo = Column(String(50), nullable=False)
-    cota = Column(String(15), nullable=False, default='AC')
-    posicao_min = Column(Integer, nullable=False)
-    posicao_max = Column(Integer, nullable=False)
     titulo = Column(String(255), nullable=False)
     conteudo = Column(Text, nullable=False)
     data_criacao = Column(DateTime, default=datetime.now)
     autor = Column(String(100), nullable=False)
 
 
+class TabelaPublicoMensagens(Base):
+    """
+    Público de cada mensagem: uma linha por grupo/cota, com a faixa de posições.
+    """
+    __tablename__ = 'mensagens_publico'
+    __table_args__ = (
+        Index('ix_mensagens_publico_grupo_cota_posicoes', 'grupo', 'cota', 'posicao_min', 'posicao_max'),
+    )
+
+    id_publico = Column(Integer, primary_key=True, autoincrement=True)
+    id_mensagem = Column(Integer, nullable=False, index=True)
+    grupo = Column(String(50), nullable=False)
+    cota = Column(String(15), nullable=False, default='AC')
+    posicao_min = Column(Integer, nullable=False)
+    posicao_max = Column(Integer, nullable=False)
+
+
+class TabelaLeituras(Base):
+    """
+    Estado de leitura das mensagens, uma linha por usuário:
+    - ultima_lida: toda mensagem do usuário com id <= ultima_lida já foi lida;
+    - lidas_acima: ids acima de ultima_lida lidos individualmente (separados por vírgula);
+    - nao_lidas: contador mantido a cada mensagem criada/lida (NULL = recalcular).
+    """
+    __tablename__ = 'mensagens_lidas'
+
+    n_inscr = Column(String(50), primary_key=True)
+    ultima_lida = Column(Integer, nullable=False, default=0)
+    lidas_acima = Column(Text, nullable=False, default='')
+    nao_lidas = Column(Integer, nullable=True)
+
+
+class TabelaEnvios(Base):
+    """
+    Fila de saída (outbox) das mensagens: uma linha por destinatário e canal,
+    consumida em lotes pelo trabalhador de envios (trabalhador_envios.py).
+    """
+    __tablename__ = 'envios_mensagens'
+    __table_args__ = (
+        Index('ix_envios_mensagens_status_proxima', 'status', 'proxima_tentativa'),
+    )
+
+    id_envio = Column(Integer, primary_key=True, autoincrement=True)
+    id_mensagem = Column(Integer, nullable=False, index=True)
+    n_inscr = Column(String(50), nullable=False)
+    canal = Column(String(20), nullable=False)
+    destino = Column(String(255), nullable=False)  # telefone ou e-mail
+    status = Column(String(20), nullable=False, default='pendente')
+    tentativas = Column(Integer, nullable=False, default=0)
+    proxima_tentativa = Column(DateTime, nullable=False, default=datetime.now)
+    ultimo_erro = Column(Text, nullable=True)
+    data_atualizacao = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
+
 class TabelaUsuario(Base):
     """
     Classe que representa a tabela 'usuarios' no banco de dados.
     """
     __tablename__ = 'usuarios'
+    __table_args__ = (
+        Index('ix_usuarios_grupo_cota_posicao', 'grupo', 'cota', 'posicao'),
+    )
 
     n_inscr = Column(String(50), primary_key=True, index=True)
     posicao = Column(Integer, nullable=False)
@@ -64,6 +147,9 @@ class TabelaAprovados(Base):
     Classe que representa a tabela 'lista_aprovados' no banco de dados.
     """
     __tablename__ = 'lista_aprovados'
+    __table_args__ = (
+        Index('ix_lista_aprovados_grupo_cota_posicao', 'grupo', 'cota', 'posicao'),
+    )
 
     n_inscr = Column(String(50), primary_key=True, index=True)
     posicao = Column(Integer, nullable = False)
@@ -95,56 +181,575 @@ class TabelaDocumentos(Base):
     data_upload = Column(DateTime, default=datetime.now, nullable=False)
 
 
+class TabelaClassificacao(Base):
+    """
+    Classificação materializada: para cada posição da lista de aprovados (por grupo/cota),
+    guarda quantos aprovados e quantos usuários cadastrados (por opção) estão à frente.
+    Mantida de forma incremental pela classe Classificacao.
+    """
+    __tablename__ = 'classificacao'
+
+    grupo = Column(String(50), primary_key=True)
+    cota = Column(String(15), primary_key=True)
+    posicao = Column(Integer, primary_key=True)
+    aprovados_frente = Column(Integer, nullable=False, default=0)
+    cadastrados_frente = Column(Integer, nullable=False, default=0)
+    vai_assumir_frente = Column(Integer, nullable=False, default=0)
+    indecisos_frente = Column(Integer, nullable=False, default=0)
+    nao_vai_assumir_frente = Column(Integer, nullable=False, default=0)
+
+
+class TabelaVersoes(Base):
+    """
+    Versão de cada tabela (particao '*') e de cada partição grupo/cota ('grupo|cota').
+    É incrementada a cada escrita e usada como chave dos caches de leitura.
+    """
+    __tablename__ = 'versoes_tabelas'
+
+    tabela = Column(String(50), primary_key=True)
+    particao = Column(String(80), primary_key=True, default='*')
+    versao = Column(Integer, nullable=False, default=0)
+
+
+class TabelaMetadados(Base):
+    """
+    Pares chave/valor da própria aplicação. 'semente' guarda a marca (hash do snapshot
+    de aprovados + superusuário) da última carga inicial concluída.
+    """
+    __tablename__ = 'metadados'
+
+    chave = Column(String(50), primary_key=True)
+    valor = Column(Text, nullable=False)
+    data_atualizacao = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+
+# Chave do advisory lock (PostgreSQL) que serializa a inicialização entre processos
+CHAVE_TRAVA_INICIALIZACAO = 80251
+
+# Dialetos com suporte a INSERT ... ON CONFLICT DO UPDATE
+_INSERTS_COM_CONFLITO = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def particoes_de(registros) -> set:
+    """
+    Partições afetadas por um conjunto de registros (dicionários ou objetos):
+    sempre '*' (tabela inteira) e, se houver grupo/cota, 'grupo|cota'.
+    """
+    particoes = {'*'}
+    for registro in registros:
+        dados = registro if isinstance(registro, dict) else vars(registro)
+        if dados.get('grupo') is not None and dados.get('cota') is not None:
+            particoes.add(f"{dados['grupo']}|{dados['cota']}")
+    return particoes
+
+
+# Colunas com versão própria (partição 'coluna:<nome>'): um cache que depende só delas
+# não é invalidado por escritas nas demais colunas (a simulação só lê 'opcao' dos usuários)
+COLUNAS_VERSIONADAS = {'usuarios': ('opcao',)}
+
+
+def particoes_de_colunas(model_class, colunas=None) -> set:
+    """
+    Partições 'coluna:<nome>' afetadas por uma escrita em 'model_class':
+    inserções e exclusões (colunas=None) afetam todas; atualizações, só as alteradas.
+    """
+    versionadas = COLUNAS_VERSIONADAS.get(model_class.__tablename__, ())
+    return {f"coluna:{coluna}" for coluna in versionadas if colunas is None or coluna in colunas}
+
+
+def incrementar_versoes(executor, model_class, particoes) -> None:
+    """
+    Incrementa a versão das partições informadas de 'model_class'.
+    'executor' pode ser uma sessão ou uma conexão, para participar da mesma transação.
+    """
+    linhas = [
+        {'tabela': model_class.__tablename__, 'particao': particao, 'versao': 1}
+        for particao in sorted(particoes)
+    ]
+    dialeto = (executor.get_bind() if hasattr(executor, 'get_bind') else executor).dialect.name
+
+    if dialeto in _INSERTS_COM_CONFLITO:
+        comando = _INSERTS_COM_CONFLITO[dialeto](TabelaVersoes).values(linhas)
+        executor.execute(comando.on_conflict_do_update(
+            index_elements=['tabela', 'particao'],
+            set_={'versao': TabelaVersoes.versao + 1}
+        ))
+        return
+
+    for linha in linhas:
+        atualizados = executor.execute(
+            update(TabelaVersoes)
+            .where(TabelaVersoes.tabela == linha['tabela'], TabelaVersoes.particao == linha['particao'])
+            .values(versao=TabelaVersoes.versao + 1)
+        ).rowcount
+        if not atualizados:
+            executor.execute(insert(TabelaVersoes).values(linha))
+
+
+def inserir_se_nao_existir(executor, model_class, valores: dict) -> None:
+    """
+    INSERT que não falha se a chave já existir (outro processo/aba pode ter inserido a mesma
+    linha ao mesmo tempo): ON CONFLICT DO NOTHING onde há suporte, senão um savepoint.
+    """
+    dialeto = (executor.get_bind() if hasattr(executor, 'get_bind') else executor).dialect.name
+    if dialeto in _INSERTS_COM_CONFLITO:
+        executor.execute(_INSERTS_COM_CONFLITO[dialeto](model_class).values(valores).on_conflict_do_nothing())
+        return
+
+    try:
+        with executor.begin_nested():
+            executor.execute(insert(model_class).values(valores))
+    except IntegrityError:
+        pass
+
+
+COLUNAS_APROVADOS = ['n_inscr', 'posicao', 'nome', 'grupo', 'cota']
+
+# Lista oficial e o seu snapshot tipado e validado, gerado por construir_aprovados.py
+CAMINHO_CSV_APROVADOS = 'aprovados.csv'
+CAMINHO_SNAPSHOT_APROVADOS = 'aprovados.parquet'
+
+
+def ler_aprovados_em_lotes(caminho_csv: str, tamanho_lote: int):
+    """
+    Lê o CSV oficial de aprovados em lotes, já normalizado para as colunas
+    da TabelaAprovados (cota "AC" por padrão, n_inscr como texto).
+    Um caminho '.parquet' (snapshot já validado) é lido direto, sem normalização.
+    """
+    if isinstance(caminho_csv, str) and caminho_csv.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for lote in pq.ParquetFile(caminho_csv).iter_batches(batch_size=tamanho_lote, columns=COLUNAS_APROVADOS):
+            yield lote.to_pandas()
+        return
+
+    import pandas as pd
+    leitor = pd.read_csv(caminho_csv, sep=';', dtype={'n_inscr': str}, chunksize=tamanho_lote)
+    for lote in leitor:
+        if 'cota' not in lote.columns:
+            lote['cota'] = 'AC'
+        lote['cota'] = lote['cota'].fillna('AC')
+        lote['posicao'] = lote['posicao'].astype(int)
+        lote = lote.drop_duplicates(subset='n_inscr')
+        yield lote[COLUNAS_APROVADOS]
+
+
+def hash_do_arquivo(caminho: str) -> str:
+    """ SHA-256 dos bytes do arquivo """
+    import hashlib
+    with open(caminho, 'rb') as arquivo:
+        return hashlib.sha256(arquivo.read()).hexdigest()
+
+
+def hash_do_snapshot(caminho: str) -> str:
+    """
+    Hash do conteúdo da lista oficial: lido do arquivo '.sha256' gravado ao lado do snapshot
+    (sem importar o pyarrow), do rodapé do Parquet ou, sem o snapshot, dos bytes do CSV.
+    """
+    if os.path.exists(caminho + '.sha256'):
+        with open(caminho + '.sha256') as arquivo:
+            return arquivo.readline().strip()
+
+    if caminho.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_schema(caminho).metadata[b'hash_conteudo'].decode()
+
+    return hash_do_arquivo(caminho)
+
+
+def _hash_csv_do_snapshot(caminho: str):
+    """ Hash dos bytes do CSV de origem, gravado no build (2ª linha do '.sha256' e rodapé do Parquet) """
+    if os.path.exists(caminho + '.sha256'):
+        with open(caminho + '.sha256') as arquivo:
+            linhas = arquivo.read().split()
+        if len(linhas) > 1:
+            return linhas[1]
+
+    import pyarrow.parquet as pq
+    metadados = pq.read_schema(caminho).metadata or {}
+    return metadados[b'hash_csv'].decode() if b'hash_csv' in metadados else None
+
+
+def snapshot_desatualizado(caminho_snapshot: str = CAMINHO_SNAPSHOT_APROVADOS,
+                           caminho_csv: str = CAMINHO_CSV_APROVADOS) -> bool:
+    """ True se há snapshot e CSV, mas o snapshot não foi gerado a partir do CSV atual (ou é antigo, sem o hash) """
+    if not (os.path.exists(caminho_snapshot) and os.path.exists(caminho_csv)):
+        return False
+    return _hash_csv_do_snapshot(caminho_snapshot) != hash_do_arquivo(caminho_csv)
+
+
+def origem_dos_aprovados(caminho_snapshot: str = CAMINHO_SNAPSHOT_APROVADOS,
+                         caminho_csv: str = CAMINHO_CSV_APROVADOS) -> str:
+    """
+    Arquivo lido na inicialização: o snapshot, se foi gerado a partir do CSV atual;
+    se o CSV mudou depois do build, o próprio CSV (com um aviso no log e no painel de administração).
+    """
+    if not os.path.exists(caminho_snapshot):
+        return caminho_csv
+
+    if snapshot_desatualizado(caminho_snapshot, caminho_csv):
+        logger.warning(
+            "%s não corresponde a %s (rode construir_aprovados.py); usando o CSV.", caminho_snapshot, caminho_csv
+        )
+        return caminho_csv
+    return caminho_snapshot
+
+
 @st.cache_resource
 def get_engine(db_url):
     # Cria a engine com pool de conexões (reduz overhead de conexões repetidas)
     engine = create_engine(db_url, echo=False, pool_size=5, max_overflow=10)
+
+    # Contabiliza comandos e tempo de banco na unidade de trabalho ativa (se houver)
+    event.listen(engine, 'before_cursor_execute', _antes_de_executar)
+    event.listen(engine, 'after_cursor_execute', _depois_de_executar)
     return engine
 
 
+@st.cache_resource
+def get_session_factory(db_url):
+    # Fábrica de sessões criada uma única vez por URL (em vez de uma por chamada)
+    # expire_on_commit=False mantém legíveis os objetos devolvidos pelos métodos de CRUD
+    fabrica = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=get_engine(db_url))
+    event.listen(fabrica, 'after_commit', _invalidar_cache_apos_commit)
+    event.listen(fabrica, 'after_rollback', _descartar_apos_rollback)
+    return fabrica
+
+
+def _invalidar_cache_apos_commit(session):
+    # Invalida de novo após o commit: leituras concorrentes feitas entre a escrita
+    # e o commit podem ter guardado o valor antigo
+    cache = session.info.get('cache_consultas')
+    for tabela in session.info.pop('tabelas_escritas', ()):
+        if cache is not None:
+            cache.invalidar(tabela)
+
+    # Ajustes de estado em memória que só valem se a transação foi confirmada (ver Database.aposCommit)
+    for funcao in session.info.pop('apos_commit', ()):
+        funcao()
+
+
+def _descartar_apos_rollback(session):
+    session.info.pop('tabelas_escritas', None)
+    session.info.pop('apos_commit', None)
+
+
+# Unidade de trabalho ativa na thread atual (cada sessão do Streamlit roda em sua própria thread)
+_contexto = threading.local()
+
+
+def _unidade_ativa():
+    return getattr(_contexto, 'unidade', None)
+
+
+def _antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+    unidade = _unidade_ativa()
+    if unidade is not None:
+        conn.info.setdefault('inicio_comando', []).append(time.perf_counter())
+
+
+def _depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+    unidade = _unidade_ativa()
+    inicios = conn.info.get('inicio_comando')
+    if unidade is not None and inicios:
+        unidade.comandos += 1
+        unidade.tempo_banco += time.perf_counter() - inicios.pop()
+
+
+class UnidadeDeTrabalho:
+    """
+    Agrupa várias operações de banco numa única sessão/transação
+    e guarda os contadores daquela unidade.
+    """
+    def __init__(self, nome: str, session):
+        self.nome = nome
+        self.session = session
+        self.sessoes_abertas = 1
+        self.comandos = 0
+        self.tempo_banco = 0.0
+        self.tempo_total = 0.0
+
+    def estatisticas(self) -> dict:
+        return {
+            'unidade': self.nome,
+            'sessoes_abertas': self.sessoes_abertas,
+            'comandos': self.comandos,
+            'tempo_banco_ms': round(self.tempo_banco * 1000, 2),
+            'tempo_total_ms': round(self.tempo_total * 1000, 2)
+        }
 
 
 class Database:
     """
     Classe que gerencia a conexão com o banco de dados e fornece sessões para CRUD.
     """
-    def __init__(self, db_url: str = None):
+    def __init__(self, db_url: str = None, cache_consultas: CacheConsultas = None,
+                 classificacao_em_memoria: bool = False, mensagens_em_memoria: bool = False,
+                 cache_compartilhado: CacheCompartilhado = None, criar_tabelas: bool = True):
         """
         - db_url: URL de conexão do SQLAlchemy.
           Se não informada, tenta buscar em st.secrets["DB_URL"].
+        - cache_consultas: cache opcional para retornarValor (desligado por padrão).
+        - classificacao_em_memoria: usa o índice NumPy em memória no lugar da tabela 'classificacao'.
+        - mensagens_em_memoria: responde a caixa de entrada com a árvore de intervalos em memória.
+        - cache_compartilhado: cache entre processos para retornarAprovados/retornarListaUsuariosNaFrente
+          (sem ele, cada processo usa o st.cache_data).
+        - criar_tabelas: roda o create_all já no construtor (o app deixa para create_all_tables_once).
         """
         # Se não for fornecido, buscarmos do st.secrets
-        if not db_url:
-            self.db_url = st.secrets["DB_URL"]
+        self.db_url = db_url or st.secrets["DB_URL"]
+        self.cache_consultas = cache_consultas
+        self.classificacao_em_memoria = classificacao_em_memoria
+        self.mensagens_em_memoria = mensagens_em_memoria
+        self.cache_compartilhado = cache_compartilhado
         
         self.engine = get_engine(self.db_url)
 
         # Cria as tabelas no banco (caso não existam)
-        Base.metadata.create_all(bind=self.engine)
+        if criar_tabelas:
+            Base.metadata.create_all(bind=self.engine)
+
+    # Estatísticas das últimas unidades de trabalho concluídas (compartilhada entre instâncias)
+    estatisticas_unidades = deque(maxlen=50)
 
     def get_session(self):
-        engine = get_engine(self.db_url)  # Recupera do cache
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        SessionLocal = get_session_factory(self.db_url)  # Recupera do cache
+        unidade = _unidade_ativa()
+        if unidade is not None:
+            unidade.sessoes_abertas += 1
         return SessionLocal()
+
+    @contextmanager
+    def unidadeDeTrabalho(self, nome: str = 'unidade'):
+        """
+        Abre uma única sessão/transação compartilhada por todos os métodos de CRUD
+        chamados dentro do bloco 'with'. Confirma ao final; desfaz em caso de erro.
+        Unidades aninhadas reaproveitam a unidade externa.
+        """
+        externa = _unidade_ativa()
+        if externa is not None:
+            yield externa
+            return
+
+        unidade = UnidadeDeTrabalho(nome, get_session_factory(self.db_url)())
+        _contexto.unidade = unidade
+        inicio = time.perf_counter()
+        try:
+            yield unidade
+        except RerunException:
+            # st.rerun() é chamado depois de a ação terminar: o trabalho feito vale
+            unidade.session.commit()
+            raise
+        except BaseException:
+            # Erros, st.stop(), KeyboardInterrupt, SystemExit...: a unidade pode estar pela metade
+            unidade.session.rollback()
+            raise
+        else:
+            unidade.session.commit()
+        finally:
+            _contexto.unidade = None
+            unidade.session.close()
+            unidade.tempo_total = time.perf_counter() - inicio
+            self.estatisticas_unidades.append(unidade.estatisticas())
+
+    def aposCommit(self, funcao) -> None:
+        """
+        Executa 'funcao' (sem acessar o banco) depois que a unidade de trabalho ativa for
+        confirmada; num rollback ela é descartada. Sem unidade ativa, cada escrita já foi
+        confirmada pelo próprio método de CRUD, então executa na hora.
+        """
+        unidade = _unidade_ativa()
+        if unidade is None:
+            funcao()
+            return
+        unidade.session.info.setdefault('apos_commit', []).append(funcao)
+
+    def invalidarTudo(self, session) -> None:
+        """
+        Escrita feita por fora dos métodos de CRUD (SQL livre do painel de administração):
+        não dá para saber o que mudou, então todas as versões (tabelas e partições) avançam
+        e o cache de consultas é esvaziado. A tabela 'classificacao' é derivada e não é
+        tocada aqui: o chamador a reconstrói (Classificacao.reconstruir) depois do commit.
+        """
+        for mapeamento in Base.registry.mappers:
+            incrementar_versoes(session, mapeamento.class_, {'*'} | particoes_de_colunas(mapeamento.class_))
+        session.execute(
+            update(TabelaVersoes).where(TabelaVersoes.particao != '*').values(versao=TabelaVersoes.versao + 1)
+        )
+        if self.cache_consultas is not None:
+            self.cache_consultas.limpar()
+
+    def invalidarCache(self, model_class) -> None:
+        """ Descarta do cache de consultas as entradas de 'model_class' """
+        if self.cache_consultas is not None:
+            self.cache_consultas.invalidar(model_class.__tablename__)
+
+    def _registrar_escrita(self, session, model_class, particoes) -> None:
+        """
+        Chamado por todo método que escreve: incrementa as versões das partições
+        e invalida o cache de consultas da tabela (agora e após o commit).
+        """
+        incrementar_versoes(session, model_class, particoes)
+        self.invalidarCache(model_class)
+        session.info.setdefault('tabelas_escritas', set()).add(model_class.__tablename__)
+        session.info['cache_consultas'] = self.cache_consultas
+
+    @contextmanager
+    def _sessao(self):
+        """
+        Sessão usada pelos métodos de CRUD: a da unidade de trabalho ativa,
+        ou uma sessão própria, confirmada ao final do bloco.
+        """
+        unidade = _unidade_ativa()
+        if unidade is not None:
+            yield unidade.session
+            return
+
+        with self.get_session() as session:
+            try:
+                yield session
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
                 
     def create_all_tables_once(self):
         """
-        Cria as tabelas se não existirem e insere dados iniciais (apenas se estiver vazio).
+        Cria as tabelas se não existirem, aplica as migrações e insere dados iniciais (apenas se estiver vazio).
+
+        Roda uma vez por implantação, não por processo: a marca gravada em 'metadados' resume
+        tudo o que a inicialização depende (lista oficial, superusuário, tabelas e migrações).
+        Se ela não mudou, o custo são dois SELECTs (a marca e o superusuário); se mudou, só um processo por vez
+        (trava de inicialização no banco) refaz o trabalho, e os demais reaproveitam o resultado.
+        """
+        caminho_aprovados = origem_dos_aprovados()
+        marca = self._marca_inicializacao(caminho_aprovados)
+        if self._marca_gravada() == marca:
+            # A marca não cobre remoções posteriores: o superusuário é conferido a cada início
+            # (uma busca pela chave primária) e recriado, sob a trava, se tiver sido excluído
+            if not self._superusuario_existe():
+                with self._trava_inicializacao():
+                    self._verificar_superusuario_padrao()
+            return
+
+        with self._trava_inicializacao():
+            # Outro processo pode ter concluído enquanto esperávamos a trava
+            if self._marca_gravada() == marca:
+                return
+            self._inicializar(caminho_aprovados)
+            self.gravarMetadado('semente', marca)
+
+    def _marca_inicializacao(self, caminho_aprovados: str) -> str:
+        import hashlib
+        from migracoes import listar_migracoes
+        partes = [
+            hash_do_snapshot(caminho_aprovados),
+            st.secrets['DB_SUPERUSER'],
+            ','.join(sorted(Base.metadata.tables)),
+            ','.join(str(migracao.VERSAO) for migracao in listar_migracoes()),
+        ]
+        return hashlib.sha256('|'.join(partes).encode()).hexdigest()
+
+    def _marca_gravada(self):
+        # Banco novo: a tabela 'metadados' ainda não existe
+        try:
+            return self.lerMetadado('semente')
+        except DBAPIError:
+            return None
+
+    @contextmanager
+    def _trava_inicializacao(self, espera: float = 0.2, validade: float = 600):
+        """
+        Trava exclusiva entre processos durante a inicialização: advisory lock no PostgreSQL;
+        nos demais bancos, uma linha 'trava_inicializacao' em 'metadados' (vence após 'validade'
+        segundos, caso o processo que a obteve morra no meio).
         """
+        if self.engine.dialect.name == 'postgresql':
+            with self.engine.connect() as conexao:
+                conexao.execute(text("SELECT pg_advisory_lock(:chave)"), {'chave': CHAVE_TRAVA_INICIALIZACAO})
+                try:
+                    yield
+                finally:
+                    conexao.execute(text("SELECT pg_advisory_unlock(:chave)"), {'chave': CHAVE_TRAVA_INICIALIZACAO})
+                    conexao.commit()
+            return
+
+        try:
+            TabelaMetadados.__table__.create(self.engine, checkfirst=True)
+        except (OperationalError, IntegrityError):
+            # Outro processo criou a tabela entre a verificação e o CREATE ("already exists");
+            # se for outro problema, o INSERT abaixo falha do mesmo jeito
+            pass
+        dono = f"{os.getpid()}-{threading.get_ident()}-{time.time()}"
+        while True:
+            try:
+                with self.engine.begin() as conexao:
+                    conexao.execute(delete(TabelaMetadados).where(
+                        TabelaMetadados.chave == 'trava_inicializacao',
+                        TabelaMetadados.data_atualizacao < datetime.fromtimestamp(time.time() - validade)
+                    ))
+                    conexao.execute(insert(TabelaMetadados).values(
+                        chave='trava_inicializacao', valor=dono, data_atualizacao=datetime.now()
+                    ))
+                break
+            except IntegrityError:
+                time.sleep(espera)
+        try:
+            yield
+        finally:
+            with self.engine.begin() as conexao:
+                conexao.execute(delete(TabelaMetadados).where(
+                    TabelaMetadados.chave == 'trava_inicializacao', TabelaMetadados.valor == dono
+                ))
+
+    def _inicializar(self, caminho_aprovados: str) -> None:
         # Cria as tabelas (se não existir)
         Base.metadata.create_all(bind=self.engine)
 
-        # Se a TabelaAprovados está vazia, só então insere
-        if self.retornarTabela(TabelaAprovados).empty:
-            self._inserir_tabela_aprovados()
+        # Aplica as migrações de esquema pendentes (índices, colunas novas etc.)
+        for migracao in aplicar_migracoes(self.engine):
+            print(f"Migração {migracao['versao']} aplicada: {migracao['descricao']}")
+
+        # Tabela vazia: carga inicial em lote. Lista oficial diferente da última carregada:
+        # aplica só as diferenças (ImportadorAprovados), como numa importação pelo painel
+        hash_lista = hash_do_snapshot(caminho_aprovados)
+        if self._tabela_vazia(TabelaAprovados):
+            self._inserir_tabela_aprovados(caminho_aprovados)
+        elif self.lerMetadado('hash_aprovados') != hash_lista:
+            self._atualizar_tabela_aprovados(caminho_aprovados)
+        self.gravarMetadado('hash_aprovados', hash_lista)
 
         # Se a TabelaGrupos está vazia, só então insere
-        if self.retornarTabela(TabelaGrupos).empty:
+        if self._tabela_vazia(TabelaGrupos):
             self._inserir_grupos()
 
         # Garante a existência de um superusuário padrão
         self._verificar_superusuario_padrao()
 
+        # Monta a classificação materializada na primeira execução
+        from classificacao import Classificacao
+        classificacao = Classificacao(self)
+        if classificacao.esta_vazia():
+            print(f"Classificação montada: {classificacao.reconstruir()} posições.")
+
+    def _superusuario_existe(self) -> bool:
+        with self._sessao() as session:
+            return session.execute(
+                select(literal(1)).where(TabelaUsuario.n_inscr == st.secrets['DB_SUPERUSER']).limit(1)
+            ).first() is not None
+
+    def _tabela_vazia(self, model_class) -> bool:
+        with self._sessao() as session:
+            return session.execute(select(literal(1)).select_from(model_class).limit(1)).first() is None
+
+    def lerMetadado(self, chave: str):
+        """ Valor de 'chave' na tabela 'metadados' (None se não existir) """
+        with self._sessao() as session:
+            return session.execute(select(TabelaMetadados.valor).where(TabelaMetadados.chave == chave)).scalar()
+
+    def gravarMetadado(self, chave: str, valor: str) -> None:
+        with self._sessao() as session:
+            session.merge(TabelaMetadados(chave=chave, valor=valor, data_atualizacao=datetime.now()))
+
     
     
     def retornarTabela(self, model_class) -> pd.DataFrame:
@@ -152,43 +757,85 @@ class Database:
         Consulta todos os registros da 'model_class' informada 
         e retorna como DataFrame.
         """
-        with self.get_session() as session:
-            # Consulta todos os objetos da classe informada
-            results = session.query(model_class).all()
-
-            # Converte cada resultado em um dicionário {coluna: valor}
-            data = []
-            for obj in results:
-                # Percorre as colunas do objeto (mapeadas via SQLAlchemy)
-                row_dict = {
-                    column.name: getattr(obj, column.name)
-                    for column in obj.__table__.columns
-                }
-                data.append(row_dict)
-
-        # Retorna o DataFrame com as linhas coletadas
-        df = pd.DataFrame(data)
-        return df
-    
+        return self.lerTabela(model_class)
+
+    def lerTabela(self,
+                  model_class,
+                  colunas: list = None,
+                  filtros: dict = None,
+                  condicoes: list = None,
+                  usar_arrow: bool = False,
+                  tamanho_lote: int = 1000) -> pd.DataFrame:
+        """
+        Lê a tabela de 'model_class' direto pelo Core do SQLAlchemy, sem montar objetos ORM.
+
+        - colunas: nomes das colunas desejadas (padrão: todas).
+        - filtros: dicionário {coluna: valor} aplicado como igualdade no SQL.
+        - condicoes: lista de expressões SQLAlchemy adicionais (ex.: TabelaUsuario.posicao < 10).
+        - usar_arrow: se True, retorna o DataFrame com dtypes do pyarrow.
+        - tamanho_lote: quantidade de linhas buscadas por vez (yield_per).
+        """
+        tabela = model_class.__table__
+        nomes = colunas or [coluna.name for coluna in tabela.columns]
+
+        consulta = select(*[tabela.c[nome] for nome in nomes])
+        for nome, valor in (filtros or {}).items():
+            consulta = consulta.where(tabela.c[nome] == valor)
+        for condicao in (condicoes or []):
+            consulta = consulta.where(condicao)
+
+        import pandas as pd
+
+        # Lê as linhas em lotes, acumulando por coluna
+        dados = {nome: [] for nome in nomes}
+        with self._sessao() as session:
+            resultado = session.execute(consulta, execution_options={'yield_per': tamanho_lote})
+            for lote in resultado.partitions():
+                for nome, valores in zip(nomes, zip(*lote)):
+                    dados[nome].extend(valores)
+
+        if usar_arrow:
+            import pyarrow as pa
+            return pa.Table.from_pydict(dados).to_pandas(types_mapper=pd.ArrowDtype)
+
+        return pd.DataFrame(dados, columns=nomes)
+
 
     def inserirDados(self, model_class, data_dict: dict):
         """
         Adiciona um registro em 'model_class' (tabela) com base em 'data_dict'.
         Retorna o objeto criado (mapeado pelo SQLAlchemy).
         """
-        with self.get_session() as session:
+        with self._sessao() as session:
             # Cria uma instância do modelo usando ** para desempacotar o dicionário
             novo_registro = model_class(**data_dict)
             
-            # Adiciona e confirma no banco
+            # Adiciona e envia ao banco (a confirmação fica a cargo de _sessao)
             session.add(novo_registro)
-            session.commit()
+            session.flush()
             
             # Opcional: refresh para garantir que o objeto tenha os dados atualizados
             session.refresh(novo_registro)
+
+            self._registrar_escrita(
+                session, model_class, particoes_de([novo_registro]) | particoes_de_colunas(model_class)
+            )
             
             return novo_registro
 
+    def inserirDadosEmLote(self, model_class, registros: list) -> int:
+        """
+        Adiciona vários registros em 'model_class' com um único INSERT em lote (executemany).
+        Retorna a quantidade de registros inseridos.
+        """
+        if not registros:
+            return 0
+
+        with self._sessao() as session:
+            session.execute(insert(model_class), registros)
+            self._registrar_escrita(session, model_class, particoes_de(registros) | particoes_de_colunas(model_class))
+            return len(registros)
+
     def atualizarTabela(self, model_class, filter_dict: dict, update_dict: dict):
         """
         Atualiza um ou mais campos em um único registro, com base
@@ -197,25 +844,93 @@ class Database:
 
         Retorna o registro atualizado ou None caso não exista.
         """
-        with self.get_session() as session:
+        with self._sessao() as session:
             # Busca um único registro que atenda aos critérios de filtro
             record = session.query(model_class).filter_by(**filter_dict).one_or_none()
             if not record:
                 return None
+
+            # Partições antes da mudança (grupo/cota podem ser alterados)
+            particoes = particoes_de([dict(vars(record))])
             
             # Aplica as atualizações campo a campo
             for key, value in update_dict.items():
                 setattr(record, key, value)
             
-            session.commit()
+            session.flush()
+            particoes |= particoes_de([record]) | particoes_de_colunas(model_class, update_dict)
+            self._registrar_escrita(session, model_class, particoes)
             return record
+
+    def deletarDados(self, model_class, filter_dict: dict) -> int:
+        """
+        Exclui os registros de 'model_class' que atendam a 'filter_dict'.
+        Retorna a quantidade de registros excluídos.
+        """
+        with self._sessao() as session:
+            records = session.query(model_class).filter_by(**filter_dict).all()
+            if not records:
+                return 0
+
+            particoes = particoes_de([dict(vars(record)) for record in records])
+            for record in records:
+                session.delete(record)
+
+            session.flush()
+            self._registrar_escrita(session, model_class, particoes | particoes_de_colunas(model_class))
+            return len(records)
+
+    def deletarOnde(self, model_class, condicoes: list) -> int:
+        """
+        Exclui, com um único DELETE, os registros de 'model_class' que atendam às
+        'condicoes' (expressões SQLAlchemy). Retorna a quantidade de registros excluídos.
+        """
+        tabela = model_class.__table__
+        comando = delete(tabela)
+        for condicao in condicoes:
+            comando = comando.where(condicao)
+
+        # grupo/cota dos excluídos (RETURNING) para invalidar só as partições afetadas
+        com_particao = 'grupo' in tabela.c and 'cota' in tabela.c
+        if com_particao:
+            comando = comando.returning(tabela.c.grupo, tabela.c.cota)
+
+        with self._sessao() as session:
+            resultado = session.execute(comando)
+            if com_particao:
+                excluidos = [dict(linha._mapping) for linha in resultado]
+                quantidade = len(excluidos)
+            else:
+                excluidos, quantidade = [], resultado.rowcount
+            if quantidade:
+                self._registrar_escrita(session, model_class, particoes_de(excluidos) | particoes_de_colunas(model_class))
+            return quantidade
+
+    def versaoTabela(self, model_class, particao: str = '*') -> int:
+        """
+        Retorna a versão atual de 'model_class' (ou de uma partição 'grupo|cota' ou 'coluna:<nome>').
+        Usada como parte da chave dos caches de leitura.
+        """
+        with self._sessao() as session:
+            versao = session.execute(
+                select(TabelaVersoes.versao)
+                .where(TabelaVersoes.tabela == model_class.__tablename__, TabelaVersoes.particao == particao)
+            ).scalar()
+        return versao or 0
         
 
     def retornarValor(self, model_class, filter_dict: dict):
         """
         Retorna uma linha de uma tabela escolhida
         """
-        with self.get_session() as session:
+        tabela = model_class.__tablename__
+        cache = self.cache_consultas
+        if cache is not None:
+            data = cache.obter(tabela, filter_dict)
+            if data is not None:
+                return data
+
+        with self._sessao() as session:
             # Busca todos os registros que atendam aos critérios de filtro
             records = session.query(model_class).filter_by(**filter_dict).all()
 
@@ -225,39 +940,76 @@ class Database:
                 for record in records
             ]
 
+            # Não guarda leituras de uma tabela com escrita ainda não confirmada nesta sessão
+            if cache is not None and tabela not in session.info.get('tabelas_escritas', ()):
+                cache.guardar(tabela, filter_dict, data)
+
         return data
 
     
 
-    def _inserir_tabela_aprovados(self):
-        aprovados = pd.read_csv('aprovados.csv', sep=';')  # Certifique-se de ter a coluna "cota"
+    def carregarAprovadosEmLote(self, caminho_csv: str = CAMINHO_CSV_APROVADOS, tamanho_lote: int = 2000) -> dict:
+        """
+        Carrega a lista de aprovados a partir do CSV (ou do snapshot Parquet), lendo o arquivo em lotes.
 
-        for _, row in aprovados.iterrows():
-            numero_inscricao = str(row['n_inscr'])
-            nome = row['nome']
-            posicao = str(row['posicao'])
-            grupo = row['grupo']
+        Para cada lote, verifica de uma só vez quais inscrições já existem no banco
+        (anti-join) e insere as restantes com um único INSERT de múltiplas linhas.
+        Todos os lotes rodam dentro da mesma transação.
 
-            # Se o CSV tiver a coluna "cota", usar:
-            if 'cota' in row:
-                cota = row['cota']
-            else:
-                cota = "AC"  # default
+        Retorna um dicionário com as contagens e o tempo gasto.
+        """
+        inicio = time.perf_counter()
+        lidos = 0
+        inseridos = 0
+
+        with self.engine.begin() as conexao:
+            for lote in ler_aprovados_em_lotes(caminho_csv, tamanho_lote):
+                lidos += len(lote)
+
+                # Uma única consulta para descobrir quais inscrições do lote já existem
+                existentes = set(
+                    conexao.execute(
+                        select(TabelaAprovados.n_inscr)
+                        .where(TabelaAprovados.n_inscr.in_(lote['n_inscr'].tolist()))
+                    ).scalars()
+                )
+                novos = lote[~lote['n_inscr'].isin(existentes)]
+
+                if not novos.empty:
+                    registros = novos.to_dict('records')
+                    conexao.execute(insert(TabelaAprovados).values(registros))
+                    incrementar_versoes(conexao, TabelaAprovados, particoes_de(registros))
+                    inseridos += len(novos)
 
-            registro_existente = self.retornarValor(
-                TabelaAprovados,
-                filter_dict={'n_inscr': numero_inscricao}
+        self.invalidarCache(TabelaAprovados)
+
+        return {
+            'lidos': lidos,
+            'inseridos': inseridos,
+            'ignorados': lidos - inseridos,
+            'tempo_segundos': round(time.perf_counter() - inicio, 3)
+        }
+
+    def _inserir_tabela_aprovados(self, caminho: str = CAMINHO_SNAPSHOT_APROVADOS):
+        resultado = self.carregarAprovadosEmLote(caminho)
+        print(
+            f"Aprovados carregados: {resultado['inseridos']} inseridos, "
+            f"{resultado['ignorados']} já existentes ({resultado['tempo_segundos']}s)."
+        )
+
+
+    def _atualizar_tabela_aprovados(self, caminho: str) -> None:
+        from importacao import ImportadorAprovados
+        resultado = ImportadorAprovados(self).importar(caminho)['resultado']
+        logger.warning(
+            "Lista oficial alterada (%s): %d inseridos, %d atualizados, %d removidos.",
+            caminho, len(resultado['inseridos']), len(resultado['atualizados']), len(resultado['removidos'])
+        )
+        if resultado['remocoes_bloqueadas']:
+            logger.warning(
+                "Mantidos por terem conta cadastrada (remova pelo painel de administração): %s",
+                ', '.join(resultado['remocoes_bloqueadas'])
             )
-            if not registro_existente:
-                dados_para_inserir = {
-                    'n_inscr': numero_inscricao,
-                    'nome': nome,
-                    'posicao': posicao,
-                    'grupo': grupo,
-                    'cota': cota  # <-- Novo
-                }
-                self.inserirDados(TabelaAprovados, dados_para_inserir)
-        
 
 
     def _inserir_grupos(self):
@@ -314,33 +1066,45 @@ class Database:
             self.inserirDados(TabelaUsuario, dados_para_inserir)
             print("Superusuário koriptnueve criado com sucesso.")
 
-@st.cache_data
-def retornarAprovados(_db: Database) -> pd.DataFrame:
+def retornarAprovados(db: Database) -> pd.DataFrame:
     """ Método para otimizar o retorno de aprovados, com cache do streamlit """
+    # A versão da tabela entra na chave do cache: qualquer escrita gera uma nova entrada
+    versao = db.versaoTabela(TabelaAprovados)
+    if db.cache_compartilhado is not None:
+        return db.cache_compartilhado.obter_ou_calcular(
+            f"aprovados|{versao}", lambda: db.retornarTabela(TabelaAprovados)
+        )
+    return _retornarAprovados(db, versao)
+
+
+@st.cache_data(max_entries=4)
+def _retornarAprovados(_db: Database, versao: int) -> pd.DataFrame:
     return _db.retornarTabela(TabelaAprovados)
 
 
-@st.cache_data
-def retornarListaUsuariosNaFrente(_db: Database, grupo: str, posicao: int, cota: str) -> pd.DataFrame:
+def retornarListaUsuariosNaFrente(db: Database, grupo: str, posicao: int, cota: str) -> pd.DataFrame:
     """
     Retorna todos os registros da tabela 'usuarios' que estejam na frente de uma determinada inscrição para um certo grupo
     """
-    with _db.get_session() as session:
-        # Query que filtra pela data_criacao > reference_date
-        results = (
-            session.query(TabelaUsuario)
-            .filter(TabelaUsuario.grupo == grupo)       #
-            .filter(TabelaUsuario.posicao < posicao)
-            .filter(TabelaUsuario.cota == cota)
-            .all()
+    # Só a partição grupo/cota do usuário invalida esse cache
+    versao = db.versaoTabela(TabelaUsuario, f"{grupo}|{cota}")
+    if db.cache_compartilhado is not None:
+        return db.cache_compartilhado.obter_ou_calcular(
+            f"na_frente|{grupo}|{cota}|{posicao}|{versao}",
+            lambda: _lerUsuariosNaFrente(db, grupo, posicao, cota)
         )
+    return _retornarListaUsuariosNaFrente(db, grupo, posicao, cota, versao)
+
+
+@st.cache_data(max_entries=2000)
+def _retornarListaUsuariosNaFrente(_db: Database, grupo: str, posicao: int, cota: str, versao: int) -> pd.DataFrame:
+    return _lerUsuariosNaFrente(_db, grupo, posicao, cota)
 
-        data = []
-        for obj in results:
-            row_dict = {
-                column.name: getattr(obj, column.name)
-                for column in obj.__table__.columns
-            }
-            data.append(row_dict)
 
-    return pd.DataFrame(data)
\ No newline at end of file
+def _lerUsuariosNaFrente(db: Database, grupo: str, posicao: int, cota: str) -> pd.DataFrame:
+    return db.lerTabela(
+        TabelaUsuario,
+        colunas=['n_inscr', 'posicao', 'grupo', 'cota', 'opcao', 'data_ultima_modificacao'],
+        filtros={'grupo': grupo, 'cota': cota},
+        condicoes=[TabelaUsuario.posicao < posicao]
+    )
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+
+Cálculo em lote de quem já pode receber o link do grupo (dentro da quantidade de vagas)
+
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from database import Database, TabelaAprovados, TabelaUsuario, TabelaGrupos
+from indice_classificacao import IndiceClassificacao, OPCOES
+
+NAO_VAI_ASSUMIR = OPCOES.index('Não vai assumir')
+
+
+def calcular_elegibilidade(indice: IndiceClassificacao, usuarios: pd.DataFrame, grupos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula, para todos os usuários de uma vez, a posição efetiva (aprovados à frente
+    menos os que já informaram que não vão assumir) e se ela está dentro das vagas do grupo/cota.
+
+    - usuarios: colunas n_inscr, nome, grupo, cota, posicao, opcao
+    - grupos: colunas grupo, cota, qtde_vagas
+    """
+    # A cota em 'grupos' pode ter grafia diferente (ex.: 'PCD' x 'PcD')
+    vagas = {
+        (linha.grupo, str(linha.cota).lower()): int(linha.qtde_vagas)
+        for linha in grupos.itertuples(index=False)
+    }
+
+    partes = []
+    for (grupo, cota), usuarios_particao in usuarios.groupby(['grupo', 'cota']):
+        posicoes = usuarios_particao['posicao'].to_numpy(dtype=np.int64)
+        particao = indice.particao(grupo, cota)
+
+        if particao is None:
+            aprovados_frente = np.zeros(len(posicoes), dtype=np.int64)
+            recusas_frente = np.zeros(len(posicoes), dtype=np.int64)
+        else:
+            aprovados_frente = np.searchsorted(particao.aprovados, posicoes, side='left')
+            i = np.searchsorted(particao.usuarios, posicoes, side='left')
+            recusas_frente = particao.acumulado[i, NAO_VAI_ASSUMIR]
+
+        qtde_vagas = vagas.get((grupo, str(cota).lower()), 0)
+        posicao_efetiva = aprovados_frente - recusas_frente
+
+        partes.append(usuarios_particao.assign(
+            aprovados_frente=aprovados_frente,
+            recusas_frente=recusas_frente,
+            posicao_efetiva=posicao_efetiva,
+            qtde_vagas=qtde_vagas,
+            elegivel=posicao_efetiva < qtde_vagas
+        ))
+
+    if not partes:
+        return usuarios.assign(aprovados_frente=0, recusas_frente=0, posicao_efetiva=0, qtde_vagas=0, elegivel=False)
+
+    return pd.concat(partes).sort_values(['grupo', 'cota', 'posicao']).reset_index(drop=True)
+
+
+def elegibilidade_atual(db: Database) -> pd.DataFrame:
+    """
+    Elegibilidade de todos os usuários, recalculada apenas quando alguma das
+    tabelas envolvidas (aprovados, usuários, grupos) muda de versão.
+    """
+    versoes = (
+        db.versaoTabela(TabelaAprovados),
+        db.versaoTabela(TabelaUsuario),
+        db.versaoTabela(TabelaGrupos),
+    )
+    return _elegibilidade(db, versoes)
+
+
+# cache_resource: o resultado é só leitura, então é compartilhado sem cópia entre as sessões
+@st.cache_resource(max_entries=4)
+def _elegibilidade(_db: Database, versoes: tuple) -> pd.DataFrame:
+    usuarios = _db.lerTabela(TabelaUsuario, colunas=['n_inscr', 'nome', 'grupo', 'cota', 'posicao', 'opcao'])
+    aprovados = _db.lerTabela(TabelaAprovados, colunas=['grupo', 'cota', 'posicao'])
+    grupos = _db.lerTabela(TabelaGrupos, colunas=['grupo', 'cota', 'qtde_vagas'])
+
+    indice = IndiceClassificacao(aprovados, usuarios)
+    return calcular_elegibilidade(indice, usuarios, grupos).set_index('n_inscr', drop=False)
+
+
+def usuario_elegivel(db: Database, n_inscr: str) -> bool:
+    """ Consulta o resultado pré-calculado para um único usuário """
+    tabela = elegibilidade_atual(db)
+    if n_inscr not in tabela.index:
+        return False
+    return bool(tabela.at[n_inscr, 'elegivel'])
+
+
+def simular_vagas(elegibilidade: pd.DataFrame, grupo: str, cota: str, qtde_vagas: int,
+                  recusas_extras: list = None) -> dict:
+    """
+    Simulação "e se" para coordenadores, sem gravar nada no banco: recalcula a elegibilidade
+    de um grupo/cota com outra quantidade de vagas e/ou com desistências hipotéticas.
+
+    - elegibilidade: resultado de elegibilidade_atual / calcular_elegibilidade
+    - recusas_extras: inscrições que, na hipótese, passariam a não assumir
+
+    Na hipótese, cada desistente abre espaço para quem está atrás dele (não para si mesmo,
+    pela comparação estrita de posições) e deixa de receber o link.
+    Retorna quem entra e quem sai do conjunto que recebe o link (os próprios desistentes
+    ficam à parte, em 'desistentes') e o total antes e depois.
+    """
+    atual = elegibilidade[
+        (elegibilidade['grupo'] == grupo) &
+        (elegibilidade['cota'].str.lower() == str(cota).lower())
+    ]
+
+    # Desistências hipotéticas de quem ainda não tinha desistido
+    novas_recusas = atual[
+        atual['n_inscr'].isin(recusas_extras or []) & (atual['opcao'] != 'Não vai assumir')
+    ]
+    posicoes_recusas = np.sort(novas_recusas['posicao'].to_numpy(dtype=np.int64))
+    recusas_adicionais = np.searchsorted(posicoes_recusas, atual['posicao'].to_numpy(dtype=np.int64), side='left')
+
+    posicao_efetiva = atual['posicao_efetiva'].to_numpy() - recusas_adicionais
+    desiste = atual['n_inscr'].isin(novas_recusas['n_inscr']).to_numpy()
+    elegivel_hipotese = (posicao_efetiva < qtde_vagas) & ~desiste
+    hipotese = atual.assign(posicao_efetiva_hipotese=posicao_efetiva, elegivel_hipotese=elegivel_hipotese)
+
+    return {
+        'entram': hipotese[~hipotese['elegivel'] & hipotese['elegivel_hipotese']],
+        'saem': hipotese[hipotese['elegivel'] & ~hipotese['elegivel_hipotese'] & ~desiste],
+        'desistentes': hipotese[desiste],
+        'elegiveis_atual': int(atual['elegivel'].sum()),
+        'elegiveis_hipotese': int(elegivel_hipotese.sum()),
+    }
@@ -0,0 +1,161 @@
+"""
+
+Canal de e-mail (SMTP) com conexões persistentes reaproveitadas e envio em lotes
+
+"""
+
+import queue
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+
+MODELO_PADRAO = """{conteudo}
+
+--
+Mensagem enviada pela coordenação do grupo de aprovados.
+Para deixar de receber, altere a opção de contato em "Meus Dados".
+"""
+
+
+class CanalEmail:
+    """
+    Envia a mesma mensagem para muitos destinatários por SMTP.
+
+    - Mantém um pequeno pool de conexões abertas (reaproveitadas entre lotes e mensagens).
+    - Monta e serializa o e-mail uma única vez por mensagem; os destinatários vão
+      apenas no envelope (RCPT TO), em lotes de 'tamanho_lote' por comando DATA.
+    - Retorna um status por destinatário (recusas individuais do servidor são respeitadas).
+    """
+
+    def __init__(self,
+                 host: str,
+                 porta: int = 587,
+                 usuario: str = None,
+                 senha: str = None,
+                 remetente: str = None,
+                 usar_tls: bool = True,
+                 conexoes: int = 2,
+                 tamanho_lote: int = 50,
+                 modelo: str = MODELO_PADRAO,
+                 timeout: float = 30):
+        self.host = host
+        self.porta = porta
+        self.usuario = usuario
+        self.senha = senha
+        self.remetente = remetente or usuario
+        self.usar_tls = usar_tls
+        self.conexoes = conexoes
+        self.tamanho_lote = tamanho_lote
+        self.modelo = modelo
+        self.timeout = timeout
+        self._pool = queue.LifoQueue()
+
+    @classmethod
+    def dos_secrets(cls, secrets) -> 'CanalEmail':
+        """ Monta o canal a partir do st.secrets (SMTP_HOST, SMTP_PORTA, SMTP_USUARIO, ...) """
+        return cls(
+            secrets["SMTP_HOST"],
+            porta=int(secrets.get("SMTP_PORTA", 587)),
+            usuario=secrets.get("SMTP_USUARIO"),
+            senha=secrets.get("SMTP_SENHA"),
+            remetente=secrets.get("SMTP_REMETENTE"),
+            usar_tls=bool(secrets.get("SMTP_TLS", True)),
+            conexoes=int(secrets.get("SMTP_CONEXOES", 2)),
+            tamanho_lote=int(secrets.get("SMTP_TAMANHO_LOTE", 50))
+        )
+
+    def _conectar(self) -> smtplib.SMTP:
+        conexao = smtplib.SMTP(self.host, self.porta, timeout=self.timeout)
+        if self.usar_tls:
+            conexao.starttls()
+        if self.usuario:
+            conexao.login(self.usuario, self.senha)
+        return conexao
+
+    def _obter_conexao(self) -> smtplib.SMTP:
+        """ Pega uma conexão do pool, descartando as que o servidor já fechou """
+        while True:
+            try:
+                conexao = self._pool.get_nowait()
+            except queue.Empty:
+                return self._conectar()
+            try:
+                if conexao.noop()[0] == 250:
+                    return conexao
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._descartar(conexao)
+
+    def _devolver_conexao(self, conexao: smtplib.SMTP) -> None:
+        if self._pool.qsize() < self.conexoes:
+            self._pool.put(conexao)
+        else:
+            self._descartar(conexao)
+
+    @staticmethod
+    def _descartar(conexao: smtplib.SMTP) -> None:
+        try:
+            conexao.quit()
+        except (smtplib.SMTPException, OSError):
+            conexao.close()
+
+    def renderizar(self, titulo: str, conteudo: str) -> bytes:
+        """ Monta o e-mail (sem destinatários no cabeçalho) e o serializa uma única vez """
+        mensagem = EmailMessage()
+        mensagem['Subject'] = titulo
+        mensagem['From'] = self.remetente
+        mensagem['To'] = 'undisclosed-recipients:;'
+        mensagem['Date'] = formatdate(localtime=True)
+        mensagem['Message-ID'] = make_msgid()
+        mensagem.set_content(self.modelo.format(titulo=titulo, conteudo=conteudo))
+        return mensagem.as_bytes()
+
+    def _enviar_lote(self, dados: bytes, enderecos: list) -> dict:
+        """ Um comando DATA para o lote; retorna {endereço: erro ou None} """
+        try:
+            conexao = self._obter_conexao()
+        except (smtplib.SMTPException, OSError) as erro:
+            return {endereco: f"Falha ao conectar: {erro}" for endereco in enderecos}
+
+        try:
+            recusados = conexao.sendmail(self.remetente, enderecos, dados)
+        except smtplib.SMTPRecipientsRefused as erro:
+            self._devolver_conexao(conexao)
+            return {endereco: str(erro.recipients.get(endereco, erro)) for endereco in enderecos}
+        except (smtplib.SMTPException, OSError) as erro:
+            # Conexão em estado desconhecido: não volta para o pool
+            self._descartar(conexao)
+            return {endereco: str(erro) for endereco in enderecos}
+
+        self._devolver_conexao(conexao)
+        return {endereco: (str(recusados[endereco]) if endereco in recusados else None) for endereco in enderecos}
+
+    def enviar(self, destinatarios: list, titulo: str, conteudo: str) -> list:
+        """
+        Envia o e-mail para cada destinatário ({n_inscr, email}).
+        Retorna uma lista de status, na mesma ordem dos destinatários.
+        """
+        if not destinatarios:
+            return []
+
+        dados = self.renderizar(titulo, conteudo)
+        enderecos = list(dict.fromkeys(d['email'].strip() for d in destinatarios if d.get('email')))
+        lotes = [enderecos[i:i + self.tamanho_lote] for i in range(0, len(enderecos), self.tamanho_lote)]
+
+        erros = {}
+        with ThreadPoolExecutor(max_workers=self.conexoes) as pool:
+            for resultado in pool.map(lambda lote: self._enviar_lote(dados, lote), lotes):
+                erros.update(resultado)
+
+        status = []
+        for destinatario in destinatarios:
+            endereco = (destinatario.get('email') or '').strip()
+            erro = erros.get(endereco) if endereco else 'E-mail não informado'
+            status.append({'n_inscr': destinatario.get('n_inscr'), 'email': endereco,
+                           'sucesso': erro is None, 'erro': erro})
+        return status
+
+    def fechar(self) -> None:
+        while not self._pool.empty():
+            self._descartar(self._pool.get_nowait())
@@ -0,0 +1,156 @@
+"""
+
+Disparo de mensagens de WhatsApp (API da Twilio) em paralelo, com limite de taxa e novas tentativas
+
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+from controller.utils_page import limpar_telefone
+
+URL_BASE_TWILIO = "https://api.twilio.com"
+REMETENTE_PADRAO = "whatsapp:+14155238886"  # Exemplo de número do sandbox
+
+
+class ErroTransitorio(Exception):
+    """ Resposta 429/5xx ou falha de conexão: vale a pena tentar de novo """
+
+
+class LimitadorTaxa:
+    """
+    Balde de fichas (token bucket) compartilhado entre as threads:
+    no máximo 'taxa' envios por segundo, com rajadas de até 'capacidade'.
+    """
+
+    def __init__(self, taxa: float, capacidade: int = None):
+        self.taxa = taxa
+        self.capacidade = capacidade or max(1, int(taxa))
+        self._fichas = float(self.capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self) -> None:
+        """ Bloqueia até haver uma ficha disponível e a consome """
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = (1 - self._fichas) / self.taxa
+            time.sleep(espera)
+
+
+class DisparadorWhatsApp:
+    """
+    Envia a mesma mensagem para vários destinatários usando um pool de threads
+    e uma única sessão HTTP (conexões reaproveitadas).
+
+    - concorrencia: quantidade de requisições simultâneas.
+    - mensagens_por_segundo: limite global de envios (token bucket).
+    - tentativas: máximo de tentativas por destinatário em respostas 429/5xx.
+    """
+
+    def __init__(self,
+                 sid: str,
+                 token: str,
+                 remetente: str = REMETENTE_PADRAO,
+                 url_base: str = URL_BASE_TWILIO,
+                 concorrencia: int = 8,
+                 mensagens_por_segundo: float = 10,
+                 tentativas: int = 4,
+                 espera_maxima: float = 30):
+        self.url_api = f"{url_base.rstrip('/')}/2010-04-01/Accounts/{sid}/Messages.json"
+        self.remetente = remetente
+        self.concorrencia = concorrencia
+        self.tentativas = tentativas
+        self.espera_maxima = espera_maxima
+        self.limitador = LimitadorTaxa(mensagens_por_segundo)
+
+        self.sessao = requests.Session()
+        self.sessao.auth = (sid, token)
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=concorrencia)
+        self.sessao.mount('http://', adaptador)
+        self.sessao.mount('https://', adaptador)
+
+    @classmethod
+    def dos_secrets(cls, secrets) -> 'DisparadorWhatsApp':
+        """ Monta o disparador a partir do st.secrets (TWILIO_URL_BASE permite apontar para um stub local) """
+        return cls(
+            secrets["TWILIO_SID"],
+            secrets["TWILIO_TOKEN"],
+            remetente=secrets.get("TWILIO_REMETENTE", REMETENTE_PADRAO),
+            url_base=secrets.get("TWILIO_URL_BASE", URL_BASE_TWILIO),
+            concorrencia=int(secrets.get("WHATSAPP_CONCORRENCIA", 8)),
+            mensagens_por_segundo=float(secrets.get("WHATSAPP_MENSAGENS_POR_SEGUNDO", 10))
+        )
+
+    def _postar(self, telefone: str, conteudo: str) -> requests.Response:
+        self.limitador.aguardar()
+        try:
+            resposta = self.sessao.post(
+                self.url_api,
+                data={"From": self.remetente, "Body": conteudo, "To": f"whatsapp:+55{telefone}"},
+                timeout=15
+            )
+        except (requests.ConnectionError, requests.Timeout) as erro:
+            raise ErroTransitorio(str(erro)) from erro
+
+        if resposta.status_code == 429 or resposta.status_code >= 500:
+            raise ErroTransitorio(f"HTTP {resposta.status_code}")
+        return resposta
+
+    def _enviar_um(self, destinatario: dict, conteudo: str) -> dict:
+        """ Envia para um destinatário e devolve o status (nunca levanta exceção) """
+        status = {
+            'n_inscr': destinatario.get('n_inscr'),
+            'nome': destinatario.get('nome'),
+            'telefone': limpar_telefone(destinatario.get('telefone') or ''),
+            'sucesso': False,
+            'status_http': None,
+            'tentativas': 0,
+            'erro': None
+        }
+        if not status['telefone']:
+            status['erro'] = 'Telefone não informado'
+            return status
+
+        tentativas = Retrying(
+            retry=retry_if_exception_type(ErroTransitorio),
+            stop=stop_after_attempt(self.tentativas),
+            wait=wait_exponential_jitter(initial=0.5, max=self.espera_maxima),
+            reraise=True
+        )
+        try:
+            for tentativa in tentativas:
+                with tentativa:
+                    status['tentativas'] = tentativa.retry_state.attempt_number
+                    resposta = self._postar(status['telefone'], conteudo)
+        except (ErroTransitorio, requests.RequestException) as erro:
+            status['erro'] = str(erro)
+            return status
+
+        status['status_http'] = resposta.status_code
+        status['sucesso'] = resposta.status_code == 201
+        if not status['sucesso']:
+            status['erro'] = resposta.text[:500]
+        return status
+
+    def enviar(self, destinatarios: list, conteudo: str) -> list:
+        """
+        Envia 'conteudo' para cada destinatário ({n_inscr, nome, telefone}).
+        Retorna uma lista de status, na mesma ordem dos destinatários.
+        """
+        if not destinatarios:
+            return []
+        with ThreadPoolExecutor(max_workers=self.concorrencia) as pool:
+            return list(pool.map(lambda d: self._enviar_um(d, conteudo), destinatarios))
+
+    def fechar(self) -> None:
+        self.sessao.close()
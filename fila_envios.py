@@ -0,0 +1,244 @@
+"""
+
+Fila de saída (outbox) das mensagens: enfileiramento em lote, reserva concorrente e registro do resultado
+
+"""
+
+from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy import select, insert, update, func, bindparam, or_
+from database import Database, TabelaEnvios, TabelaUsuario
+
+# Canais de envio: trecho de 'opcao_contato' que indica o aceite e coluna do usuário usada como destino
+CANAIS = {
+    'whatsapp': {'contato': 'WhatsApp', 'coluna': 'telefone'},
+    'email': {'contato': 'e-mail', 'coluna': 'email'},
+}
+
+STATUS = ['pendente', 'processando', 'enviado', 'falhou']
+
+
+class FilaEnvios:
+    """
+    Opera a tabela 'envios_mensagens'.
+
+    - enfileirar: chamado por Mensageria.criar_mensagem, na mesma transação da mensagem.
+    - reservar / concluir: chamados pelo trabalhador. A reserva marca as linhas como
+      'processando' com um prazo; se o trabalhador cair, elas voltam a ser reservadas
+      depois que o prazo vence.
+    """
+
+    def __init__(self, db: Database, tentativas_maximas: int = 5, prazo_reserva: int = 300):
+        """
+        :param db: Instância de Database para operar o CRUD.
+        :param tentativas_maximas: tentativas antes de marcar o envio como 'falhou'.
+        :param prazo_reserva: segundos que uma linha reservada fica com o trabalhador.
+        """
+        self.db = db
+        self.tentativas_maximas = tentativas_maximas
+        self.prazo_reserva = prazo_reserva
+
+    def enfileirar(self, mensagens: list) -> int:
+        """
+        Cria as linhas da fila para as mensagens informadas (dicionários com id_mensagem,
+        grupo, cota, posicao_min e posicao_max). Os destinatários de todas as mensagens
+        vêm de uma única consulta e entram na fila com um único INSERT em lote.
+        Retorna a quantidade de envios enfileirados.
+        """
+        if not mensagens:
+            return 0
+
+        posicao_min = min(m['posicao_min'] for m in mensagens)
+        posicao_max = max(m['posicao_max'] for m in mensagens)
+        usuarios = self.db.lerTabela(
+            TabelaUsuario,
+            colunas=['n_inscr', 'grupo', 'cota', 'posicao', 'opcao_contato'] + sorted({c['coluna'] for c in CANAIS.values()}),
+            condicoes=[
+                TabelaUsuario.grupo.in_({m['grupo'] for m in mensagens}),
+                TabelaUsuario.cota.in_({m['cota'] for m in mensagens}),
+                TabelaUsuario.posicao.between(posicao_min, posicao_max),
+                or_(*[TabelaUsuario.opcao_contato.like(f"%{c['contato']}%") for c in CANAIS.values()])
+            ]
+        )
+        if usuarios.empty:
+            return 0
+
+        agora = datetime.now()
+        linhas = []
+        for mensagem in mensagens:
+            publico = usuarios[
+                (usuarios['grupo'] == mensagem['grupo']) &
+                (usuarios['cota'] == mensagem['cota']) &
+                usuarios['posicao'].between(mensagem['posicao_min'], mensagem['posicao_max'])
+            ]
+            for canal, configuracao in CANAIS.items():
+                aceitaram = publico[
+                    publico['opcao_contato'].str.contains(configuracao['contato'], na=False) &
+                    publico[configuracao['coluna']].fillna('').astype(str).str.strip().ne('')
+                ]
+                linhas.extend(
+                    {'id_mensagem': mensagem['id_mensagem'], 'n_inscr': n_inscr, 'canal': canal,
+                     'destino': destino, 'status': 'pendente', 'tentativas': 0,
+                     'proxima_tentativa': agora, 'data_atualizacao': agora}
+                    for n_inscr, destino in zip(aceitaram['n_inscr'], aceitaram[configuracao['coluna']])
+                )
+
+        if linhas:
+            with self.db._sessao() as session:
+                session.execute(insert(TabelaEnvios), linhas)
+        return len(linhas)
+
+    def reservar(self, tamanho_lote: int = 50, canais: list = None) -> list:
+        """
+        Reserva até 'tamanho_lote' envios prontos (pendentes, ou reservados com prazo vencido),
+        apenas dos 'canais' informados (padrão: todos).
+
+        No PostgreSQL a subconsulta usa FOR UPDATE SKIP LOCKED, então vários trabalhadores
+        pegam lotes diferentes sem esperar uns pelos outros. No SQLite o próprio UPDATE é
+        atômico (o banco inteiro fica travado para escrita durante o comando).
+        """
+        agora = datetime.now()
+        prontos = (
+            select(TabelaEnvios.id_envio)
+            .where(
+                TabelaEnvios.proxima_tentativa <= agora,
+                or_(TabelaEnvios.status == 'pendente', TabelaEnvios.status == 'processando')
+            )
+            .order_by(TabelaEnvios.proxima_tentativa)
+            .limit(tamanho_lote)
+        )
+        if canais is not None:
+            prontos = prontos.where(TabelaEnvios.canal.in_(canais))
+        if self.db.engine.dialect.name == 'postgresql':
+            prontos = prontos.with_for_update(skip_locked=True)
+
+        comando = (
+            update(TabelaEnvios)
+            .where(TabelaEnvios.id_envio.in_(prontos.scalar_subquery()))
+            .values(
+                status='processando',
+                tentativas=TabelaEnvios.tentativas + 1,
+                proxima_tentativa=agora + timedelta(seconds=self.prazo_reserva),
+                data_atualizacao=agora
+            )
+            .returning(TabelaEnvios.id_envio, TabelaEnvios.id_mensagem, TabelaEnvios.n_inscr,
+                       TabelaEnvios.canal, TabelaEnvios.destino, TabelaEnvios.tentativas)
+        )
+        with self.db._sessao() as session:
+            return [dict(linha._mapping) for linha in session.execute(comando)]
+
+    def concluir(self, resultados: list) -> None:
+        """
+        Registra o resultado dos envios reservados: dicionários com id_envio, tentativas,
+        sucesso, erro e, opcionalmente, definitivo. Falhas voltam para 'pendente' com espera
+        exponencial até 'tentativas_maximas' (ou imediatamente, se 'definitivo'); depois
+        disso ficam como 'falhou'.
+
+        Só é gravada a linha que ainda está na reserva feita por este trabalhador ('processando'
+        com as mesmas 'tentativas'): se o prazo venceu e outro trabalhador a reservou de novo,
+        o resultado atrasado é descartado em vez de sobrescrever o dele.
+        """
+        if not resultados:
+            return
+
+        agora = datetime.now()
+        registros = []
+        for resultado in resultados:
+            if resultado['sucesso']:
+                status, proxima = 'enviado', agora
+            elif resultado.get('definitivo') or resultado['tentativas'] >= self.tentativas_maximas:
+                status, proxima = 'falhou', agora
+            else:
+                status, proxima = 'pendente', agora + timedelta(seconds=30 * 2 ** (resultado['tentativas'] - 1))
+            registros.append({
+                'b_id_envio': resultado['id_envio'],
+                'b_tentativas': resultado['tentativas'],
+                'b_status': status,
+                'b_proxima_tentativa': proxima,
+                'b_ultimo_erro': None if resultado['sucesso'] else resultado.get('erro'),
+                'b_data_atualizacao': agora
+            })
+
+        with self.db._sessao() as session:
+            session.connection().execute(
+                update(TabelaEnvios)
+                .where(
+                    TabelaEnvios.id_envio == bindparam('b_id_envio'),
+                    TabelaEnvios.status == 'processando',
+                    TabelaEnvios.tentativas == bindparam('b_tentativas')
+                )
+                .values(
+                    status=bindparam('b_status'),
+                    proxima_tentativa=bindparam('b_proxima_tentativa'),
+                    ultimo_erro=bindparam('b_ultimo_erro'),
+                    data_atualizacao=bindparam('b_data_atualizacao')
+                ),
+                registros
+            )
+
+    def cancelar(self, ids_mensagem: list) -> int:
+        """ Remove da fila todos os envios das mensagens informadas (usado ao excluí-las) """
+        return self.db.deletarOnde(TabelaEnvios, [TabelaEnvios.id_mensagem.in_(ids_mensagem)])
+
+    def progresso(self, ids_mensagem: list = None) -> pd.DataFrame:
+        """
+        Contagem de envios por mensagem e status (um único GROUP BY).
+        Retorna um DataFrame indexado por id_mensagem, com uma coluna por status.
+        """
+        consulta = (
+            select(TabelaEnvios.id_mensagem, TabelaEnvios.status, func.count())
+            .group_by(TabelaEnvios.id_mensagem, TabelaEnvios.status)
+        )
+        if ids_mensagem is not None:
+            consulta = consulta.where(TabelaEnvios.id_mensagem.in_(ids_mensagem))
+
+        with self.db._sessao() as session:
+            linhas = session.execute(consulta).all()
+
+        contagens = pd.DataFrame(linhas, columns=['id_mensagem', 'status', 'quantidade'])
+        if contagens.empty:
+            return pd.DataFrame(columns=STATUS, dtype='int64')
+        return (
+            contagens.pivot_table(index='id_mensagem', columns='status', values='quantidade', aggfunc='sum', fill_value=0)
+            .reindex(columns=STATUS, fill_value=0)
+        )
+
+
+def processar_lote(fila: FilaEnvios, canais: dict, buscar_mensagens, tamanho_lote: int = 50) -> int:
+    """
+    Um ciclo do trabalhador: reserva um lote, envia agrupando por (mensagem, canal)
+    e registra os resultados. Retorna a quantidade de envios processados.
+
+    - canais: {canal: função(destinatarios, mensagem) -> lista de status com 'sucesso' e 'erro'};
+      só são reservados envios desses canais.
+    - buscar_mensagens: função(ids) -> {id_mensagem: dicionário da mensagem}
+    """
+    reservados = fila.reservar(tamanho_lote, list(canais))
+    if not reservados:
+        return 0
+
+    lote = pd.DataFrame(reservados)
+    mensagens = buscar_mensagens(lote['id_mensagem'].unique().tolist())
+
+    resultados = []
+    for (id_mensagem, canal), envios in lote.groupby(['id_mensagem', 'canal']):
+        mensagem = mensagens.get(id_mensagem)
+        if mensagem is None:
+            resultados.extend(
+                {'id_envio': e.id_envio, 'tentativas': e.tentativas, 'sucesso': False,
+                 'erro': 'Mensagem excluída', 'definitivo': True}
+                for e in envios.itertuples()
+            )
+            continue
+
+        destinatarios = [
+            {'n_inscr': e.n_inscr, CANAIS[canal]['coluna']: e.destino} for e in envios.itertuples()
+        ]
+        status = canais[canal](destinatarios, mensagem)
+        resultados.extend(
+            {'id_envio': e.id_envio, 'tentativas': e.tentativas, 'sucesso': s['sucesso'], 'erro': s.get('erro')}
+            for e, s in zip(envios.itertuples(), status)
+        )
+
+    fila.concluir(resultados)
+    return len(resultados)
@@ -27,8 +27,8 @@ class Grupo:
 
     def verQuantidade(self) -> dict:
         
-        usuarios = self.db.retornarTabela(TabelaUsuario)
-        qtde_usuarios = len(usuarios[usuarios['grupo']==self.grupo])
+        usuarios = self.db.lerTabela(TabelaUsuario, colunas=['n_inscr'], filtros={'grupo': self.grupo})
+        qtde_usuarios = len(usuarios)
         return {
                 'função': 'verQuantidade', 
                 'data': datetime.now(), 
@@ -0,0 +1,156 @@
+"""
+
+Classe para importar atualizações da lista oficial de aprovados de forma incremental
+
+"""
+
+import time
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import select, insert, update, delete, bindparam
+from classificacao import Classificacao
+from database import Database, TabelaAprovados, TabelaUsuario, COLUNAS_APROVADOS, ler_aprovados_em_lotes, incrementar_versoes, particoes_de
+
+# Colunas que, se mudarem, caracterizam uma atualização do candidato
+COLUNAS_CONTEUDO = ['posicao', 'nome', 'grupo', 'cota']
+
+
+class ImportadorAprovados:
+    """
+    Compara uma nova versão da lista de aprovados com a tabela 'lista_aprovados'
+    e aplica somente as diferenças (inserções, atualizações e exclusões).
+    """
+
+    def __init__(self, db: Database):
+        """
+        :param db: Instância de Database para operar o CRUD.
+        """
+        self.db = db
+
+    def importar(self, arquivo_csv, simular: bool = False, confirmar_remocoes: bool = False) -> dict:
+        """
+        Importa o CSV (caminho ou arquivo enviado) aplicando apenas as diferenças
+        em relação ao banco, numa única transação.
+
+        Se 'simular' for True, apenas calcula o relatório de mudanças.
+        Candidatos fora da nova lista que já têm conta em 'usuarios' só são removidos com
+        'confirmar_remocoes'; sem ela ficam na tabela e aparecem em 'remocoes_bloqueadas'.
+        """
+        inicio = time.perf_counter()
+
+        novos = pd.concat(list(ler_aprovados_em_lotes(arquivo_csv, tamanho_lote=5000)), ignore_index=True)
+        novos = novos.drop_duplicates(subset='n_inscr')
+
+        with self.db.engine.begin() as conexao:
+            atuais = pd.DataFrame(
+                conexao.execute(select(*[TabelaAprovados.__table__.c[c] for c in COLUNAS_APROVADOS])).all(),
+                columns=COLUNAS_APROVADOS
+            )
+
+            mudancas = self._comparar(atuais, novos)
+
+            # Remover o candidato deixaria a conta sem grupo/cota/posição: exige confirmação
+            com_conta = conexao.execute(
+                select(TabelaUsuario.n_inscr)
+                .where(TabelaUsuario.n_inscr.in_(mudancas['remover']['n_inscr'].tolist()))
+            ).scalars().all()
+            bloqueados = [] if confirmar_remocoes else com_conta
+            mudancas['remover'] = mudancas['remover'][~mudancas['remover']['n_inscr'].isin(bloqueados)]
+
+            if not simular:
+                self._aplicar(conexao, mudancas, atuais)
+
+        if not simular:
+            self.db.invalidarCache(TabelaAprovados)
+
+            # Posições/cotas mudaram: os totais acumulados precisam ser recalculados
+            if any(len(df) for df in mudancas.values()):
+                Classificacao(self.db).reconstruir()
+
+        return {
+            'função': 'importar',
+            'data': datetime.now(),
+            'sucesso': True,
+            'resultado': {
+                'simulacao': simular,
+                'inseridos': mudancas['inserir']['n_inscr'].tolist(),
+                'atualizados': mudancas['atualizar']['n_inscr'].tolist(),
+                'removidos': mudancas['remover']['n_inscr'].tolist(),
+                'remocoes_com_conta': list(com_conta),
+                'remocoes_bloqueadas': list(bloqueados),
+                'inalterados': len(novos) - len(mudancas['inserir']) - len(mudancas['atualizar']),
+                'tempo_segundos': round(time.perf_counter() - inicio, 3)
+            }
+        }
+
+    @staticmethod
+    def _hash_linhas(df: pd.DataFrame) -> pd.Series:
+        """ Calcula um hash por linha a partir das colunas de conteúdo """
+        if df.empty:
+            return pd.Series([], dtype='uint64')
+        normalizado = df[COLUNAS_CONTEUDO].astype(str)
+        return pd.util.hash_pandas_object(normalizado, index=False)
+
+    def _comparar(self, atuais: pd.DataFrame, novos: pd.DataFrame) -> dict:
+        """ Separa as linhas do CSV em inserções, atualizações e exclusões """
+        atuais = atuais.assign(hash_linha=self._hash_linhas(atuais).values)
+        novos = novos.assign(hash_linha=self._hash_linhas(novos).values)
+
+        comparacao = novos.merge(
+            atuais[['n_inscr', 'hash_linha']],
+            on='n_inscr',
+            how='outer',
+            suffixes=('', '_atual'),
+            indicator=True
+        )
+
+        inserir = comparacao[comparacao['_merge'] == 'left_only']
+        remover = comparacao[comparacao['_merge'] == 'right_only']
+        atualizar = comparacao[
+            (comparacao['_merge'] == 'both') &
+            (comparacao['hash_linha'] != comparacao['hash_linha_atual'])
+        ]
+
+        # O merge externo transforma 'posicao' em float; volta para inteiro
+        return {
+            'inserir': inserir[COLUNAS_APROVADOS].astype({'posicao': int}),
+            'atualizar': atualizar[COLUNAS_APROVADOS].astype({'posicao': int}),
+            'remover': remover[['n_inscr']]
+        }
+
+    def _aplicar(self, conexao, mudancas: dict, atuais: pd.DataFrame) -> None:
+        """ Aplica as diferenças com comandos em lote """
+        if not any(len(df) for df in mudancas.values()):
+            return
+
+        # Só as partições grupo/cota tocadas têm a versão (e o cache) invalidada
+        tocados = atuais[atuais['n_inscr'].isin(
+            pd.concat([mudancas['atualizar']['n_inscr'], mudancas['remover']['n_inscr']])
+        )]
+        particoes = particoes_de(
+            tocados.to_dict('records') +
+            mudancas['inserir'].to_dict('records') +
+            mudancas['atualizar'].to_dict('records')
+        )
+        incrementar_versoes(conexao, TabelaAprovados, particoes)
+
+        if not mudancas['inserir'].empty:
+            conexao.execute(insert(TabelaAprovados), mudancas['inserir'].to_dict('records'))
+
+        if not mudancas['atualizar'].empty:
+            registros = [
+                {'b_n_inscr': r['n_inscr'], **{f'b_{c}': r[c] for c in COLUNAS_CONTEUDO}}
+                for r in mudancas['atualizar'].to_dict('records')
+            ]
+            conexao.execute(
+                update(TabelaAprovados)
+                .where(TabelaAprovados.n_inscr == bindparam('b_n_inscr'))
+                .values({c: bindparam(f'b_{c}') for c in COLUNAS_CONTEUDO}),
+                registros
+            )
+
+        if not mudancas['remover'].empty:
+            conexao.execute(
+                delete(TabelaAprovados)
+                .where(TabelaAprovados.n_inscr.in_(mudancas['remover']['n_inscr'].tolist()))
+            )
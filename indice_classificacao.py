@@ -0,0 +1,170 @@
+"""
+
+Índice em memória (NumPy) da classificação, para quem não pode manter a tabela 'classificacao' no banco
+
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+from database import Database, TabelaAprovados, TabelaUsuario
+from classificacao import COLUNAS_OPCAO
+
+OPCOES = list(COLUNAS_OPCAO)
+
+
+class _Particao:
+    """ Arrays de um par grupo/cota: posições dos aprovados e dos usuários, e contagens acumuladas """
+
+    def __init__(self, posicoes_aprovados: np.ndarray, posicoes_usuarios: np.ndarray, codigos_opcao: np.ndarray):
+        ordem = np.argsort(posicoes_usuarios, kind='stable')
+        self.aprovados = np.sort(posicoes_aprovados)
+        self.usuarios = posicoes_usuarios[ordem]
+        self.codigos = codigos_opcao[ordem]
+        self._acumular()
+
+    def _acumular(self) -> None:
+        # acumulado[i, k] = quantos dos i primeiros usuários têm a opção k
+        indicadores = np.zeros((len(self.codigos), len(OPCOES)), dtype=np.int64)
+        validos = self.codigos >= 0
+        indicadores[np.nonzero(validos)[0], self.codigos[validos]] = 1
+        self.acumulado = np.vstack([np.zeros((1, len(OPCOES)), dtype=np.int64), np.cumsum(indicadores, axis=0)])
+
+
+class IndiceClassificacao:
+    """
+    Responde "quantos aprovados / cadastrados por opção estão à frente da posição p"
+    com duas buscas binárias (searchsorted), em vez de máscaras sobre o DataFrame inteiro.
+
+    Aceita ajustes incrementais quando um usuário muda de opção, se cadastra ou é excluído.
+    """
+
+    def __init__(self, aprovados: pd.DataFrame, usuarios: pd.DataFrame,
+                 versao_aprovados: int = 0, versao_usuarios: int = 0):
+        self.versao_aprovados = versao_aprovados
+        self.versao_usuarios = versao_usuarios
+        self._lock = threading.Lock()
+        self._particoes = {}
+
+        codigos = usuarios['opcao'].map({opcao: i for i, opcao in enumerate(OPCOES)}).fillna(-1).astype(np.int64)
+        usuarios = usuarios.assign(codigo=codigos.to_numpy())
+        grupos_usuarios = dict(list(usuarios.groupby(['grupo', 'cota'])))
+
+        for chave, particao in aprovados.groupby(['grupo', 'cota']):
+            inscritos = grupos_usuarios.get(chave, usuarios.iloc[0:0])
+            self._particoes[chave] = _Particao(
+                particao['posicao'].to_numpy(dtype=np.int64),
+                inscritos['posicao'].to_numpy(dtype=np.int64),
+                inscritos['codigo'].to_numpy(dtype=np.int64)
+            )
+
+    @classmethod
+    def construir(cls, db: Database) -> 'IndiceClassificacao':
+        """ Monta o índice a partir do banco (duas leituras projetadas) """
+        return cls(
+            db.lerTabela(TabelaAprovados, colunas=['grupo', 'cota', 'posicao']),
+            db.lerTabela(TabelaUsuario, colunas=['grupo', 'cota', 'posicao', 'opcao']),
+            versao_aprovados=db.versaoTabela(TabelaAprovados),
+            versao_usuarios=db.versaoTabela(TabelaUsuario)
+        )
+
+    def particao(self, grupo: str, cota: str) -> _Particao:
+        return self._particoes.get((grupo, cota))
+
+    def na_frente(self, grupo: str, cota: str, posicao: int) -> dict:
+        """ Mesmo formato de Classificacao.consultar (sem as colunas de chave) """
+        particao = self._particoes.get((grupo, cota))
+        if particao is None:
+            return {'aprovados_frente': 0, 'cadastrados_frente': 0,
+                    **{coluna: 0 for coluna in COLUNAS_OPCAO.values()}}
+
+        i = int(np.searchsorted(particao.usuarios, posicao, side='left'))
+        contagens = particao.acumulado[i]
+        return {
+            'aprovados_frente': int(np.searchsorted(particao.aprovados, posicao, side='left')),
+            'cadastrados_frente': i,
+            **{coluna: int(contagens[k]) for k, coluna in enumerate(COLUNAS_OPCAO.values())}
+        }
+
+    def mudar_opcao(self, grupo: str, cota: str, posicao: int, opcao_nova: str) -> None:
+        """ Ajusta só as linhas acumuladas a partir do usuário alterado """
+        with self._lock:
+            particao = self._particoes.get((grupo, cota))
+            if particao is None:
+                return
+            i = int(np.searchsorted(particao.usuarios, posicao, side='left'))
+            if i >= len(particao.usuarios) or particao.usuarios[i] != posicao:
+                return
+
+            antigo, novo = particao.codigos[i], OPCOES.index(opcao_nova)
+            if antigo == novo:
+                return
+            particao.codigos[i] = novo
+            if antigo >= 0:
+                particao.acumulado[i + 1:, antigo] -= 1
+            particao.acumulado[i + 1:, novo] += 1
+
+    def registrar_usuario(self, grupo: str, cota: str, posicao: int, opcao: str) -> None:
+        with self._lock:
+            particao = self._particoes.get((grupo, cota))
+            if particao is None:
+                return
+            i = int(np.searchsorted(particao.usuarios, posicao, side='left'))
+            particao.usuarios = np.insert(particao.usuarios, i, posicao)
+            particao.codigos = np.insert(particao.codigos, i, OPCOES.index(opcao))
+            particao._acumular()
+
+    def remover_usuario(self, grupo: str, cota: str, posicao: int) -> None:
+        with self._lock:
+            particao = self._particoes.get((grupo, cota))
+            if particao is None:
+                return
+            i = int(np.searchsorted(particao.usuarios, posicao, side='left'))
+            if i < len(particao.usuarios) and particao.usuarios[i] == posicao:
+                particao.usuarios = np.delete(particao.usuarios, i)
+                particao.codigos = np.delete(particao.codigos, i)
+                particao._acumular()
+
+
+# Um índice por banco, compartilhado por todas as sessões do processo
+_indices = {}
+_lock_indices = threading.Lock()
+
+
+def obter_indice(db: Database) -> IndiceClassificacao:
+    """
+    Retorna o índice do processo, reconstruindo-o se o banco mudou por fora
+    (outro processo, importação da lista etc.). A checagem custa duas buscas por chave.
+    """
+    versao_aprovados = db.versaoTabela(TabelaAprovados)
+    versao_usuarios = db.versaoTabela(TabelaUsuario)
+
+    with _lock_indices:
+        indice = _indices.get(db.db_url)
+        if (indice is None or indice.versao_aprovados != versao_aprovados
+                or indice.versao_usuarios != versao_usuarios):
+            indice = IndiceClassificacao.construir(db)
+            _indices[db.db_url] = indice
+    return indice
+
+
+def aplicar_mudanca_opcao(db: Database, grupo: str, cota: str, posicao: int, opcao_nova: str) -> None:
+    """
+    Ajusta o índice já montado após uma mudança de opção feita por este processo.
+    Se a única escrita desde a montagem foi a nossa (versão +1), basta o ajuste incremental;
+    caso contrário o índice será reconstruído na próxima leitura.
+
+    O ajuste só é aplicado depois do commit: num rollback, a versão do banco volta atrás
+    e um índice marcado com a versão desfeita nunca mais seria reconstruído.
+    """
+    # Lida dentro da transação: já inclui a nossa escrita
+    versao_usuarios = db.versaoTabela(TabelaUsuario)
+
+    def aplicar():
+        with _lock_indices:
+            indice = _indices.get(db.db_url)
+            if indice is not None and versao_usuarios == indice.versao_usuarios + 1:
+                indice.mudar_opcao(grupo, cota, posicao, opcao_nova)
+                indice.versao_usuarios = versao_usuarios
+
+    db.aposCommit(aplicar)
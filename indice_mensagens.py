@@ -0,0 +1,103 @@
+"""
+
+Índice em memória das mensagens: árvore de intervalos por grupo/cota (faixa de posições -> mensagens)
+
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sqlalchemy import select
+from database import Database, TabelaMensagens, TabelaPublicoMensagens
+
+
+class ArvoreIntervalos:
+    """
+    Árvore de intervalos centrada e estática: responde "quais intervalos contêm p"
+    em O(log n + k), onde k é a quantidade de intervalos encontrados.
+
+    Cada nó guarda um centro e os intervalos que o contêm, ordenados pelo início
+    (para consultas à esquerda do centro) e pelo fim (para consultas à direita).
+    """
+
+    def __init__(self, inicios: np.ndarray, fins: np.ndarray):
+        inicios = np.asarray(inicios, dtype=np.int64)
+        fins = np.asarray(fins, dtype=np.int64)
+        self._raiz = self._construir(np.arange(len(inicios)), inicios, fins)
+
+    def _construir(self, indices: np.ndarray, inicios: np.ndarray, fins: np.ndarray):
+        if len(indices) == 0:
+            return None
+
+        # Centro: mediana dos pontos extremos, o que mantém a árvore balanceada
+        centro = int(np.median(np.concatenate([inicios[indices], fins[indices]])))
+        a_esquerda = fins[indices] < centro
+        a_direita = inicios[indices] > centro
+        no_centro = indices[~a_esquerda & ~a_direita]
+
+        por_inicio = no_centro[np.argsort(inicios[no_centro], kind='stable')]
+        por_fim = no_centro[np.argsort(-fins[no_centro], kind='stable')]
+        return (
+            centro,
+            inicios[por_inicio], por_inicio,
+            -fins[por_fim], por_fim,  # fins negativos: ordem crescente para o searchsorted
+            self._construir(indices[a_esquerda], inicios, fins),
+            self._construir(indices[a_direita], inicios, fins),
+        )
+
+    def consultar(self, posicao: int) -> np.ndarray:
+        """ Índices (na ordem de construção) dos intervalos [inicio, fim] que contêm 'posicao' """
+        encontrados = []
+        no = self._raiz
+        while no is not None:
+            centro, inicios, por_inicio, fins_negativos, por_fim, esquerda, direita = no
+            if posicao < centro:
+                # Todos os intervalos do nó terminam em 'centro' ou depois: basta o início <= posicao
+                encontrados.append(por_inicio[:np.searchsorted(inicios, posicao, side='right')])
+                no = esquerda
+            elif posicao > centro:
+                # Todos começam em 'centro' ou antes: basta o fim >= posicao
+                encontrados.append(por_fim[:np.searchsorted(fins_negativos, -posicao, side='right')])
+                no = direita
+            else:
+                encontrados.append(por_inicio)
+                break
+
+        if not encontrados:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(encontrados)
+
+
+class IndiceMensagens:
+    """ Mensagens de um grupo/cota, com a árvore de intervalos das faixas de posição """
+
+    def __init__(self, mensagens: pd.DataFrame):
+        self.mensagens = mensagens.reset_index(drop=True)
+        self.arvore = ArvoreIntervalos(self.mensagens['posicao_min'], self.mensagens['posicao_max'])
+
+    def caixa_de_entrada(self, posicao: int, limite: int = None, deslocamento: int = 0) -> pd.DataFrame:
+        """ Mensagens que cobrem 'posicao', das mais novas para as mais antigas """
+        resultado = self.mensagens.iloc[self.arvore.consultar(posicao)]
+        resultado = resultado.sort_values(['data_criacao', 'id_mensagem'], ascending=False)
+        return resultado.iloc[deslocamento:deslocamento + limite] if limite else resultado.iloc[deslocamento:]
+
+
+def obter_indice_mensagens(db: Database, grupo: str, cota: str) -> IndiceMensagens:
+    """ Índice do grupo/cota, remontado apenas quando a partição muda de versão """
+    return _indice_mensagens(db, grupo, cota, db.versaoTabela(TabelaPublicoMensagens, f"{grupo}|{cota}"))
+
+
+# cache_resource: o índice é só leitura e compartilhado entre as sessões
+@st.cache_resource(max_entries=64)
+def _indice_mensagens(_db: Database, grupo: str, cota: str, versao: int) -> IndiceMensagens:
+    colunas = ['id_mensagem', 'titulo', 'conteudo', 'data_criacao', 'posicao_min', 'posicao_max']
+    with _db._sessao() as session:
+        linhas = session.execute(
+            select(
+                TabelaMensagens.id_mensagem, TabelaMensagens.titulo, TabelaMensagens.conteudo,
+                TabelaMensagens.data_criacao, TabelaPublicoMensagens.posicao_min, TabelaPublicoMensagens.posicao_max
+            )
+            .join(TabelaPublicoMensagens, TabelaPublicoMensagens.id_mensagem == TabelaMensagens.id_mensagem)
+            .where(TabelaPublicoMensagens.grupo == grupo, TabelaPublicoMensagens.cota == cota)
+        ).all()
+    return IndiceMensagens(pd.DataFrame(linhas, columns=colunas))
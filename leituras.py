@@ -0,0 +1,151 @@
+"""
+
+Classe para controlar quais mensagens cada usuário já leu (e quantas faltam ler)
+
+"""
+
+from sqlalchemy import select, update, or_, and_, func
+from database import Database, inserir_se_nao_existir, TabelaLeituras, TabelaPublicoMensagens, TabelaMensagens, TabelaUsuario
+
+
+class LeituraMensagens:
+    """
+    Mantém a tabela 'mensagens_lidas' com uma linha compacta por usuário
+    (marca d'água + exceções), em vez de uma linha por par usuário x mensagem.
+
+    O contador 'nao_lidas' é incrementado por um único UPDATE quando uma mensagem
+    é criada e decrementado quando o usuário lê; assim o aviso da barra lateral
+    custa uma busca pela chave primária.
+    """
+
+    def __init__(self, db: Database):
+        """
+        :param db: Instância de Database para operar o CRUD.
+        """
+        self.db = db
+
+    @staticmethod
+    def _ids(texto: str) -> set:
+        return {int(valor) for valor in texto.split(',') if valor}
+
+    @staticmethod
+    def _texto(ids: set) -> str:
+        return ','.join(str(valor) for valor in sorted(ids))
+
+    def _ids_na_caixa(self, session, usuario, acima_de: int) -> list:
+        """ Ids das mensagens destinadas ao usuário com id > acima_de (índice do público) """
+        return list(session.execute(
+            select(TabelaPublicoMensagens.id_mensagem)
+            .where(
+                TabelaPublicoMensagens.grupo == usuario.grupo,
+                TabelaPublicoMensagens.cota == usuario.cota,
+                TabelaPublicoMensagens.posicao_min <= usuario.posicao,
+                TabelaPublicoMensagens.posicao_max >= usuario.posicao,
+                TabelaPublicoMensagens.id_mensagem > acima_de
+            )
+        ).scalars())
+
+    def _estado(self, session, usuario, travar: bool = False) -> TabelaLeituras:
+        """
+        Linha do usuário, criada (ou com o contador recalculado) quando necessário.
+        travar=True: SELECT ... FOR UPDATE, para quem vai ler e regravar o contador e as exceções.
+        """
+        if travar:
+            estado = session.get(TabelaLeituras, usuario.n_inscr, with_for_update=True, populate_existing=True)
+        else:
+            estado = session.get(TabelaLeituras, usuario.n_inscr)
+
+        if estado is None:
+            # Duas abas (ou reruns) do mesmo usuário podem chegar aqui juntas: só uma insere
+            inserir_se_nao_existir(session, TabelaLeituras, {
+                'n_inscr': usuario.n_inscr, 'ultima_lida': 0, 'lidas_acima': '', 'nao_lidas': None
+            })
+            estado = session.get(
+                TabelaLeituras, usuario.n_inscr, with_for_update=travar or None, populate_existing=True
+            )
+
+        if estado.nao_lidas is None:
+            pendentes = set(self._ids_na_caixa(session, usuario, estado.ultima_lida))
+            estado.nao_lidas = len(pendentes - self._ids(estado.lidas_acima))
+            session.flush()
+        return estado
+
+    def nao_lidas(self, usuario) -> int:
+        """ Quantidade de mensagens não lidas (uma busca pela chave primária) """
+        with self.db._sessao() as session:
+            return self._estado(session, usuario).nao_lidas
+
+    def ids_nao_lidos(self, usuario) -> set:
+        """ Ids das mensagens do usuário ainda não lidas """
+        with self.db._sessao() as session:
+            estado = self._estado(session, usuario)
+            if estado.nao_lidas == 0:
+                return set()
+            return set(self._ids_na_caixa(session, usuario, estado.ultima_lida)) - self._ids(estado.lidas_acima)
+
+    def marcar_lidas(self, usuario, ids_mensagem: list) -> None:
+        """
+        Marca mensagens como lidas; quando não sobra nenhuma, a marca d'água avança e as exceções somem.
+        A linha fica travada até o commit: uma nova mensagem (registrar_mensagem) ou outra aba
+        marcando ao mesmo tempo não têm o seu incremento/decremento perdido.
+        """
+        with self.db._sessao() as session:
+            estado = self._estado(session, usuario, travar=True)
+            lidas = self._ids(estado.lidas_acima)
+            novas = {int(i) for i in ids_mensagem if int(i) > estado.ultima_lida} - lidas
+            if not novas:
+                return
+
+            lidas |= novas
+            estado.nao_lidas = max(0, estado.nao_lidas - len(novas))
+            if estado.nao_lidas == 0:
+                estado.ultima_lida = max(lidas)
+                lidas = set()
+            estado.lidas_acima = self._texto(lidas)
+
+    def marcar_todas_lidas(self, usuario) -> None:
+        with self.db._sessao() as session:
+            estado = self._estado(session, usuario, travar=True)
+            ultima = session.execute(select(func.max(TabelaMensagens.id_mensagem))).scalar() or 0
+            estado.ultima_lida = max(estado.ultima_lida, ultima)
+            estado.lidas_acima = ''
+            estado.nao_lidas = 0
+
+    def _filtro_publico(self, publico: list):
+        """ Usuários alcançados por um conjunto de linhas de público """
+        return or_(*[
+            and_(
+                TabelaUsuario.grupo == linha['grupo'],
+                TabelaUsuario.cota == linha['cota'],
+                TabelaUsuario.posicao.between(linha['posicao_min'], linha['posicao_max'])
+            )
+            for linha in publico
+        ])
+
+    def registrar_mensagem(self, publico: list) -> None:
+        """ Nova mensagem: +1 no contador de quem está no público (um único UPDATE) """
+        if not publico:
+            return
+        with self.db._sessao() as session:
+            session.execute(
+                update(TabelaLeituras)
+                .where(
+                    TabelaLeituras.nao_lidas.is_not(None),
+                    TabelaLeituras.n_inscr.in_(select(TabelaUsuario.n_inscr).where(self._filtro_publico(publico)))
+                )
+                .values(nao_lidas=TabelaLeituras.nao_lidas + 1)
+            )
+
+    def invalidar_publico(self, publico: list) -> None:
+        """
+        Mensagem excluída: não se sabe, sem olhar as exceções, quem já a tinha lido;
+        o contador do público é zerado para NULL e recalculado no próximo acesso.
+        """
+        if not publico:
+            return
+        with self.db._sessao() as session:
+            session.execute(
+                update(TabelaLeituras)
+                .where(TabelaLeituras.n_inscr.in_(select(TabelaUsuario.n_inscr).where(self._filtro_publico(publico))))
+                .values(nao_lidas=None)
+            )
@@ -6,15 +6,17 @@ Classe de Mensageria, responsável por fazer a gestão das mensagens para os usu
 
 # mensageria.py
 
-from database import TabelaMensagens, TabelaUsuario
+import pandas as pd
 from datetime import datetime
-import requests
-import streamlit as st
+from sqlalchemy import select, exists, or_, and_
+from database import TabelaMensagens, TabelaPublicoMensagens
+from fila_envios import FilaEnvios
+from leituras import LeituraMensagens
 
 class Mensageria:
     """
     Responsável por criar, excluir e gerenciar o envio das mensagens 
-    (incluso disparar via WhatsApp).
+    (incluso enfileirar os envios via WhatsApp e e-mail).
     """
 
     def __init__(self, db):
@@ -32,84 +34,207 @@ class Mensageria:
                        posicao_max: int, 
                        autor: str):
         """
-        Cria uma ou várias mensagens no banco, baseando-se em 
-        múltiplos grupos e cotas. 
-        Em seguida, envia via WhatsApp para cada usuário que se encaixe no critério.
+        Cria a mensagem (conteúdo gravado uma única vez) e o seu público, uma linha
+        para cada combinação grupo/cota, tudo numa única transação.
+        Os envios para cada usuário que se encaixe no critério entram na fila de saída
+        (mesma transação) e são feitos pelo trabalhador de envios, fora da página.
+        Retorna a quantidade de envios enfileirados.
         """
-        # 1) Inserir no banco (uma mensagem para cada combinação grupo/cota)
-        for grupo in grupos:
-            for cota in cotas:
-                nova_msg = {
+        with self.db.unidadeDeTrabalho('criar_mensagem'):
+            # 1) Conteúdo
+            mensagem = self.db.inserirDados(TabelaMensagens, {
+                "titulo": titulo,
+                "conteudo": conteudo,
+                "autor": autor
+            })
+
+            # 2) Público (um INSERT em lote)
+            publico = [
+                {
+                    "id_mensagem": mensagem.id_mensagem,
                     "grupo": grupo,
                     "cota": cota,
                     "posicao_min": posicao_min,
-                    "posicao_max": posicao_max,
-                    "titulo": titulo,
-                    "conteudo": conteudo,
-                    "autor": autor
+                    "posicao_max": posicao_max
                 }
-                self.db.inserirDados(TabelaMensagens, nova_msg)
+                for grupo in grupos
+                for cota in cotas
+            ]
+            self.db.inserirDadosEmLote(TabelaPublicoMensagens, publico)
+            LeituraMensagens(self.db).registrar_mensagem(publico)
 
-        # 2) Após criar, chamamos a lógica de envio via WhatsApp
-        # self._enviar_para_whatsapp(grupos, cotas, posicao_min, posicao_max, conteudo)
+            # 3) Envios (um INSERT em lote para todos os destinatários)
+            return FilaEnvios(self.db).enfileirar(publico)
 
 
     def listar_mensagens(self):
         """
-        Retorna todas as mensagens existentes (DataFrame).
+        Retorna todas as mensagens existentes (DataFrame), uma linha por mensagem,
+        com o público resumido nas colunas grupos, cotas, posicao_min e posicao_max.
         """
         mensagens = self.db.retornarTabela(TabelaMensagens)
-        
+        publico = self.db.lerTabela(
+            TabelaPublicoMensagens, colunas=['id_mensagem', 'grupo', 'cota', 'posicao_min', 'posicao_max']
+        )
+
+        resumo = publico.groupby('id_mensagem').agg(
+            grupos=('grupo', lambda valores: sorted(set(valores))),
+            cotas=('cota', lambda valores: sorted(set(valores))),
+            posicao_min=('posicao_min', 'min'),
+            posicao_max=('posicao_max', 'max')
+        )
+        mensagens = mensagens.merge(resumo, left_on='id_mensagem', right_index=True, how='left')
+
         if not mensagens.empty:
             return mensagens.sort_values("data_criacao", ascending=False)
         
         return mensagens
 
 
+    def caixa_de_entrada(self, grupo: str, cota: str, posicao: int, limite: int = 20, deslocamento: int = 0):
+        """
+        Retorna as 'limite' mensagens mais recentes destinadas a quem está em
+        grupo/cota/posicao (DataFrame com id_mensagem, titulo, conteudo e data_criacao),
+        pulando as 'deslocamento' primeiras (paginação do histórico).
+
+        O filtro de faixa (posicao_min <= posicao <= posicao_max) é feito no SQL, sobre o
+        índice de 'mensagens_publico'; com db.mensagens_em_memoria, usa a árvore de
+        intervalos do grupo/cota.
+        """
+        if self.db.mensagens_em_memoria:
+            from indice_mensagens import obter_indice_mensagens
+            mensagens = obter_indice_mensagens(self.db, grupo, cota).caixa_de_entrada(posicao, limite, deslocamento)
+            return mensagens[['id_mensagem', 'titulo', 'conteudo', 'data_criacao']]
+
+        colunas = ['id_mensagem', 'titulo', 'conteudo', 'data_criacao']
+        consulta = (
+            select(*[TabelaMensagens.__table__.c[c] for c in colunas])
+            .join(TabelaPublicoMensagens, TabelaPublicoMensagens.id_mensagem == TabelaMensagens.id_mensagem)
+            .where(
+                TabelaPublicoMensagens.grupo == grupo,
+                TabelaPublicoMensagens.cota == cota,
+                TabelaPublicoMensagens.posicao_min <= posicao,
+                TabelaPublicoMensagens.posicao_max >= posicao
+            )
+            .order_by(TabelaMensagens.data_criacao.desc(), TabelaMensagens.id_mensagem.desc())
+            .limit(limite)
+            .offset(deslocamento)
+        )
+        with self.db._sessao() as session:
+            return pd.DataFrame(session.execute(consulta).all(), columns=colunas)
+
+
+    def buscar_mensagens(self, ids_mensagem: list):
+        """ Mensagens pelos ids (DataFrame com id_mensagem, titulo, conteudo e data_criacao), das mais novas para as mais antigas """
+        colunas = ['id_mensagem', 'titulo', 'conteudo', 'data_criacao']
+        mensagens = self.db.lerTabela(TabelaMensagens, colunas=colunas,
+                                      condicoes=[TabelaMensagens.id_mensagem.in_(list(ids_mensagem))])
+        return mensagens.sort_values(['data_criacao', 'id_mensagem'], ascending=False)
+
+
+    def listar_pagina(self,
+                      por_pagina: int = 20,
+                      cursor: tuple = None,
+                      autor: str = None,
+                      grupo: str = None,
+                      data_inicio: datetime = None,
+                      data_fim: datetime = None) -> dict:
+        """
+        Uma página da lista de mensagens, das mais novas para as mais antigas, com
+        paginação por chave (keyset) em (data_criacao, id_mensagem): a página seguinte
+        começa logo depois do 'cursor' da anterior, sem OFFSET.
+
+        Filtros opcionais: autor (trecho do nome), grupo do público e intervalo de datas.
+        Retorna {'mensagens': DataFrame (com o público resumido), 'proximo_cursor': tupla ou None}.
+        """
+        colunas = ['id_mensagem', 'titulo', 'conteudo', 'data_criacao', 'autor']
+        consulta = select(*[TabelaMensagens.__table__.c[c] for c in colunas])
+
+        if autor:
+            consulta = consulta.where(TabelaMensagens.autor.ilike(f"%{autor}%"))
+        if grupo:
+            consulta = consulta.where(exists().where(
+                TabelaPublicoMensagens.id_mensagem == TabelaMensagens.id_mensagem,
+                TabelaPublicoMensagens.grupo == grupo
+            ))
+        if data_inicio:
+            consulta = consulta.where(TabelaMensagens.data_criacao >= data_inicio)
+        if data_fim:
+            consulta = consulta.where(TabelaMensagens.data_criacao < data_fim)
+        if cursor:
+            data_cursor, id_cursor = cursor
+            consulta = consulta.where(or_(
+                TabelaMensagens.data_criacao < data_cursor,
+                and_(TabelaMensagens.data_criacao == data_cursor, TabelaMensagens.id_mensagem < id_cursor)
+            ))
+
+        consulta = (
+            consulta
+            .order_by(TabelaMensagens.data_criacao.desc(), TabelaMensagens.id_mensagem.desc())
+            .limit(por_pagina + 1)  # uma a mais para saber se existe próxima página
+        )
+        with self.db._sessao() as session:
+            mensagens = pd.DataFrame(session.execute(consulta).all(), columns=colunas)
+
+        proximo_cursor = None
+        if len(mensagens) > por_pagina:
+            mensagens = mensagens.head(por_pagina)
+            ultima = mensagens.iloc[-1]
+            proximo_cursor = (ultima['data_criacao'].to_pydatetime(), int(ultima['id_mensagem']))
+
+        if mensagens.empty:
+            # Sem linhas, o merge abaixo compararia chaves de tipos diferentes (object x float)
+            mensagens = mensagens.reindex(columns=colunas + ['grupos', 'cotas', 'posicao_min', 'posicao_max'])
+            return {'mensagens': mensagens, 'proximo_cursor': None}
+
+        # Público só das mensagens da página
+        publico = self.db.lerTabela(
+            TabelaPublicoMensagens,
+            colunas=['id_mensagem', 'grupo', 'cota', 'posicao_min', 'posicao_max'],
+            condicoes=[TabelaPublicoMensagens.id_mensagem.in_(mensagens['id_mensagem'].tolist())]
+        )
+        resumo = publico.groupby('id_mensagem').agg(
+            grupos=('grupo', lambda valores: sorted(set(valores))),
+            cotas=('cota', lambda valores: sorted(set(valores))),
+            posicao_min=('posicao_min', 'min'),
+            posicao_max=('posicao_max', 'max')
+        )
+        mensagens = mensagens.merge(resumo, left_on='id_mensagem', right_index=True, how='left')
+
+        return {'mensagens': mensagens, 'proximo_cursor': proximo_cursor}
+
+
+    def deletar_mensagens(self, ids_mensagem: list) -> int:
+        """
+        Exclui várias mensagens de uma vez (com o público e os envios), numa única
+        transação e com um único DELETE por tabela. Retorna quantas mensagens foram excluídas.
+        """
+        ids_mensagem = [int(i) for i in ids_mensagem]
+        if not ids_mensagem:
+            return 0
+
+        with self.db.unidadeDeTrabalho('deletar_mensagens'):
+            publico = self.db.lerTabela(
+                TabelaPublicoMensagens,
+                colunas=['grupo', 'cota', 'posicao_min', 'posicao_max'],
+                condicoes=[TabelaPublicoMensagens.id_mensagem.in_(ids_mensagem)]
+            )
+            LeituraMensagens(self.db).invalidar_publico(publico.to_dict('records'))
+            FilaEnvios(self.db).cancelar(ids_mensagem)
+            self.db.deletarOnde(TabelaPublicoMensagens, [TabelaPublicoMensagens.id_mensagem.in_(ids_mensagem)])
+            return self.db.deletarOnde(TabelaMensagens, [TabelaMensagens.id_mensagem.in_(ids_mensagem)])
+
+
     def deletar_mensagem(self, id_mensagem: int) -> bool:
         """
-        Exclui do banco a mensagem cujo ID for fornecido.
+        Exclui do banco a mensagem cujo ID for fornecido (com o seu público e os seus envios).
         Retorna True se conseguiu deletar, False caso não encontre.
         """
-        with self.db.get_session() as session:
-            msg_obj = session.query(TabelaMensagens).filter_by(id_mensagem=id_mensagem).first()
-            if msg_obj:
-                session.delete(msg_obj)
-                session.commit()
-                return True
-            return False
-
-    def _enviar_para_whatsapp(self, grupos: list, cotas: list, posicao_min: int, posicao_max: int, conteudo: str):
-        """
-        Localiza os usuários que se encaixam nos filtros e dispara a API de WhatsApp
-        (ou gera links para envio). Ajuste conforme sua integração real.
-        """
-
-        # 1) Buscar usuários relevantes
-        with self.db.get_session() as session:
-            matched_users = (
-                session.query(TabelaUsuario)
-                .filter(TabelaUsuario.grupo.in_(grupos))
-                .filter(TabelaUsuario.cota.in_(cotas))
-                .filter(TabelaUsuario.posicao >= posicao_min)
-                .filter(TabelaUsuario.posicao <= posicao_max)
-                .all()
-            )
+        return self.deletar_mensagens([id_mensagem]) > 0
 
-        TWILIO_SID = st.secrets["TWILIO_SID"]
-        TWILIO_TOKEN = st.secrets["TWILIO_TOKEN"]
-        url_api = f"https://api.twilio.com/2010-04-01/Accounts/{TWILIO_SID}/Messages.json"
-
-        for u in matched_users:
-            telefone_limpo = ...
-            if telefone_limpo:
-                data = {
-                    "From": "whatsapp:+14155238886",  # Exemplo de número do sandbox
-                    "Body": conteudo,
-                    "To": f"whatsapp:+55{telefone_limpo}"
-                }
-                resp = requests.post(url_api, data=data, auth=(TWILIO_SID, TWILIO_TOKEN))
-                if resp.status_code == 201:
-                    print(f"Mensagem enviada para {u.nome}")
-                else:
-                    print(f"Falha ao enviar p/ {u.nome}: {resp.text}")
\ No newline at end of file
+    def progresso_envios(self, ids_mensagem: list = None):
+        """
+        Retorna, por mensagem, quantos envios estão pendentes, em processamento,
+        enviados e com falha (DataFrame indexado por id_mensagem).
+        """
+        return FilaEnvios(self.db).progresso(ids_mensagem)
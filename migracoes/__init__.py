@@ -0,0 +1,84 @@
+"""
+
+Motor simples de migrações versionadas do esquema do banco.
+
+Cada migração é um módulo deste pacote chamado 'vNNN_descricao.py', com:
+    - VERSAO: inteiro, ordem de aplicação
+    - DESCRICAO: texto curto
+    - comandos(conexao) -> list: comandos (strings SQL ou objetos DDL) que a migração executa
+
+A tabela 'schema_version' guarda as versões já aplicadas, o que torna a aplicação idempotente.
+
+"""
+
+import re
+import importlib
+import pkgutil
+from datetime import datetime
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, select, insert, text, inspect
+
+_metadata = MetaData()
+
+tabela_versao = Table(
+    'schema_version',
+    _metadata,
+    Column('versao', Integer, primary_key=True),
+    Column('descricao', String(255), nullable=False),
+    Column('aplicada_em', DateTime, nullable=False, default=datetime.now),
+)
+
+
+def listar_migracoes() -> list:
+    """ Retorna os módulos de migração do pacote, em ordem de versão """
+    modulos = []
+    for info in pkgutil.iter_modules(__path__):
+        if re.match(r'v\d{3}_', info.name):
+            modulos.append(importlib.import_module(f'{__name__}.{info.name}'))
+    return sorted(modulos, key=lambda modulo: modulo.VERSAO)
+
+
+def versoes_aplicadas(conexao, criar_tabela: bool = True) -> set:
+    """ Versões já aplicadas. Com criar_tabela=False (simulação), nada é escrito: sem a tabela, nenhuma. """
+    if not criar_tabela:
+        if not inspect(conexao).has_table(tabela_versao.name):
+            return set()
+    else:
+        tabela_versao.create(conexao, checkfirst=True)
+    return set(conexao.execute(select(tabela_versao.c.versao)).scalars())
+
+
+def aplicar_migracoes(engine, simular: bool = False) -> list:
+    """
+    Aplica, em ordem, as migrações ainda não registradas em 'schema_version'.
+    Cada migração roda na sua própria transação, junto com o seu registro.
+
+    Se 'simular' for True, nada é executado; apenas retorna o que seria feito.
+    Retorna uma lista com {versao, descricao, comandos} de cada migração pendente.
+    """
+    relatorio = []
+    for migracao in listar_migracoes():
+        with engine.begin() as conexao:
+            if migracao.VERSAO in versoes_aplicadas(conexao, criar_tabela=not simular):
+                continue
+
+            comandos = migracao.comandos(conexao)
+            relatorio.append({
+                'versao': migracao.VERSAO,
+                'descricao': migracao.DESCRICAO,
+                'comandos': [str(_compilar(comando, conexao)).strip() for comando in comandos]
+            })
+            if simular:
+                continue
+
+            for comando in comandos:
+                conexao.execute(text(comando) if isinstance(comando, str) else comando)
+            conexao.execute(insert(tabela_versao).values(
+                versao=migracao.VERSAO, descricao=migracao.DESCRICAO, aplicada_em=datetime.now()
+            ))
+    return relatorio
+
+
+def _compilar(comando, conexao):
+    if isinstance(comando, str):
+        return comando
+    return comando.compile(dialect=conexao.dialect)
@@ -0,0 +1,73 @@
+"""
+
+Verificação, via EXPLAIN, de que as consultas mais frequentes usam os índices compostos.
+
+"""
+
+from sqlalchemy import text
+
+# (descrição, consulta, parâmetros, índice esperado)
+CONSULTAS_FREQUENTES = [
+    (
+        'Usuários na frente (retornarListaUsuariosNaFrente)',
+        "SELECT n_inscr, opcao FROM usuarios WHERE grupo = :grupo AND cota = :cota AND posicao < :posicao",
+        {'grupo': 'Gestão', 'cota': 'AC', 'posicao': 100},
+        'ix_usuarios_grupo_cota_posicao',
+    ),
+    (
+        'Destinatários de mensagem (FilaEnvios.enfileirar)',
+        "SELECT n_inscr, telefone, email FROM usuarios WHERE grupo IN (:grupo) AND cota IN (:cota) "
+        "AND posicao >= :posicao_min AND posicao <= :posicao_max",
+        {'grupo': 'Gestão', 'cota': 'AC', 'posicao_min': 1, 'posicao_max': 100},
+        'ix_usuarios_grupo_cota_posicao',
+    ),
+    (
+        'Aprovados na frente',
+        "SELECT n_inscr FROM lista_aprovados WHERE grupo = :grupo AND cota = :cota AND posicao < :posicao",
+        {'grupo': 'Gestão', 'cota': 'AC', 'posicao': 100},
+        'ix_lista_aprovados_grupo_cota_posicao',
+    ),
+    (
+        'Caixa de entrada (Mensageria.caixa_de_entrada)',
+        "SELECT m.id_mensagem, m.titulo, m.conteudo, m.data_criacao "
+        "FROM mensagens_publico p JOIN mensagens m ON m.id_mensagem = p.id_mensagem "
+        "WHERE p.grupo = :grupo AND p.cota = :cota AND p.posicao_min <= :posicao AND p.posicao_max >= :posicao "
+        "ORDER BY m.data_criacao DESC, m.id_mensagem DESC LIMIT :limite",
+        {'grupo': 'Gestão', 'cota': 'AC', 'posicao': 100, 'limite': 20},
+        'ix_mensagens_publico_grupo_cota_posicoes',
+    ),
+    (
+        'Lista de mensagens por chave (Mensageria.listar_pagina)',
+        "SELECT id_mensagem, titulo, data_criacao FROM mensagens "
+        "WHERE data_criacao < :data OR (data_criacao = :data AND id_mensagem < :id_mensagem) "
+        "ORDER BY data_criacao DESC, id_mensagem DESC LIMIT :limite",
+        {'data': '2100-01-01 00:00:00', 'id_mensagem': 0, 'limite': 21},
+        'ix_mensagens_data_criacao_id',
+    ),
+]
+
+
+def verificar_indices(engine) -> list:
+    """
+    Executa EXPLAIN para cada consulta frequente e informa se o plano usa o índice esperado.
+
+    No PostgreSQL, tabelas pequenas costumam ser lidas sequencialmente mesmo com índice;
+    por isso a verificação desliga 'enable_seqscan' dentro da própria transação.
+    """
+    resultados = []
+    with engine.begin() as conexao:
+        dialeto = conexao.dialect.name
+        if dialeto == 'postgresql':
+            conexao.execute(text("SET LOCAL enable_seqscan = off"))
+        prefixo = 'EXPLAIN QUERY PLAN' if dialeto == 'sqlite' else 'EXPLAIN'
+
+        for descricao, consulta, parametros, indice in CONSULTAS_FREQUENTES:
+            linhas = conexao.execute(text(f"{prefixo} {consulta}"), parametros).all()
+            plano = '\n'.join(' '.join(str(valor) for valor in linha) for linha in linhas)
+            resultados.append({
+                'consulta': descricao,
+                'indice': indice,
+                'usa_indice': indice in plano,
+                'plano': plano
+            })
+    return resultados
@@ -0,0 +1,29 @@
+"""
+
+Índices compostos para os filtros mais usados:
+    - usuarios e lista_aprovados: (grupo, cota, posicao)
+    - mensagens: (grupo, cota, posicao_min, posicao_max)
+
+"""
+
+from sqlalchemy import inspect
+
+VERSAO = 1
+DESCRICAO = 'Índices compostos em usuarios, lista_aprovados e mensagens'
+
+
+def comandos(conexao) -> list:
+    lista = [
+        "CREATE INDEX IF NOT EXISTS ix_usuarios_grupo_cota_posicao "
+        "ON usuarios (grupo, cota, posicao)",
+        "CREATE INDEX IF NOT EXISTS ix_lista_aprovados_grupo_cota_posicao "
+        "ON lista_aprovados (grupo, cota, posicao)",
+    ]
+
+    # Bancos novos já nascem com o público em 'mensagens_publico' (ver v002)
+    if 'grupo' in {coluna['name'] for coluna in inspect(conexao).get_columns('mensagens')}:
+        lista.append(
+            "CREATE INDEX IF NOT EXISTS ix_mensagens_grupo_cota_posicoes "
+            "ON mensagens (grupo, cota, posicao_min, posicao_max)"
+        )
+    return lista
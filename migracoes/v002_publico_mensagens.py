@@ -0,0 +1,29 @@
+"""
+
+Separa o conteúdo das mensagens do seu público:
+    - copia (grupo, cota, posicao_min, posicao_max) de cada mensagem para 'mensagens_publico'
+    - remove o índice de v001 e essas colunas de 'mensagens'
+
+A tabela 'mensagens_publico' (e o seu índice) é criada antes, pelo create_all do Database.
+Em bancos criados já com o esquema novo, não há nada a fazer.
+
+"""
+
+from sqlalchemy import inspect
+
+VERSAO = 2
+DESCRICAO = 'Público das mensagens em tabela própria (mensagens_publico)'
+
+COLUNAS_PUBLICO = ['grupo', 'cota', 'posicao_min', 'posicao_max']
+
+
+def comandos(conexao) -> list:
+    colunas = {coluna['name'] for coluna in inspect(conexao).get_columns('mensagens')}
+    if 'grupo' not in colunas:
+        return []
+
+    return [
+        "INSERT INTO mensagens_publico (id_mensagem, grupo, cota, posicao_min, posicao_max) "
+        "SELECT id_mensagem, grupo, cota, posicao_min, posicao_max FROM mensagens",
+        "DROP INDEX IF EXISTS ix_mensagens_grupo_cota_posicoes",
+    ] + [f"ALTER TABLE mensagens DROP COLUMN {coluna}" for coluna in COLUNAS_PUBLICO]
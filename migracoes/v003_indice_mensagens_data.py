@@ -0,0 +1,16 @@
+"""
+
+Índice (data_criacao, id_mensagem) em mensagens, para a paginação por chave (keyset)
+da lista de mensagens dos coordenadores.
+
+"""
+
+VERSAO = 3
+DESCRICAO = 'Índice (data_criacao, id_mensagem) em mensagens'
+
+
+def comandos(conexao) -> list:
+    return [
+        "CREATE INDEX IF NOT EXISTS ix_mensagens_data_criacao_id "
+        "ON mensagens (data_criacao, id_mensagem)",
+    ]
@@ -0,0 +1,41 @@
+"""
+
+Recria 'mensagens' no SQLite com AUTOINCREMENT, para que os ids nunca sejam reaproveitados:
+sem ele, uma nova mensagem pode receber o id da última excluída e ficar abaixo da marca
+d'água de leitura ('mensagens_lidas.ultima_lida'), nunca aparecendo como não lida.
+
+A sequência começa acima do maior id já usado (mensagens existentes e marcas d'água),
+cobrindo ids excluídos antes desta migração. No PostgreSQL as sequências já não voltam atrás.
+
+"""
+
+VERSAO = 4
+DESCRICAO = 'Ids de mensagens nunca reaproveitados (AUTOINCREMENT no SQLite)'
+
+
+def comandos(conexao) -> list:
+    if conexao.dialect.name != 'sqlite':
+        return []
+
+    ddl = conexao.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'mensagens'").scalar()
+    if 'AUTOINCREMENT' in (ddl or '').upper():
+        return []
+
+    return [
+        "CREATE TABLE mensagens_nova ("
+        "id_mensagem INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "titulo VARCHAR(255) NOT NULL, "
+        "conteudo TEXT NOT NULL, "
+        "data_criacao DATETIME, "
+        "autor VARCHAR(100) NOT NULL)",
+        "INSERT INTO mensagens_nova (id_mensagem, titulo, conteudo, data_criacao, autor) "
+        "SELECT id_mensagem, titulo, conteudo, data_criacao, autor FROM mensagens",
+        "DROP TABLE mensagens",
+        "ALTER TABLE mensagens_nova RENAME TO mensagens",
+        "CREATE INDEX IF NOT EXISTS ix_mensagens_data_criacao_id ON mensagens (data_criacao, id_mensagem)",
+        "DELETE FROM sqlite_sequence WHERE name = 'mensagens'",
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'mensagens', MAX("
+        "(SELECT COALESCE(MAX(id_mensagem), 0) FROM mensagens), "
+        "(SELECT COALESCE(MAX(ultima_lida), 0) FROM mensagens_lidas), "
+        "(SELECT COALESCE(MAX(id_mensagem), 0) FROM mensagens_publico))",
+    ]
@@ -0,0 +1,201 @@
+"""
+
+Sessões de login no servidor: tokens assinados (HMAC) e armazéns plugáveis (memória, SQLite, Redis)
+
+"""
+
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+import streamlit as st
+
+
+class ArmazemMemoria:
+    """ Armazém no próprio processo (LRU + TTL). Serve para um único processo do Streamlit. """
+
+    def __init__(self, tamanho_maximo: int = 10000):
+        self.tamanho_maximo = tamanho_maximo
+        self._sessoes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, id_sessao: str):
+        with self._lock:
+            entrada = self._sessoes.get(id_sessao)
+            if entrada is None:
+                return None
+            expira_em, dados = entrada
+            if expira_em < time.time():
+                del self._sessoes[id_sessao]
+                return None
+            self._sessoes.move_to_end(id_sessao)
+            return dict(dados)
+
+    def guardar(self, id_sessao: str, dados: dict, ttl: float) -> None:
+        with self._lock:
+            self._sessoes[id_sessao] = (time.time() + ttl, dict(dados))
+            self._sessoes.move_to_end(id_sessao)
+            while len(self._sessoes) > self.tamanho_maximo:
+                self._sessoes.popitem(last=False)
+
+    def remover(self, id_sessao: str) -> None:
+        with self._lock:
+            self._sessoes.pop(id_sessao, None)
+
+
+class ArmazemSQLite:
+    """ Armazém num arquivo SQLite local, compartilhado pelos processos da mesma máquina """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        with self._conectar() as conexao:
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS sessoes "
+                "(id_sessao TEXT PRIMARY KEY, dados TEXT NOT NULL, expira_em REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _conectar(self):
+        # 'with conexao' só confirma ou desfaz a transação; closing fecha a conexão (e o arquivo)
+        with closing(sqlite3.connect(self.caminho, timeout=5)) as conexao:
+            with conexao:
+                yield conexao
+
+    def obter(self, id_sessao: str):
+        with self._conectar() as conexao:
+            linha = conexao.execute(
+                "SELECT dados FROM sessoes WHERE id_sessao = ? AND expira_em >= ?", (id_sessao, time.time())
+            ).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def guardar(self, id_sessao: str, dados: dict, ttl: float) -> None:
+        with self._conectar() as conexao:
+            # Aproveita a escrita para descartar as sessões vencidas
+            conexao.execute("DELETE FROM sessoes WHERE expira_em < ?", (time.time(),))
+            conexao.execute(
+                "INSERT OR REPLACE INTO sessoes (id_sessao, dados, expira_em) VALUES (?, ?, ?)",
+                (id_sessao, json.dumps(dados), time.time() + ttl)
+            )
+
+    def remover(self, id_sessao: str) -> None:
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM sessoes WHERE id_sessao = ?", (id_sessao,))
+
+
+class ArmazemRedis:
+    """
+    Armazém num servidor compatível com Redis, compartilhado por todos os processos/máquinas.
+    Aceita um cliente já criado (ex.: um substituto local nos testes) ou uma URL.
+    """
+
+    def __init__(self, url: str = None, cliente=None, prefixo: str = 'sessao:'):
+        if cliente is None:
+            import redis  # dependência opcional, só para este armazém
+            cliente = redis.Redis.from_url(url)
+        self.cliente = cliente
+        self.prefixo = prefixo
+
+    def obter(self, id_sessao: str):
+        valor = self.cliente.get(self.prefixo + id_sessao)
+        return json.loads(valor) if valor else None
+
+    def guardar(self, id_sessao: str, dados: dict, ttl: float) -> None:
+        self.cliente.set(self.prefixo + id_sessao, json.dumps(dados), ex=int(ttl))
+
+    def remover(self, id_sessao: str) -> None:
+        self.cliente.delete(self.prefixo + id_sessao)
+
+
+class GerenciadorSessoes:
+    """
+    Emite e valida tokens de sessão no formato '<id>.<assinatura>'.
+
+    A assinatura (HMAC-SHA256 do id com a chave secreta) é conferida antes de
+    qualquer acesso ao armazém, então tokens forjados não custam nem uma busca.
+
+    O token vai num cookie (ver cookie_sessao), nunca na URL; o TTL padrão é curto (2 h),
+    já que só serve para retomar o login após uma reconexão, e "Sair" remove a sessão do armazém.
+    """
+
+    def __init__(self, armazem, chave_secreta: bytes, ttl: float = 2 * 3600):
+        self.armazem = armazem
+        self.chave_secreta = chave_secreta
+        self.ttl = ttl
+
+    def _assinar(self, id_sessao: str) -> str:
+        digest = hmac.new(self.chave_secreta, id_sessao.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+    def criar(self, dados: dict) -> str:
+        """ Guarda 'dados' (serializáveis em JSON) e devolve o token assinado """
+        id_sessao = secrets.token_urlsafe(24)
+        self.armazem.guardar(id_sessao, dados, self.ttl)
+        return f"{id_sessao}.{self._assinar(id_sessao)}"
+
+    def _id_valido(self, token: str):
+        id_sessao, _, assinatura = (token or '').partition('.')
+        # Compara bytes: com str, compare_digest levanta TypeError para caracteres não ASCII
+        if not id_sessao or not hmac.compare_digest(assinatura.encode(), self._assinar(id_sessao).encode()):
+            return None
+        return id_sessao
+
+    def validar(self, token: str):
+        """ Dados da sessão, ou None se o token for inválido ou a sessão tiver expirado """
+        id_sessao = self._id_valido(token)
+        if id_sessao is None:
+            return None
+        return self.armazem.obter(id_sessao)
+
+    def encerrar(self, token: str) -> None:
+        id_sessao = self._id_valido(token)
+        if id_sessao is not None:
+            self.armazem.remover(id_sessao)
+
+
+# Cookie do navegador que leva o token de sessão
+COOKIE_SESSAO = 'sessao'
+
+
+def cookie_sessao(token: str = None, ttl: float = 0) -> str:
+    """
+    Trecho de JavaScript que grava (ou, sem token, apaga) o cookie da sessão, para st.html.
+    O Streamlit lê cookies (st.context.cookies, na conexão) mas não tem API para gravá-los.
+    Fora da URL, o token não vai para o histórico, links copiados, Referer ou logs de acesso.
+    """
+    valor = f"{COOKIE_SESSAO}={token or ''}; Max-Age={int(ttl) if token else 0}; Path=/; SameSite=Strict"
+    return f"<script>document.cookie = '{valor}' + (location.protocol === 'https:' ? '; Secure' : '');</script>"
+
+
+def criar_armazem(configuracao: str):
+    """
+    Armazém a partir de SESSOES_ARMAZEM:
+    'memoria' (padrão), 'sqlite:///caminho/arquivo.db' ou 'redis://host:porta/0'.
+    """
+    if not configuracao or configuracao == 'memoria':
+        return ArmazemMemoria()
+    if configuracao.startswith('sqlite:///'):
+        return ArmazemSQLite(configuracao[len('sqlite:///'):])
+    if configuracao.startswith(('redis://', 'rediss://')):
+        return ArmazemRedis(url=configuracao)
+    raise ValueError(f"SESSOES_ARMAZEM inválido: {configuracao}")
+
+
+@st.cache_resource
+def gerenciador_sessoes() -> GerenciadorSessoes:
+    """
+    Gerenciador único por processo. SESSOES_CHAVE (nos secrets) deve ser a mesma em todos os
+    processos; sem ela, a chave é aleatória e os tokens valem só neste processo.
+    """
+    chave = st.secrets.get("SESSOES_CHAVE")
+    return GerenciadorSessoes(
+        criar_armazem(st.secrets.get("SESSOES_ARMAZEM", "memoria")),
+        chave.encode() if chave else secrets.token_bytes(32),
+        ttl=float(st.secrets.get("SESSOES_TTL", 2 * 3600))
+    )
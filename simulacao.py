@@ -0,0 +1,138 @@
+"""
+
+Simulação de Monte Carlo da probabilidade de cada candidato ser chamado
+
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import streamlit as st
+from database import Database, TabelaAprovados, TabelaUsuario, TabelaGrupos
+
+# Probabilidade de cada candidato assumir a vaga, conforme a opção informada
+PROBABILIDADES_PADRAO = {
+    'Vai assumir': 0.95,
+    'Indeciso': 0.6,
+    'Não vai assumir': 0.05,
+    'Não cadastrado': 0.7,
+}
+
+
+def simular_particao(probabilidades: np.ndarray, qtde_vagas: int, simulacoes: int = 5000,
+                     semente: int = None, tamanho_bloco: int = 1000) -> np.ndarray:
+    """
+    Simula uma fila de candidatos (já ordenada por posição) disputando 'qtde_vagas'.
+
+    Em cada simulação, cada candidato assume ou não com a sua probabilidade; as vagas são
+    preenchidas na ordem da fila e quem não assume não ocupa vaga. O candidato é chamado se,
+    quando chega a vez dele, ainda há vaga (menos de 'qtde_vagas' aceitaram antes).
+
+    Retorna, para cada candidato, a fração das simulações em que ele foi chamado.
+    """
+    rng = np.random.default_rng(semente)
+    quantidade = len(probabilidades)
+    chamados = np.zeros(quantidade, dtype=np.int64)
+
+    # Processa as simulações em blocos para limitar a memória (blocos x candidatos)
+    restantes = simulacoes
+    while restantes > 0:
+        bloco = min(tamanho_bloco, restantes)
+        aceitou = rng.random((bloco, quantidade)) < probabilidades
+        aceitos_antes = np.cumsum(aceitou, axis=1) - aceitou
+        chamados += (aceitos_antes < qtde_vagas).sum(axis=0)
+        restantes -= bloco
+
+    return chamados / simulacoes
+
+
+def _simular_tarefa(tarefa: tuple) -> tuple:
+    chave, n_inscr, probabilidades, qtde_vagas, simulacoes, semente = tarefa
+    return chave, n_inscr, simular_particao(probabilidades, qtde_vagas, simulacoes, semente)
+
+
+def simular_nomeacoes(aprovados: pd.DataFrame, usuarios: pd.DataFrame, grupos: pd.DataFrame,
+                      probabilidades: dict = None, simulacoes: int = 5000,
+                      semente: int = 0, trabalhadores: int = None) -> pd.DataFrame:
+    """
+    Roda a simulação para todos os grupos/cotas, um por thread do pool.
+
+    Threads, e não processos: o NumPy solta o GIL nos sorteios e nas somas acumuladas, então
+    as partições rodam em paralelo; e processos 'spawn'/'forkserver' reexecutariam o script
+    do app (o Streamlit troca o __main__ por ele), enquanto fork no servidor multithread não é seguro.
+
+    - aprovados: colunas n_inscr, grupo, cota, posicao
+    - usuarios: colunas n_inscr, opcao (candidatos sem cadastro usam 'Não cadastrado')
+    - grupos: colunas grupo, cota, qtde_vagas
+    Retorna n_inscr, grupo, cota, posicao e probabilidade_chamada.
+    """
+    probabilidades = {**PROBABILIDADES_PADRAO, **(probabilidades or {})}
+    vagas = {
+        (linha.grupo, str(linha.cota).lower()): int(linha.qtde_vagas)
+        for linha in grupos.itertuples(index=False)
+    }
+
+    fila = aprovados.merge(usuarios[['n_inscr', 'opcao']], on='n_inscr', how='left')
+    fila['opcao'] = fila['opcao'].fillna('Não cadastrado')
+    fila['probabilidade'] = fila['opcao'].map(probabilidades).fillna(probabilidades['Não cadastrado'])
+
+    tarefas = []
+    for i, ((grupo, cota), particao) in enumerate(fila.groupby(['grupo', 'cota'])):
+        particao = particao.sort_values('posicao')
+        tarefas.append((
+            (grupo, cota),
+            particao['n_inscr'].to_numpy(),
+            particao['probabilidade'].to_numpy(dtype=float),
+            vagas.get((grupo, str(cota).lower()), 0),
+            simulacoes,
+            semente + i
+        ))
+
+    trabalhadores = trabalhadores or min(len(tarefas), os.cpu_count() or 1)
+    if trabalhadores > 1:
+        with ThreadPoolExecutor(max_workers=trabalhadores) as pool:
+            resultados = list(pool.map(_simular_tarefa, tarefas))
+    else:
+        resultados = [_simular_tarefa(tarefa) for tarefa in tarefas]
+
+    probabilidade_por_inscricao = {
+        n: p for _, inscricoes, chances in resultados for n, p in zip(inscricoes, chances)
+    }
+    resultado = fila[['n_inscr', 'grupo', 'cota', 'posicao']].copy()
+    resultado['probabilidade_chamada'] = resultado['n_inscr'].map(probabilidade_por_inscricao)
+    return resultado
+
+
+def probabilidades_atuais(db: Database, simulacoes: int = 5000) -> pd.DataFrame:
+    """
+    Probabilidades de todos os candidatos, recalculadas apenas quando aprovados ou grupos
+    mudam de versão, ou quando muda a opção de algum usuário (inclusão, exclusão ou
+    troca de opção; e-mail, telefone e senha não afetam a simulação).
+    """
+    versoes = (
+        db.versaoTabela(TabelaAprovados),
+        db.versaoTabela(TabelaUsuario, 'coluna:opcao'),
+        db.versaoTabela(TabelaGrupos),
+    )
+    return _probabilidades(db, versoes, simulacoes)
+
+
+# cache_resource: o resultado é só leitura, então é compartilhado sem cópia entre as sessões
+@st.cache_resource(max_entries=2)
+def _probabilidades(_db: Database, versoes: tuple, simulacoes: int) -> pd.DataFrame:
+    resultado = simular_nomeacoes(
+        _db.lerTabela(TabelaAprovados, colunas=['n_inscr', 'grupo', 'cota', 'posicao']),
+        _db.lerTabela(TabelaUsuario, colunas=['n_inscr', 'opcao']),
+        _db.lerTabela(TabelaGrupos, colunas=['grupo', 'cota', 'qtde_vagas']),
+        simulacoes=simulacoes
+    )
+    return resultado.set_index('n_inscr', drop=False)
+
+
+def probabilidade_do_candidato(db: Database, n_inscr: str):
+    """ Probabilidade pré-calculada de um candidato, ou None se ele não estiver na lista """
+    tabela = probabilidades_atuais(db)
+    if n_inscr not in tabela.index:
+        return None
+    return float(tabela.at[n_inscr, 'probabilidade_chamada'])
@@ -0,0 +1,97 @@
+"""
+
+Snapshot imutável da lista de aprovados em arquivo Arrow, mapeado em memória (mmap)
+e compartilhado, só para leitura, entre as sessões e os processos do Streamlit
+
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import tempfile
+import pyarrow as pa
+import streamlit as st
+from database import Database, TabelaAprovados
+from utils import _configuracao
+
+
+class SnapshotAprovados:
+    """
+    Tabela Arrow lida de um arquivo IPC via mmap: os buffers são as páginas do arquivo,
+    então todas as sessões (e todos os processos da máquina) enxergam a mesma memória.
+
+    As linhas estão ordenadas por grupo, cota e posição, e os intervalos de cada
+    grupo e de cada grupo/cota ficam nos metadados do arquivo: uma fatia é só
+    um deslocamento sobre os mesmos buffers (sem cópia).
+    """
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        with pa.memory_map(caminho, 'r') as arquivo:
+            self.tabela = pa.ipc.open_file(arquivo).read_all()
+        self._intervalos = json.loads(self.tabela.schema.metadata[b'intervalos'])
+
+    def fatia(self, grupo: str, cota: str = None) -> pa.Table:
+        """ Aprovados do grupo (ou do grupo/cota), ordenados por posição, sem copiar dados """
+        chave = grupo if cota is None else f"{grupo}|{cota}"
+        inicio, tamanho = self._intervalos.get(chave, (0, 0))
+        return self.tabela.slice(inicio, tamanho)
+
+
+def escrever_snapshot(tabela: pa.Table, caminho: str) -> None:
+    """ Ordena, calcula os intervalos por grupo e grupo/cota e grava o arquivo de forma atômica """
+    tabela = tabela.sort_by([('grupo', 'ascending'), ('cota', 'ascending'), ('posicao', 'ascending')])
+
+    intervalos = {}
+    chaves = zip(tabela['grupo'].to_pylist(), tabela['cota'].to_pylist())
+    for linha, (grupo, cota) in enumerate(chaves):
+        for chave in (grupo, f"{grupo}|{cota}"):
+            inicio, tamanho = intervalos.get(chave, (linha, 0))
+            intervalos[chave] = (inicio, tamanho + 1)
+
+    tabela = tabela.replace_schema_metadata({'intervalos': json.dumps(intervalos)})
+    # Grava ao lado e troca com os.replace: quem já mapeou o arquivo antigo continua lendo o antigo
+    temporario = f"{caminho}.{uuid.uuid4().hex}.tmp"
+    with pa.OSFile(temporario, 'wb') as destino:
+        with pa.ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    os.replace(temporario, caminho)
+
+
+def snapshot_aprovados(db: Database) -> SnapshotAprovados:
+    """ Snapshot da versão atual de 'lista_aprovados' (remontado só quando a tabela muda) """
+    return _snapshot_aprovados(db, db.db_url, db.versaoTabela(TabelaAprovados))
+
+
+# cache_resource: o snapshot é só leitura, então é compartilhado sem cópia entre as sessões
+@st.cache_resource(max_entries=2)
+def _snapshot_aprovados(_db: Database, db_url: str, versao: int) -> SnapshotAprovados:
+    diretorio = _configuracao("SNAPSHOT_APROVADOS_DIR", tempfile.gettempdir())
+    prefixo = f"aprovados_{hashlib.sha256(db_url.encode()).hexdigest()[:12]}_v"
+    caminho = os.path.join(diretorio, f"{prefixo}{versao}.arrow")
+
+    for _ in range(3):
+        try:
+            # Outro processo pode já ter gravado esta versão
+            return SnapshotAprovados(caminho)
+        except FileNotFoundError:
+            # Ainda não gravada, ou removida por um processo que já está numa versão mais nova
+            df = _db.lerTabela(TabelaAprovados, colunas=['n_inscr', 'posicao', 'nome', 'grupo', 'cota'])
+            escrever_snapshot(pa.Table.from_pandas(df, preserve_index=False), caminho)
+            _remover_versoes_anteriores(diretorio, prefixo, versao)
+    return SnapshotAprovados(caminho)
+
+
+def _remover_versoes_anteriores(diretorio: str, prefixo: str, versao: int) -> None:
+    """
+    Remove só as versões menores que 'versao': as mais novas pertencem a processos que já
+    viram a mudança. Quem ainda mapeia um arquivo removido mantém acesso a ele.
+    """
+    for nome in os.listdir(diretorio):
+        numero = nome[len(prefixo):-len('.arrow')]
+        if nome.startswith(prefixo) and nome.endswith('.arrow') and numero.isdigit() and int(numero) < versao:
+            try:
+                os.remove(os.path.join(diretorio, nome))
+            except OSError:
+                pass
@@ -0,0 +1,68 @@
+"""
+
+Trabalhador que esvazia a fila de envios (tabela 'envios_mensagens') fora do Streamlit.
+
+Uso:
+    python trabalhador_envios.py              # roda continuamente
+    python trabalhador_envios.py --uma-vez    # processa o que houver e termina
+
+Vários trabalhadores podem rodar ao mesmo tempo (no PostgreSQL, cada um reserva lotes diferentes).
+
+"""
+
+import time
+import argparse
+import streamlit as st
+from sqlalchemy import select
+from database import Database, TabelaMensagens
+from envio_whatsapp import DisparadorWhatsApp
+from envio_email import CanalEmail
+from fila_envios import FilaEnvios, processar_lote
+
+
+def montar_canais() -> dict:
+    """ Funções de envio de cada canal configurado: (destinatarios, mensagem) -> status """
+    canais = {}
+    if "TWILIO_SID" in st.secrets:
+        whatsapp = DisparadorWhatsApp.dos_secrets(st.secrets)
+        canais['whatsapp'] = lambda destinatarios, mensagem: whatsapp.enviar(destinatarios, mensagem['conteudo'])
+    if "SMTP_HOST" in st.secrets:
+        email = CanalEmail.dos_secrets(st.secrets)
+        canais['email'] = lambda destinatarios, mensagem: email.enviar(destinatarios, mensagem['titulo'], mensagem['conteudo'])
+    return canais
+
+
+def buscar_mensagens(db: Database):
+    def buscar(ids: list) -> dict:
+        with db._sessao() as session:
+            linhas = session.execute(
+                select(TabelaMensagens.id_mensagem, TabelaMensagens.titulo, TabelaMensagens.conteudo)
+                .where(TabelaMensagens.id_mensagem.in_(ids))
+            ).all()
+        return {linha.id_mensagem: dict(linha._mapping) for linha in linhas}
+    return buscar
+
+
+def main(tamanho_lote: int, intervalo: float, uma_vez: bool) -> None:
+    db = Database()
+    fila = FilaEnvios(db)
+    canais = montar_canais()
+    print(f"Trabalhador de envios iniciado. Canais: {', '.join(canais) or 'nenhum'}")
+
+    while True:
+        processados = processar_lote(fila, canais, buscar_mensagens(db), tamanho_lote)
+        if processados:
+            print(f"{processados} envio(s) processado(s)")
+            continue
+        if uma_vez:
+            break
+        time.sleep(intervalo)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lote', type=int, default=50, help='envios reservados por ciclo')
+    parser.add_argument('--intervalo', type=float, default=5, help='segundos de espera quando a fila está vazia')
+    parser.add_argument('--uma-vez', action='store_true')
+    args = parser.parse_args()
+    main(args.lote, args.intervalo, args.uma_vez)
@@ -3,9 +3,8 @@
 Classes para controlar usuários
 
 """
-import sqlalchemy 
-import pandas as pd 
 from typing import Union
+from sqlalchemy import select
 from database import Database, TabelaUsuario, retornarListaUsuariosNaFrente
 from datetime import datetime 
 
@@ -64,7 +63,21 @@ class Usuario:
 
 
         if len(atualizacoes) > 0:
-            db.atualizarTabela(TabelaUsuario, filtros, atualizacoes)
+            with db.unidadeDeTrabalho('mudarDados') as unidade:
+                # Opção atual lida na própria transação, com a linha travada, e nunca do cache:
+                # um valor antigo geraria deltas errados e permanentes na classificação
+                opcao_antiga = unidade.session.execute(
+                    select(TabelaUsuario.opcao).where(TabelaUsuario.n_inscr == self.n_inscr).with_for_update()
+                ).scalar_one()
+                db.atualizarTabela(TabelaUsuario, filtros, atualizacoes)
+                if 'opcao' in atualizacoes:
+                    from classificacao import Classificacao  # numpy/pandas só quando a opção muda
+                    Classificacao(db).mudar_opcao(self.grupo, self.cota, self.posicao, opcao_antiga, atualizacoes['opcao'])
+
+            # Mantém o objeto da sessão coerente com o banco
+            for campo, valor in atualizacoes.items():
+                setattr(self, campo, valor)
+
             return {
                     'função': 'mudarDados', 
                     'data': datetime.now(), 
@@ -81,7 +94,7 @@ class Usuario:
         
 
     def verOpcoes(self, db: Database) -> dict:
-        lista_opcoes = retornarListaUsuariosNaFrente(db=db, grupo=self.grupo, posicao=self.posicao)
+        lista_opcoes = retornarListaUsuariosNaFrente(db=db, grupo=self.grupo, posicao=self.posicao, cota=self.cota)
         lista_opcoes = lista_opcoes.groupby(['opcao'])['n_inscr'].count() 
 
         return  {
@@ -1,13 +1,30 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import bcrypt
-from cryptography.fernet import Fernet
 import streamlit as st
-import validators
+
+
+CUSTO_BCRYPT_PADRAO = 12
+
+
+def _configuracao(nome: str, padrao):
+    # Lê dos secrets, sem exigir que o arquivo exista (scripts e benchmarks)
+    try:
+        return st.secrets.get(nome, padrao)
+    except FileNotFoundError:
+        return padrao
+
+
+def custo_bcrypt() -> int:
+    """ Fator de custo do bcrypt (log2 das rodadas): BCRYPT_ROUNDS nos secrets, padrão 12 """
+    return int(_configuracao("BCRYPT_ROUNDS", CUSTO_BCRYPT_PADRAO))
 
 
 # Função para gerar o hash da senha
-def hash_password(password: str) -> str:
+def hash_password(password: str, custo: int = None) -> str:
     # Converte a senha para bytes e gera o hash
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=custo or custo_bcrypt())
     hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed_password.decode('utf-8')
 
@@ -17,11 +34,67 @@ def verify_password(password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
+def custo_do_hash(hashed_password: str) -> int:
+    """ Fator de custo gravado no hash ('$2b$12$...' -> 12) """
+    return int(hashed_password.split('$')[2])
+
+
+def precisa_rehash(hashed_password: str, custo: int = None) -> bool:
+    """ True se o hash foi gerado com um custo diferente do configurado """
+    return custo_do_hash(hashed_password) != (custo or custo_bcrypt())
+
+
+class SenhasOcupadas(Exception):
+    """ A fila de verificações de senha está cheia (pico de logins) """
+
+
+class PoolSenhas:
+    """
+    Executa hash/verificação de senhas num pool de threads limitado.
+
+    O bcrypt libera o GIL, então 'threads' verificações rodam em paralelo de fato;
+    o semáforo limita quantas podem esperar na fila ('fila'), para que um pico de
+    logins não empilhe trabalho indefinidamente: acima disso, SenhasOcupadas.
+    """
+
+    def __init__(self, threads: int = None, fila: int = None, espera_maxima: float = 10):
+        self.threads = threads or os.cpu_count() or 1
+        self.espera_maxima = espera_maxima
+        self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='bcrypt')
+        self._vagas = threading.BoundedSemaphore(self.threads + (fila if fila is not None else 4 * self.threads))
+
+    def _executar(self, funcao, *args):
+        if not self._vagas.acquire(timeout=self.espera_maxima):
+            raise SenhasOcupadas("Muitos acessos simultâneos. Tente novamente em instantes.")
+        try:
+            return self._pool.submit(funcao, *args).result()
+        finally:
+            self._vagas.release()
+
+    def verificar(self, password: str, hashed_password: str) -> bool:
+        return self._executar(verify_password, password, hashed_password)
+
+    def gerar_hash(self, password: str, custo: int = None) -> str:
+        return self._executar(hash_password, password, custo)
+
+
+@st.cache_resource
+def pool_senhas() -> PoolSenhas:
+    """ Pool único por processo (BCRYPT_THREADS e BCRYPT_FILA nos secrets) """
+    threads = _configuracao("BCRYPT_THREADS", None)
+    fila = _configuracao("BCRYPT_FILA", None)
+    return PoolSenhas(
+        threads=int(threads) if threads else None,
+        fila=int(fila) if fila is not None else None
+    )
+
+
 def encriptar_arquivo(conteudo_arquivo: bytes, chave: bytes) -> bytes:
     """
     Recebe o conteúdo do arquivo em bytes e retorna
     o conteúdo criptografado.
     """
+    from cryptography.fernet import Fernet  # só quem lida com documentos paga a importação
     f = Fernet(chave)
     return f.encrypt(conteudo_arquivo)
 
@@ -30,6 +103,7 @@ def decriptar_arquivo(conteudo_criptografado: bytes, chave: bytes) -> bytes:
     Recebe o conteúdo criptografado em bytes e retorna
     o conteúdo original, decriptado.
     """
+    from cryptography.fernet import Fernet
     f = Fernet(chave)
     return f.decrypt(conteudo_criptografado)
 
@@ -47,4 +121,5 @@ def carregar_chave_criptografia(caminho_chave="chave_fernet.key"):
 
 
 def is_valid_link(url):
+    import validators
     return validators.url(url)